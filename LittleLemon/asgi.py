@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LittleLemon.settings')
+os.environ.setdefault('LITTLELEMON_ASYNC_VIEWS', '1')  # Native async read views (ASYNC_READ_VIEWS)
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'LittleLemonAPI.instrumentation.InstrumentationMiddleware',  # No-op unless INSTRUMENTATION_ENABLED
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,13 +79,129 @@ WSGI_APPLICATION = 'LittleLemon.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# The profile is picked from the environment:
+# - DATABASE_ENGINE=sqlite (default) uses DATABASE_NAME or BASE_DIR / 'db.sqlite3'. Every connection
+#   switches to WAL journaling with synchronous=NORMAL, waits up to SQLITE_BUSY_TIMEOUT seconds for
+#   the write lock, and maps and caches pages in memory. Write transactions start IMMEDIATE, so
+#   concurrent checkouts queue for the lock instead of failing with "database is locked".
+# - DATABASE_ENGINE=postgresql uses DATABASE_NAME, DATABASE_USER, DATABASE_PASSWORD, DATABASE_HOST
+#   and DATABASE_PORT. DATABASE_POOL=1 uses psycopg's connection pool (psycopg[pool]) with up to
+#   DATABASE_POOL_SIZE connections; pooled connections are not also kept open per thread.
+# Otherwise connections are kept open for DATABASE_CONN_MAX_AGE seconds and health-checked before reuse.
+# DATABASE_TUNING=0 falls back to Django's defaults, e.g. to benchmark against them.
+
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+DATABASE_TUNING = os.environ.get('DATABASE_TUNING', '1') == '1'
+DATABASE_POOL = os.environ.get('DATABASE_POOL') == '1'
+DATABASE_CONN_MAX_AGE = int(os.environ.get('DATABASE_CONN_MAX_AGE', 60))
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))  # Seconds
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes
+SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE', 64 * 1024))  # KiB per connection
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DATABASE_NAME', 'littlelemon'),
+            'USER': os.environ.get('DATABASE_USER', ''),
+            'PASSWORD': os.environ.get('DATABASE_PASSWORD', ''),
+            'HOST': os.environ.get('DATABASE_HOST', ''),
+            'PORT': os.environ.get('DATABASE_PORT', ''),
+            'OPTIONS': {},
+        }
+    }
+    if DATABASE_TUNING and DATABASE_POOL:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': 2,
+            'max_size': int(os.environ.get('DATABASE_POOL_SIZE', 20)),
+            'timeout': 10,
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DATABASE_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {},
+        }
     }
+    if DATABASE_TUNING:
+        DATABASES['default']['OPTIONS'] = {
+            'timeout': SQLITE_BUSY_TIMEOUT,
+            'transaction_mode': 'IMMEDIATE',
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                f'PRAGMA mmap_size={SQLITE_MMAP_SIZE};'
+                f'PRAGMA cache_size=-{SQLITE_CACHE_SIZE};'
+                'PRAGMA temp_store=MEMORY;'
+            ),
+        }
+
+if DATABASE_TUNING and 'pool' not in DATABASES['default']['OPTIONS']:
+    DATABASES['default']['CONN_MAX_AGE'] = DATABASE_CONN_MAX_AGE
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Read replica: DATABASE_REPLICA is the replica's SQLite file (see the sync_replica command)
+# or PostgreSQL host. Catalog and order-history reads go to it through ReplicaRouter; writes,
+# and a user's reads for REPLICA_STICKY_SECONDS after they write, stay on the primary (a signed
+# cookie carries that pin to whichever worker serves the next request).
+DATABASE_REPLICA = os.environ.get('DATABASE_REPLICA')
+if DATABASE_REPLICA:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME' if DATABASE_ENGINE == 'sqlite' else 'HOST': DATABASE_REPLICA,
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_DATABASE_ALIAS = 'replica' if DATABASE_REPLICA else None
+REPLICA_STICKY_SECONDS = 5
+DATABASE_ROUTERS = ['LittleLemonAPI.db_router.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The default cache holds per-user state every worker must agree on (cached roles); it defaults
+# to local memory, which each process keeps on its own. Point DEFAULT_CACHE_BACKEND (and
+# DEFAULT_CACHE_LOCATION) at django.core.cache.backends.redis.RedisCache or another shared
+# backend to cache that state across requests.
+# The catalog cache defaults to local memory; point CATALOG_CACHE_BACKEND at
+# django.core.cache.backends.filebased.FileBasedCache or
+# django.core.cache.backends.redis.RedisCache to share it between workers. Entries are keyed by
+# the catalog version, which always lives in a shared store (see CATALOG_VERSION_STORE below).
+# The throttle cache holds rate limit counters; see THROTTLE_STORE below.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('DEFAULT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DEFAULT_CACHE_LOCATION', ''),
+    },
+    'catalog': {
+        'BACKEND': os.environ.get('CATALOG_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CATALOG_CACHE_LOCATION', 'littlelemon-catalog'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    'throttle': {
+        'BACKEND': os.environ.get('THROTTLE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('THROTTLE_CACHE_LOCATION', 'littlelemon-throttle'),
+    },
 }
 
+# Whether every worker process sees the same default cache
+DEFAULT_CACHE_SHARED = CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'
+
+# Cache alias and timeout (seconds) for serialized menu item and category responses
+CATALOG_CACHE_ALIAS = 'catalog'
+CATALOG_CACHE_TIMEOUT = 600
+
+# Where the catalog version lives. Cached catalog responses and their ETags are keyed by it, so
+# every worker must see a change made in any other, or it serves stale entries (and 304s) until
+# CATALOG_CACHE_TIMEOUT:
+# - SQLiteVersionStore (default) uses the THROTTLE_SQLITE_PATH file, shared by every worker on the host.
+# - CacheVersionStore uses the catalog cache, for several hosts: set CATALOG_CACHE_BACKEND to a shared
+#   backend. With the default local memory cache each process would keep its own version.
+CATALOG_VERSION_STORE = os.environ.get('CATALOG_VERSION_STORE', 'LittleLemonAPI.catalog_cache.SQLiteVersionStore')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -128,7 +246,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES':[
-        'rest_framework.authentication.TokenAuthentication',
+        'LittleLemonAPI.authentication.CachedTokenAuthentication',  # TokenAuthentication with an LRU/TTL cache
     ],
     # Enable filtering and Ordering
     'DEFAULT_FILTER_BACKENDS': [
@@ -137,16 +255,105 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
     ],
     # Enable pagination 
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'LittleLemonAPI.pagination.AsyncPageNumberPagination',  # PageNumberPagination usable from async views
     'PAGE_SIZE': 10,  # Default number of items per page
 
     # Throttling settings
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',  # For unauthenticated users
-        'rest_framework.throttling.UserRateThrottle',  # For authenticated users
+        'LittleLemonAPI.throttling.SharedAnonRateThrottle',  # For unauthenticated users
+        'LittleLemonAPI.throttling.SharedUserRateThrottle',  # For authenticated users
+        'LittleLemonAPI.throttling.EndpointRateThrottle',  # Per-endpoint limits by view throttle_scope
     ],
     'DEFAULT_THROTTLE_RATES': {
         'anon': '10/minute',  # Limit anonymous users to 10 requests per minute
         'user': '100/minute',  # Limit authenticated users to 100 requests per minute
+        'orders.create': '10/minute',  # Checkouts
+        'cart.post': '60/minute',
+        'menu-items.list': '60/minute',
     },
 }
+
+# Where throttle counters live; a limit only holds across workers if they share the store:
+# - SQLiteCounterStore (default) uses a SQLite file shared by every worker process on the host.
+# - CacheCounterStore uses the 'throttle' cache, for several hosts: set THROTTLE_CACHE_BACKEND to
+#   django.core.cache.backends.redis.RedisCache (and THROTTLE_CACHE_LOCATION). With the default
+#   local memory cache each process counts on its own, allowing workers x limit requests.
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'LittleLemonAPI.throttling.SQLiteCounterStore')
+THROTTLE_CACHE_ALIAS = 'throttle'
+THROTTLE_SQLITE_PATH = os.environ.get('THROTTLE_SQLITE_PATH', BASE_DIR / 'throttle.sqlite3')
+
+# Seconds a user's group roles stay in the default cache (0 disables it). Only on by default when
+# that cache is shared: a role change clears it, which a per-process cache would only do in the
+# process that made the change. Roles are always resolved at most once per request.
+ROLE_CACHE_TIMEOUT = 300 if DEFAULT_CACHE_SHARED else 0
+
+# Authenticated tokens (with the user's roles) kept per process, and for how many seconds (0 disables it).
+# Revocations (logout, token deletion, user and role changes) reach the other workers through the
+# default cache, so the token cache is only on by default when that cache is shared.
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TIMEOUT = 60 if DEFAULT_CACHE_SHARED else 0
+
+# Seconds an /api/orders/summary/ result is cached per role scope and query string
+ORDER_SUMMARY_CACHE_TIMEOUT = 30
+
+# Serve menu item, category and order reads from native async views.
+# LittleLemon/asgi.py turns it on; under WSGI the sync views are used.
+ASYNC_READ_VIEWS = os.environ.get('LITTLELEMON_ASYNC_VIEWS') == '1'
+
+# Opt-in: render the menu item, order and cart list pages from values_list() rows through a
+# precompiled field plan instead of model instances and serializers; the JSON is the same. Set
+# LITTLELEMON_FAST_LISTS=1 to turn it on, or fast_list_serialization on a view (see fast_lists.py).
+FAST_LIST_SERIALIZATION = os.environ.get('LITTLELEMON_FAST_LISTS') == '1'
+
+# Rows per INSERT/UPDATE statement in bulk menu imports (POST menu-items/bulk, import_menu);
+# the whole import still runs in one transaction.
+MENU_IMPORT_BATCH_SIZE = int(os.environ.get('LITTLELEMON_MENU_IMPORT_BATCH_SIZE', 500))
+
+# Background jobs (jobs.py), stored in the database and run by the runworker command:
+# - A worker claims JOBS_BATCH_SIZE due jobs at a time and holds them for JOBS_LEASE_SECONDS;
+#   jobs of a worker that died become claimable again when the lease expires.
+# - A failed job is retried after JOBS_RETRY_DELAY seconds, doubling up to JOBS_RETRY_MAX_DELAY,
+#   and marked failed after JOBS_MAX_ATTEMPTS runs.
+# - Finished jobs are deleted after JOBS_KEEP_DONE seconds; failed ones are kept.
+JOBS_BATCH_SIZE = 50
+JOBS_LEASE_SECONDS = 300
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10
+JOBS_RETRY_MAX_DELAY = 3600
+JOBS_KEEP_DONE = 7 * 24 * 3600
+
+# Assign each new order to the least-loaded Delivery Crew member from the order.placed job
+ORDER_AUTO_DISPATCH = os.environ.get('LITTLELEMON_AUTO_DISPATCH') == '1'
+
+# Order change streams (/api/orders/events/, Server-Sent Events under ASGI):
+# - ORDER_EVENTS_BROKER fans events out to the streams: LocalBroker within one process,
+#   RedisBroker (ORDER_EVENTS_REDIS_URL) across all worker processes.
+# - Each process serves up to ORDER_EVENTS_MAX_SUBSCRIBERS streams, each buffering at most
+#   ORDER_EVENTS_QUEUE_SIZE events; a stream that falls behind gets a 'resync' event instead.
+# - Streams send a keep-alive every ORDER_EVENTS_HEARTBEAT seconds and end after
+#   ORDER_EVENTS_STREAM_SECONDS, so clients reconnect and authenticate again.
+ORDER_EVENTS_BROKER = os.environ.get('ORDER_EVENTS_BROKER', 'LittleLemonAPI.order_events.LocalBroker')
+ORDER_EVENTS_REDIS_URL = os.environ.get('ORDER_EVENTS_REDIS_URL', 'redis://localhost:6379/0')
+ORDER_EVENTS_MAX_SUBSCRIBERS = 5000
+ORDER_EVENTS_QUEUE_SIZE = 100
+ORDER_EVENTS_HEARTBEAT = 15
+ORDER_EVENTS_STREAM_SECONDS = 300
+ORDER_EVENTS_RETRY_MS = 3000  # EventSource reconnection delay
+
+# Idempotency-Key handling for checkout and cart adds (idempotency.py):
+# - The first response to a key is kept for IDEMPOTENCY_TTL seconds and replayed to retries.
+# - A retry arriving while the first request runs waits up to IDEMPOTENCY_WAIT_SECONDS for it, then
+#   gets a 409. It takes the key over instead only if the first request's transaction rolled back.
+IDEMPOTENCY_TTL = 24 * 3600
+IDEMPOTENCY_WAIT_SECONDS = 10
+
+# Rows fetched per round trip by the streaming /api/orders/export/ endpoint
+EXPORT_CHUNK_SIZE = 2000
+
+# Opt-in per-view instrumentation: query count, DB time, serializer time and wall time.
+# Read it from /api/instrumentation/ or with the instrumentation_report command.
+INSTRUMENTATION_ENABLED = os.environ.get('LITTLELEMON_INSTRUMENTATION') == '1'
+INSTRUMENTATION_SAMPLES = 1000  # Rolling window per view and metric
+INSTRUMENTATION_SLOW_QUERY_MS = 100  # Queries slower than this are logged with their view
+INSTRUMENTATION_DUMP_DIR = BASE_DIR / 'instrumentation'  # Per-process sample dumps (None disables)
+INSTRUMENTATION_DUMP_SECONDS = 30
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LittlelemonapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'LittleLemonAPI'
+
+    def ready(self):
+        from . import signals  # noqa: F401 -- registers signal receivers
+        from . import tasks  # noqa: F401 -- registers job handlers
@@ -0,0 +1,149 @@
+from functools import update_wrapper
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models.query import ValuesListIterable
+from django.http import Http404
+from rest_framework.response import Response
+from .authentication import aauthenticate_request
+from .roles import aget_roles
+
+FETCH_CHUNK_SIZE = 2000  # Rows per round trip when an async view reads a queryset
+
+async def afetch(queryset):
+    """
+    Evaluate a queryset with the async ORM.
+    A chunk size is always given so prefetch_related() lookups are honoured.
+    """
+    if queryset._iterable_class is ValuesListIterable:
+        # Its __iter__() runs the query when called, which aiterator() does on the event loop
+        return await sync_to_async(list)(queryset)
+    return [row async for row in queryset.aiterator(chunk_size=FETCH_CHUNK_SIZE)]
+
+
+class AsyncReadMixin:
+    """
+    Native async read actions for a ViewSet served under ASGI (ASYNC_READ_VIEWS):
+    - Actions in async_actions run as coroutines: authentication, roles, the page count
+      and the page rows go through the async ORM instead of a thread per request.
+    - Responses are the same as the sync actions': content negotiation, permissions,
+      throttles, filters, pagination and exception handling are DRF's own.
+    - Every other action, and every action when ASYNC_READ_VIEWS is off, runs the sync view.
+    Mixins override alist/aretrieve next to list/retrieve, and this class must come
+    after them, right before the DRF ViewSet.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READ_VIEWS or not set(actions.values()) & set(cls.async_actions):
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if 'get' in actions and 'head' not in actions:
+                actions['head'] = actions['get']
+            if actions.get(request.method.lower()) not in cls.async_actions:
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # Keep cls, initkwargs, actions and csrf_exempt for the router, instrumentation and CSRF middleware
+        update_wrapper(async_view, view)
+        return async_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        APIView.dispatch() with an async handler.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await self.ainitial(request, *args, **kwargs)
+            response = await getattr(self, f'a{self.action}')(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def ainitial(self, request, *args, **kwargs):
+        """
+        APIView.initial() with async authentication. Roles are resolved before the
+        permission checks, so the sync role helpers they call need no query.
+        Throttle stores may block (SQLite, Redis), so the checks run in a thread.
+        """
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+        request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+
+        await aauthenticate_request(request)
+        await aget_roles(request.user)
+        self.check_permissions(request)
+        await sync_to_async(self.check_throttles)(request)
+
+    def filters_need_queries(self, queryset):
+        """
+        Whether the filter backends will query the database, e.g. to validate ?category=.
+        """
+        params = self.request.query_params
+        return any(
+            name in params and queryset.model._meta.get_field(name).is_relation
+            for name in getattr(self, 'filterset_fields', ())
+        )
+
+    async def afilter_queryset(self, queryset):
+        if self.filters_need_queries(queryset):
+            return await sync_to_async(self.filter_queryset)(queryset)
+        return self.filter_queryset(queryset)
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        apaginate = getattr(self.paginator, 'apaginate_queryset', None)
+        if apaginate is None:
+            return await sync_to_async(self.paginator.paginate_queryset)(queryset, self.request, view=self)
+        return await apaginate(queryset, self.request, view=self)
+
+    async def aget_object(self):
+        """
+        get_object() with the async ORM; same 404s, same object permission checks.
+        """
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404  # A malformed lookup value, as in DRF's get_object_or_404()
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = self.get_serializer(await afetch(queryset), many=True)
+        return Response(serializer.data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
@@ -0,0 +1,190 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import exceptions
+from asgiref.sync import sync_to_async
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from .roles import aget_roles, get_roles
+
+REVOKED_PREFIX = 'littlelemon:token-revoked:'
+
+class TokenCache:
+    """
+    Bounded LRU of token key -> (user, token, cached at), with a TTL.
+    Entries are also indexed by user id so a user's tokens can be dropped at once.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.keys_by_user = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[3] > settings.TOKEN_CACHE_TIMEOUT:
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, user, token):
+        if not settings.TOKEN_CACHE_TIMEOUT:
+            return  # A falsy timeout disables the cache
+        with self.lock:
+            self._drop(key)
+            self.entries[key] = (user, token, time.time(), time.monotonic())
+            self.keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self.entries) > settings.TOKEN_CACHE_SIZE:
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            keys = self.keys_by_user.get(entry[0].pk)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.keys_by_user[entry[0].pk]
+
+    def invalidate_key(self, key):
+        with self.lock:
+            self._drop(key)
+
+    def invalidate_user(self, user_id):
+        with self.lock:
+            for key in list(self.keys_by_user.get(user_id, ())):
+                self._drop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.keys_by_user.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+token_cache = TokenCache()
+
+def invalidate_user_tokens(*user_ids):
+    """
+    Drop cached tokens for these users in this process and mark them revoked in the default
+    cache; other workers stop trusting their copies when that cache is shared (DEFAULT_CACHE_SHARED).
+    """
+    now = time.time()
+    for user_id in user_ids:
+        token_cache.invalidate_user(user_id)
+    if user_ids:
+        cache.set_many({f'{REVOKED_PREFIX}{user_id}': now for user_id in user_ids}, settings.TOKEN_CACHE_TIMEOUT)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for TokenAuthentication that caches the token -> user lookup
+    together with the user's roles (TOKEN_CACHE_SIZE entries for TOKEN_CACHE_TIMEOUT seconds).
+    - Invalidated on logout, token deletion, user changes and group membership changes.
+    - A hot request costs one default-cache read instead of the Token/User join and role query.
+    - Off by default unless the default cache is shared, since revocations travel through it.
+    """
+    def get_key(self, request):
+        """
+        The token key from the Authorization header, or None when another scheme is used.
+        """
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. No credentials provided.'))
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain spaces.'))
+        try:
+            return auth[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid token header. Token string should not contain invalid characters.'))
+
+    def authenticate(self, request):
+        key = self.get_key(request)
+        return None if key is None else self.authenticate_credentials(key)
+
+    async def aauthenticate(self, request):
+        key = self.get_key(request)
+        return None if key is None else await self.aauthenticate_credentials(key)
+
+    def get_cached(self, key):
+        """
+        (user copy, token) from the token cache, unless the user was revoked since it was cached.
+        """
+        entry = token_cache.get(key)
+        if entry is None:
+            return None
+        return self.unless_revoked(key, entry, cache.get(f'{REVOKED_PREFIX}{entry[0].pk}'))
+
+    async def aget_cached(self, key):
+        entry = token_cache.get(key)
+        if entry is None:
+            return None
+        return self.unless_revoked(key, entry, await cache.aget(f'{REVOKED_PREFIX}{entry[0].pk}'))
+
+    def unless_revoked(self, key, entry, revoked_at):
+        user, token, cached_at = entry[:3]
+        if revoked_at is None or revoked_at < cached_at:
+            return copy.copy(user), token  # Per-request copy; the cached instance is shared between threads
+        token_cache.invalidate_key(key)
+        return None
+
+    def remember(self, key, token):
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        token_cache.set(key, token.user, token)
+        return copy.copy(token.user), token
+
+    def authenticate_credentials(self, key):
+        credentials = self.get_cached(key)
+        if credentials is not None:
+            return credentials
+        model = self.get_model()
+        try:
+            token = model.objects.select_related('user').get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if token.user.is_active:
+            get_roles(token.user)  # Resolve roles now so they are cached with the user
+        return self.remember(key, token)
+
+    async def aauthenticate_credentials(self, key):
+        credentials = await self.aget_cached(key)
+        if credentials is not None:
+            return credentials
+        model = self.get_model()
+        try:
+            token = await model.objects.select_related('user').aget(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        if token.user.is_active:
+            await aget_roles(token.user)
+        return self.remember(key, token)
+
+
+async def aauthenticate_request(request):
+    """
+    Request._authenticate() for async views: authenticators with an aauthenticate()
+    coroutine are awaited, others run in a thread.
+    """
+    for authenticator in request.authenticators:
+        authenticate = getattr(authenticator, 'aauthenticate', None) or sync_to_async(authenticator.authenticate)
+        try:
+            user_auth_tuple = await authenticate(request)
+        except exceptions.APIException:
+            request._not_authenticated()
+            raise
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+    request._not_authenticated()
@@ -0,0 +1,56 @@
+from decimal import Decimal
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from .models import Cart, MenuItem
+
+def max_line_total():
+    """
+    The largest total_price a cart line can store.
+    """
+    field = Cart._meta.get_field('total_price')
+    return Decimal(10) ** (field.max_digits - field.decimal_places) - Decimal(10) ** -field.decimal_places
+
+def line_errors(line, menuitems, limit):
+    if line['menuitem'] not in menuitems:
+        return {'menuitem': [f'Invalid pk "{line["menuitem"]}" - object does not exist.']}
+    if line['quantity'] * menuitems[line['menuitem']].price > limit:
+        return {'quantity': [f'The line total must not exceed {limit}.']}
+    return {}
+
+def update_cart(user, lines):
+    """
+    Apply many cart lines in a fixed number of queries:
+    - Resolve every menu item price with one in_bulk.
+    - Upsert quantities with one bulk_create(update_conflicts=True).
+    - Remove lines with quantity 0 with one delete.
+    lines is a list of {'menuitem': id, 'quantity': n}; errors are reported per line, including
+    totals too large for Cart.total_price.
+    """
+    menuitems = MenuItem.objects.only('id', 'price').in_bulk({line['menuitem'] for line in lines})
+    limit = max_line_total()
+    errors = [line_errors(line, menuitems, limit) for line in lines]
+    if any(errors):
+        raise ValidationError({'lines': errors})
+
+    upserts = [
+        Cart(
+            user=user,
+            menuitem_id=line['menuitem'],
+            quantity=line['quantity'],
+            unit_price=menuitems[line['menuitem']].price,
+            total_price=line['quantity'] * menuitems[line['menuitem']].price,
+        )
+        for line in lines if line['quantity'] > 0
+    ]
+    removals = [line['menuitem'] for line in lines if line['quantity'] == 0]
+    with transaction.atomic():
+        if upserts:
+            Cart.objects.bulk_create(
+                upserts,
+                update_conflicts=True,
+                unique_fields=['menuitem', 'user'],
+                update_fields=['quantity', 'unit_price', 'total_price'],
+            )
+        if removals:
+            Cart.objects.filter(user=user, menuitem_id__in=removals).delete()
+    return Cart.objects.filter(user=user).order_by('id')
@@ -0,0 +1,274 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.response import Response
+from .db_router import sticky_seconds
+
+VERSION_KEY = 'littlelemon:catalog:version'
+MODIFIED_KEY = 'littlelemon:catalog:modified'
+TRACKED_KEYS = 10000  # Recently written keys remembered to tell evictions from cold misses
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+_written = OrderedDict()
+
+def get_cache():
+    """
+    The cache backend that stores catalog responses.
+    Any Django cache alias works: local memory by default, file or Redis for multi-worker deployments.
+    """
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 600)
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+class CacheVersionStore:
+    """
+    Catalog version and modification time in the catalog cache (CATALOG_CACHE_ALIAS).
+    - Every worker sees a change only when that cache is shared (Redis, Memcached, file);
+      with the default local memory each process keeps its own version.
+    - A missing version is seeded from the clock, so a flushed cache never revives old entries.
+    """
+    def get(self):
+        """
+        (version, last modified timestamp or None).
+        """
+        cache = get_cache()
+        values = cache.get_many([VERSION_KEY, MODIFIED_KEY])
+        if VERSION_KEY not in values:
+            cache.add(VERSION_KEY, time.time_ns(), None)
+            values[VERSION_KEY] = cache.get(VERSION_KEY)
+        return values[VERSION_KEY], values.get(MODIFIED_KEY)
+
+    async def aget(self):
+        cache = get_cache()
+        values = await cache.aget_many([VERSION_KEY, MODIFIED_KEY])
+        if VERSION_KEY not in values:
+            await cache.aadd(VERSION_KEY, time.time_ns(), None)
+            values[VERSION_KEY] = await cache.aget(VERSION_KEY)
+        return values[VERSION_KEY], values.get(MODIFIED_KEY)
+
+    def bump(self):
+        cache = get_cache()
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, time.time_ns(), None)
+        cache.set(MODIFIED_KEY, time.time(), None)
+
+    def clear(self):
+        get_cache().delete_many([VERSION_KEY, MODIFIED_KEY])
+
+
+class SQLiteVersionStore:
+    """
+    Catalog version and modification time in a SQLite file (THROTTLE_SQLITE_PATH by default)
+    shared by every worker on the host.
+    - One row, read with a primary key lookup and bumped with a single UPSERT.
+    - The version starts from the clock, so a deleted file never revives old entries.
+    """
+    def __init__(self, path=None):
+        self.path = str(path or settings.THROTTLE_SQLITE_PATH)
+        self.local = threading.local()
+
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS catalog_version '
+                '(id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL, modified REAL)'
+            )
+            self.local.connection = conn
+        return conn
+
+    def get(self):
+        conn = self.connection()
+        row = conn.execute('SELECT version, modified FROM catalog_version WHERE id = 1').fetchone()
+        if row is None:
+            conn.execute('INSERT OR IGNORE INTO catalog_version (id, version) VALUES (1, ?)', (time.time_ns(),))
+            row = conn.execute('SELECT version, modified FROM catalog_version WHERE id = 1').fetchone()
+        return row
+
+    async def aget(self):
+        return await sync_to_async(self.get)()
+
+    def bump(self):
+        self.connection().execute(
+            'INSERT INTO catalog_version (id, version, modified) VALUES (1, ?, ?) '
+            'ON CONFLICT (id) DO UPDATE SET version = version + 1, modified = excluded.modified',
+            (time.time_ns(), time.time()),
+        )
+
+    def clear(self):
+        self.connection().execute('DELETE FROM catalog_version')
+
+
+@lru_cache(maxsize=None)
+def _load_version_store(path):
+    return import_string(path)()
+
+def get_version_store():
+    """
+    The process-wide catalog version store named by CATALOG_VERSION_STORE.
+    """
+    return _load_version_store(getattr(settings, 'CATALOG_VERSION_STORE', 'LittleLemonAPI.catalog_cache.SQLiteVersionStore'))
+
+def get_version():
+    """
+    Current catalog version, from the store every worker shares.
+    """
+    return get_version_store().get()[0]
+
+async def aget_version():
+    """
+    get_version() for async views, without blocking the event loop on the store.
+    """
+    return (await get_version_store().aget())[0]
+
+def bump_version():
+    """
+    Invalidate every cached catalog response, in all workers, by moving to a new version.
+    """
+    get_version_store().bump()
+    _count('invalidations')
+
+def get_last_modified():
+    """
+    Timestamp of the last catalog change, or None if unknown.
+    """
+    return get_version_store().get()[1]
+
+async def aget_last_modified():
+    return (await get_version_store().aget())[1]
+
+def request_signature(request, *extra):
+    """
+    Digest of the host, path and normalized query string (filters, search, ordering and page).
+    """
+    params = sorted((key, tuple(request.query_params.getlist(key))) for key in request.query_params)
+    raw = repr((request.get_host(), request.path, params, extra))
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+def cache_key(request, name, version=None):
+    """
+    Build the key from the catalog version (the current one unless given), the endpoint
+    and the request signature, so every distinct response gets its own entry.
+    """
+    version = get_version() if version is None else version
+    return f'littlelemon:catalog:{version}:{name}:{request_signature(request)}'
+
+def _remember(key):
+    with _lock:
+        _written[key] = True
+        _written.move_to_end(key)
+        while len(_written) > TRACKED_KEYS:
+            _written.popitem(last=False)
+
+def _missed(key):
+    with _lock:
+        _stats['misses'] += 1
+        if _written.pop(key, None):
+            _stats['evictions'] += 1  # We stored this key at the current version, so the backend dropped it
+
+def _found(key, data):
+    if data is not None:
+        _count('hits')
+        return key, Response(data)
+    _missed(key)
+    return key, None
+
+def _lookup(request, name):
+    """
+    The cache key for this request and the stored response, or None on a miss.
+    """
+    key = cache_key(request, name)
+    return _found(key, get_cache().get(key))
+
+async def _alookup(request, name):
+    key = cache_key(request, name, await aget_version())
+    return _found(key, await get_cache().aget(key))
+
+def _store(key, response):
+    if response.status_code == 200:
+        get_cache().set(key, response.data, _timeout())
+        _remember(key)
+    return response
+
+async def _astore(key, response):
+    if response.status_code == 200:
+        await get_cache().aset(key, response.data, _timeout())
+        _remember(key)
+    return response
+
+def cached_response(request, name, render):
+    """
+    Read-through cache: serve the stored serialized data or call render() and store its result.
+    Only successful responses are cached.
+    """
+    key, response = _lookup(request, name)
+    return response if response is not None else _store(key, render())
+
+async def acached_response(request, name, render):
+    """
+    cached_response() for async views, where render() returns a coroutine.
+    The cache is read and written with the backend's async methods.
+    """
+    key, response = await _alookup(request, name)
+    return response if response is not None else await _astore(key, await render())
+
+def stats():
+    with _lock:
+        data = dict(_stats)
+    lookups = data['hits'] + data['misses']
+    data['hit_ratio'] = round(data['hits'] / lookups, 4) if lookups else 0.0
+    data['version'] = get_version()
+    return data
+
+def reset_stats():
+    with _lock:
+        for name in _stats:
+            _stats[name] = 0
+        _written.clear()
+
+
+class CatalogCacheMixin:
+    """
+    Serve list and retrieve actions of a catalog ViewSet through the versioned cache,
+    and their async counterparts alist and aretrieve.
+    """
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, f'{self.basename}-list', lambda: super(CatalogCacheMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, f'{self.basename}-detail', lambda: super(CatalogCacheMixin, self).retrieve(request, *args, **kwargs))
+
+    def replica_is_current(self):
+        """
+        Read the primary for a moment after a catalog change, so the new version is never
+        cached from a replica that has not caught up.
+        """
+        last_modified = get_last_modified()
+        return last_modified is None or time.time() - last_modified >= sticky_seconds()
+
+    async def areplica_is_current(self):
+        last_modified = await aget_last_modified()
+        return last_modified is None or time.time() - last_modified >= sticky_seconds()
+
+    async def alist(self, request, *args, **kwargs):
+        return await acached_response(request, f'{self.basename}-list', lambda: super(CatalogCacheMixin, self).alist(request, *args, **kwargs))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await acached_response(request, f'{self.basename}-detail', lambda: super(CatalogCacheMixin, self).aretrieve(request, *args, **kwargs))
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models import Sum
+from rest_framework.exceptions import ValidationError
+from .counters import order_placed
+from .models import Cart, Order, OrderItem
+from .order_events import ORDER_CREATED, publish_on_commit
+from .tasks import queue_order_placed
+
+CART_LINE_FIELDS = ('id', 'menuitem_id', 'quantity', 'unit_price', 'total_price')
+
+def place_order(user, **order_fields):
+    """
+    Turn the user's cart into an order in a single transaction:
+    - Lock the cart rows so a concurrent double-submit can't reuse them.
+    - Compute the total with a database aggregate.
+    - Write every OrderItem with one bulk_create and clear the cart with one delete.
+    - Store the item count on the order and bump the customer's and crew member's counters.
+    - Queue the order.placed job for the post-checkout work, which runs in the background.
+    - Push the new order to the open order event streams once committed.
+    The number of queries does not depend on the size of the cart.
+    """
+    with transaction.atomic():
+        cart_items = Cart.objects.select_for_update().filter(user=user)
+        lines = list(cart_items.values(*CART_LINE_FIELDS))
+        if not lines:
+            raise ValidationError({'error': 'Cart is empty'})
+        total = cart_items.aggregate(total=Sum('total_price'))['total']
+
+        # Claim the cart first: if another checkout already consumed these rows,
+        # fewer rows are deleted and the whole transaction is rolled back.
+        deleted, _ = Cart.objects.filter(pk__in=[line['id'] for line in lines]).delete()
+        if deleted != len(lines):
+            raise ValidationError({'error': 'Cart is empty'})
+
+        item_count = sum(line['quantity'] for line in lines)
+        order = Order.objects.create(user=user, total=total, item_count=item_count, **order_fields)
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                menuitem_id=line['menuitem_id'],
+                quantity=line['quantity'],
+                unit_price=line['unit_price'],
+                total_price=line['total_price'],
+            )
+            for line in lines
+        ])
+        order_placed(order)
+        queue_order_placed(order)
+        publish_on_commit(ORDER_CREATED, order)
+    return order
@@ -0,0 +1,127 @@
+from django.db.models import Count, Max
+from django.utils.cache import parse_etags, quote_etag
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from .catalog_cache import get_version_store, request_signature
+
+def is_not_modified(request, etag, last_modified):
+    """
+    Evaluate If-None-Match (weak comparison) or, when absent, If-Modified-Since.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return '*' in etags or any(tag.removeprefix('W/') == etag for tag in etags)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return bool(last_modified is not None and if_modified_since is not None and int(last_modified) <= if_modified_since)
+
+
+class ConditionalGetMixin:
+    """
+    Add ETag/Last-Modified to list and retrieve responses and answer conditional
+    GETs with 304 before the serializer runs.
+    - Subclasses implement get_validators(action) returning (parts, last_modified),
+      where parts are cheap values that change whenever the response would.
+    - alist and aretrieve do the same for async views, with aget_validators(action).
+    """
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(request, 'list', lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, 'retrieve', lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs))
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, 'list', lambda: super(ConditionalGetMixin, self).alist(request, *args, **kwargs))
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aconditional_response(request, 'retrieve', lambda: super(ConditionalGetMixin, self).aretrieve(request, *args, **kwargs))
+
+    def get_validators(self, action):
+        raise NotImplementedError('get_validators() must be implemented.')
+
+    async def aget_validators(self, action):
+        """
+        get_validators() for async views; override when the validators need a query.
+        """
+        return self.get_validators(action)
+
+    def validator_headers(self, request, parts, last_modified):
+        etag = quote_etag(request_signature(request, request.accepted_media_type, *parts))
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified)
+        return headers
+
+    def with_validators(self, response, headers):
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def conditional_response(self, request, action, render):
+        parts, last_modified = self.get_validators(action)
+        headers = self.validator_headers(request, parts, last_modified)
+        if is_not_modified(request, headers['ETag'], last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return self.with_validators(render(), headers)
+
+    async def aconditional_response(self, request, action, render):
+        parts, last_modified = await self.aget_validators(action)
+        headers = self.validator_headers(request, parts, last_modified)
+        if is_not_modified(request, headers['ETag'], last_modified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return self.with_validators(await render(), headers)
+
+
+class CatalogConditionalMixin(ConditionalGetMixin):
+    """
+    Catalog responses change only when the catalog version does, so no query is needed:
+    the version and modification time come from the shared version store in one read.
+    """
+    def get_validators(self, action):
+        version, last_modified = get_version_store().get()
+        return (version,), last_modified
+
+    async def aget_validators(self, action):
+        version, last_modified = await get_version_store().aget()
+        return (version,), last_modified
+
+
+class QuerysetConditionalMixin(ConditionalGetMixin):
+    """
+    Validators from one aggregate over the scoped queryset: row count, max id and
+    max of modified_field. Inserts, deletes and updates all change at least one of them.
+    - With a keyset paginator only the requested page window is aggregated.
+    """
+    modified_field = 'updated'
+
+    def get_validator_queryset(self, action):
+        """
+        The rows the response is built from, unordered, ready to aggregate.
+        """
+        queryset = self.get_queryset()
+        if action == 'retrieve':
+            queryset = queryset.filter(pk=self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        else:
+            queryset = self.filter_queryset(queryset)
+            get_window = getattr(self.paginator, 'get_window', None)
+            window = get_window(queryset, self.request, self) if get_window else None
+            if window is not None:
+                queryset = queryset.model._default_manager.filter(pk__in=window.values('pk'))
+        return queryset.order_by()
+
+    def get_validator_aggregates(self):
+        return {'count': Count('id'), 'last_id': Max('id'), 'modified': Max(self.modified_field)}
+
+    def validators_from(self, row):
+        modified = row['modified'].timestamp() if row['modified'] else None
+        return (self.request.user.pk, row['count'], row['last_id'], modified), modified
+
+    def get_validators(self, action):
+        row = self.get_validator_queryset(action).aggregate(**self.get_validator_aggregates())
+        return self.validators_from(row)
+
+    async def aget_validators(self, action):
+        row = await self.get_validator_queryset(action).aaggregate(**self.get_validator_aggregates())
+        return self.validators_from(row)
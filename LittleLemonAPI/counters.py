@@ -0,0 +1,123 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from .models import Order, UserOrderStats
+
+ZERO = Decimal('0.00')
+STAT_FIELDS = ('order_count', 'total_spent', 'open_deliveries')
+EMPTY_STATS = {'order_count': 0, 'total_spent': ZERO, 'open_deliveries': 0}
+
+def adjust(user_id, **deltas):
+    """
+    Add deltas to a user's counters with one UPDATE ... SET f = f + delta, creating the row on first use.
+    Call it inside the transaction that makes the change, so both commit or roll back together.
+    Counters never go below zero; rebuild_order_counters repairs any drift.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if user_id is None or not deltas:
+        return
+    changes = {
+        field: Greatest(F(field) + delta, Value(0), output_field=UserOrderStats._meta.get_field(field))
+        for field, delta in deltas.items()
+    }
+    if not UserOrderStats.objects.filter(user_id=user_id).update(**changes):
+        UserOrderStats.objects.bulk_create([UserOrderStats(user_id=user_id)], ignore_conflicts=True)
+        UserOrderStats.objects.filter(user_id=user_id).update(**changes)
+
+def is_open(delivery_crew_id, status):
+    return delivery_crew_id is not None and not status
+
+def order_placed(order):
+    adjust(order.user_id, order_count=1, total_spent=order.total)
+    if is_open(order.delivery_crew_id, order.status):
+        adjust(order.delivery_crew_id, open_deliveries=1)
+
+def order_changed(before, after):
+    """
+    Move the open delivery between crew members; before and after are (delivery_crew_id, status).
+    """
+    if before == after:
+        return
+    if is_open(*before):
+        adjust(before[0], open_deliveries=-1)
+    if is_open(*after):
+        adjust(after[0], open_deliveries=1)
+
+def order_deleted(order):
+    adjust(order.user_id, order_count=-1, total_spent=-order.total)
+    if is_open(order.delivery_crew_id, order.status):
+        adjust(order.delivery_crew_id, open_deliveries=-1)
+
+def orders_assigned(delivery_crew_id, count):
+    adjust(delivery_crew_id, open_deliveries=count)
+
+
+def rebuild_item_counts(batch=1000, fix=True):
+    """
+    Recompute Order.item_count from the line items, batch by batch; returns the number of wrong rows.
+    """
+    wrong, last = 0, 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Order.objects.filter(id__gt=last).order_by('id')
+                .annotate(actual=Coalesce(Sum('orderitem__quantity'), 0))
+                .values_list('id', 'item_count', 'actual')[:batch]
+            )
+            if not rows:
+                return wrong
+            stale = [Order(id=pk, item_count=actual, updated=timezone.now()) for pk, stored, actual in rows if stored != actual]
+            if stale and fix:
+                Order.objects.bulk_update(stale, ['item_count', 'updated'])  # 'updated' changes the ETags
+        wrong += len(stale)
+        last = rows[-1][0]
+
+def expected_stats(user_ids):
+    """
+    The counters the given users should have, computed from their orders.
+    """
+    stats = {pk: dict(EMPTY_STATS) for pk in user_ids}
+    placed = (
+        Order.objects.filter(user_id__in=user_ids).order_by().values('user_id')
+        .annotate(count=Count('id'), spent=Sum('total'))
+    )
+    for row in placed:
+        stats[row['user_id']].update(order_count=row['count'], total_spent=row['spent'] or ZERO)
+    delivering = (
+        Order.objects.filter(delivery_crew_id__in=user_ids, status=False).order_by().values('delivery_crew_id')
+        .annotate(count=Count('id'))
+    )
+    for row in delivering:
+        stats[row['delivery_crew_id']]['open_deliveries'] = row['count']
+    return stats
+
+def rebuild_user_stats(batch=1000, fix=True):
+    """
+    Recompute UserOrderStats for every user, batch by batch; returns the number of wrong rows.
+    Users without orders and without a row (e.g. created with bulk_create()) are left alone.
+    """
+    wrong, last = 0, 0
+    while True:
+        with transaction.atomic():
+            user_ids = list(User.objects.filter(id__gt=last).order_by('id').values_list('id', flat=True)[:batch])
+            if not user_ids:
+                return wrong
+            expected = expected_stats(user_ids)
+            stored = {
+                row['user_id']: row
+                for row in UserOrderStats.objects.select_for_update().filter(user_id__in=user_ids).values('user_id', *STAT_FIELDS)
+            }
+            stale = []
+            for pk, values in expected.items():
+                current = {field: stored[pk][field] for field in STAT_FIELDS} if pk in stored else EMPTY_STATS
+                if current != values:
+                    stale.append(UserOrderStats(user_id=pk, **values))
+            if stale and fix:
+                UserOrderStats.objects.bulk_create(
+                    stale, update_conflicts=True, unique_fields=['user'], update_fields=list(STAT_FIELDS)
+                )
+        wrong += len(stale)
+        last = user_ids[-1]
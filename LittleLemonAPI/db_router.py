@@ -0,0 +1,147 @@
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_COOKIE = 'littlelemon_primary'
+PIN_PREFIX = 'littlelemon:primary-pin:'
+
+_replica_reads = ContextVar('littlelemon_replica_reads', default=False)
+
+
+def replica_alias():
+    """
+    The read replica's database alias, or None when no replica is configured.
+    """
+    return getattr(settings, 'REPLICA_DATABASE_ALIAS', None)
+
+def sticky_seconds():
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 5)
+
+def pin_to_primary(request, response):
+    """
+    Read this user's data from the primary for REPLICA_STICKY_SECONDS, so they see their own writes.
+    - The pin is a signed cookie bound to the user, so it holds whichever worker serves the next request.
+    - Clients that keep no cookies are pinned through the default cache too, when it is shared.
+    """
+    user = request.user
+    if not (replica_alias() and user and user.is_authenticated):
+        return
+    response.set_signed_cookie(
+        PIN_COOKIE, str(user.pk), salt=PIN_COOKIE, max_age=sticky_seconds(),
+        secure=request.is_secure(), httponly=True, samesite='Lax',
+    )
+    if settings.DEFAULT_CACHE_SHARED:
+        cache.set(f'{PIN_PREFIX}{user.pk}', True, sticky_seconds())
+
+def _pinned_by_cookie(request):
+    pinned = request.get_signed_cookie(PIN_COOKIE, default=None, salt=PIN_COOKIE, max_age=sticky_seconds())
+    return pinned == str(request.user.pk)
+
+def is_pinned(request):
+    user = request.user
+    if not (user and user.is_authenticated):
+        return False
+    if _pinned_by_cookie(request):
+        return True
+    return bool(settings.DEFAULT_CACHE_SHARED and cache.get(f'{PIN_PREFIX}{user.pk}'))
+
+async def ais_pinned(request):
+    user = request.user
+    if not (user and user.is_authenticated):
+        return False
+    if _pinned_by_cookie(request):
+        return True
+    return bool(settings.DEFAULT_CACHE_SHARED and await cache.aget(f'{PIN_PREFIX}{user.pk}'))
+
+
+class ReplicaRouter:
+    """
+    Send reads to the replica while a view has allowed it for the current request
+    (see ReplicaRoutingMixin); everything else, and every write, uses the primary.
+    """
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == replica_alias():
+            return False  # The replica gets its schema through replication
+        return None
+
+
+class ReplicaRoutingMixin:
+    """
+    Route a view's reads to the replica (REPLICA_DATABASE_ALIAS):
+    - Safe requests for actions in replica_actions read from the replica once the caller
+      is authenticated and allowed; authentication itself always reads the primary.
+    - Successful unsafe requests pin the user to the primary for REPLICA_STICKY_SECONDS,
+      so they read their own writes.
+    - replica_is_current() lets a view stay on the primary while the replica may lag.
+    """
+    replica_actions = ()
+
+    def use_replica(self, request):
+        return bool(
+            replica_alias()
+            and request.method in SAFE_METHODS
+            and getattr(self, 'action', None) in self.replica_actions
+            and not is_pinned(request)
+            and self.replica_is_current()
+        )
+
+    async def ause_replica(self, request):
+        """
+        use_replica() for async views, with the pin and replica checks awaited.
+        """
+        return bool(
+            replica_alias()
+            and request.method in SAFE_METHODS
+            and getattr(self, 'action', None) in self.replica_actions
+            and not await ais_pinned(request)
+            and await self.areplica_is_current()
+        )
+
+    def replica_is_current(self):
+        return True
+
+    async def areplica_is_current(self):
+        return self.replica_is_current()
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _replica_reads.set(False)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    async def adispatch(self, request, *args, **kwargs):
+        token = _replica_reads.set(False)
+        try:
+            return await super().adispatch(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        _replica_reads.set(self.use_replica(request))
+
+    async def ainitial(self, request, *args, **kwargs):
+        await super().ainitial(request, *args, **kwargs)
+        _replica_reads.set(await self.ause_replica(request))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request, response)
+        return super().finalize_response(request, response, *args, **kwargs)
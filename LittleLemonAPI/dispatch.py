@@ -0,0 +1,66 @@
+import heapq
+from collections import defaultdict
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .counters import orders_assigned
+from .models import Order
+from .order_events import ORDER_UPDATED, publish_on_commit
+from .roles import DELIVERY_CREW
+
+def crew_loads(crew_ids=None):
+    """
+    Open (status=False) order count per Delivery Crew member, read from their counters in one query.
+    """
+    crew = User.objects.filter(groups__name=DELIVERY_CREW)
+    if crew_ids is not None:
+        crew = crew.filter(pk__in=crew_ids)
+    return dict(crew.values_list('pk', Coalesce('order_stats__open_deliveries', 0)))
+
+def pending_orders():
+    """
+    The dispatch queue: unassigned, undelivered orders, oldest first (served by order_dispatch_queue_idx).
+    """
+    return Order.objects.filter(delivery_crew__isnull=True, status=False).order_by('date', 'id')
+
+def dispatch(limit=100, order_ids=None, crew_ids=None):
+    """
+    Assign up to limit queued orders to the least-loaded Delivery Crew members.
+    - Queue rows are claimed with select_for_update(skip_locked=True) so concurrent dispatchers
+      never pick the same orders; each UPDATE also re-checks that the order is still unassigned.
+    - One UPDATE per crew member that receives orders, plus one for their open-delivery counter.
+    - The assigned orders are read back once and pushed to the order event streams on commit.
+    Returns {crew id: [order ids]} for the orders actually assigned.
+    """
+    with transaction.atomic():
+        loads = crew_loads(crew_ids)
+        if not loads:
+            return {}
+        queue = pending_orders().select_for_update(skip_locked=True)
+        if order_ids is not None:
+            queue = queue.filter(pk__in=order_ids)
+        claimed = list(queue.values_list('pk', flat=True)[:limit])
+
+        heap = [(load, crew_id) for crew_id, load in loads.items()]
+        heapq.heapify(heap)
+        plan = defaultdict(list)
+        for order_id in claimed:
+            load, crew_id = heapq.heappop(heap)
+            plan[crew_id].append(order_id)
+            heapq.heappush(heap, (load + 1, crew_id))
+
+        now = timezone.now()
+        assigned = {}
+        for crew_id, batch in plan.items():
+            # QuerySet.update() skips auto_now, so 'updated' is set explicitly for ETags
+            count = pending_orders().filter(pk__in=batch).update(delivery_crew_id=crew_id, updated=now)
+            orders_assigned(crew_id, count)
+            if count == len(batch):
+                assigned[crew_id] = batch
+            elif count:
+                assigned[crew_id] = list(Order.objects.filter(pk__in=batch, delivery_crew_id=crew_id).values_list('pk', flat=True))
+        if assigned:
+            for order in Order.objects.filter(pk__in=[pk for batch in assigned.values() for pk in batch]):
+                publish_on_commit(ORDER_UPDATED, order)
+    return assigned
@@ -0,0 +1,156 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields, relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from .async_views import afetch
+
+_plans = {}
+
+
+def decimal_string(field):
+    """
+    DecimalField.to_representation() for database values: a value already at the field's
+    precision is formatted as is; anything else goes through DRF's quantize().
+    """
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or field.localize or field.normalize_output or not coerce_to_string:
+        return field.to_representation
+    exponent = -field.decimal_places
+
+    def convert(value):
+        if value.as_tuple().exponent == exponent:
+            return f'{value:f}'
+        return field.to_representation(value)
+    return convert
+
+def converter(field):
+    """
+    A function turning the column value into the field's representation, or None when
+    the value is already it. Non-null values only; None always renders as None.
+    """
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        return None  # The column holds the related pk, which is what the field renders
+    if type(field) in (fields.IntegerField, fields.CharField, fields.SlugField):
+        return None  # The database already returns int/str
+    if type(field) is fields.BooleanField:
+        return bool
+    if type(field) is fields.DecimalField:
+        return decimal_string(field)
+    return field.to_representation
+
+
+class FieldPlan:
+    """
+    A serializer's read path compiled once: the columns to fetch with values_list() and
+    one converter per field, rendering exactly what Serializer.to_representation() would.
+    """
+    def __init__(self, names, columns, converters):
+        self.names = names
+        self.columns = columns
+        self.converters = converters
+
+    @classmethod
+    def compile(cls, serializer):
+        """
+        The plan for a (bound, possibly trimmed) ModelSerializer, or None if a field needs
+        model instances: nested serializers, method fields, dotted sources, reverse relations.
+        """
+        if not isinstance(serializer, serializers.ModelSerializer):
+            return None
+        if type(serializer).to_representation is not serializers.Serializer.to_representation:
+            return None
+        model = serializer.Meta.model
+        names, columns, converters = [], [], []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, (serializers.BaseSerializer, relations.ManyRelatedField)) or len(field.source_attrs) != 1:
+                return None
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return None  # Properties and other non-field sources need the instance
+            if not model_field.concrete or model_field.many_to_many:
+                return None
+            if isinstance(field, relations.RelatedField):
+                if not isinstance(field, relations.PrimaryKeyRelatedField) or field.pk_field is not None:
+                    return None
+                if model_field.target_field != model_field.related_model._meta.pk:
+                    return None
+            elif model_field.is_relation:
+                return None
+            names.append(name)
+            columns.append(model_field.attname)
+            converters.append(converter(field))
+        return cls(tuple(names), tuple(columns), tuple(converters))
+
+    def values(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    def render(self, rows):
+        names, converters = self.names, self.converters
+        return [
+            {
+                name: value if value is None or convert is None else convert(value)
+                for name, convert, value in zip(names, converters, row)
+            }
+            for row in rows
+        ]
+
+
+def get_plan(serializer):
+    """
+    The cached plan for this serializer class and set of fields (None when it can't have one).
+    """
+    key = (type(serializer), tuple(serializer.fields))
+    if key not in _plans:
+        _plans[key] = FieldPlan.compile(serializer)
+    return _plans[key]
+
+
+class ValuesListMixin:
+    """
+    Read-only fast path for the list action, opt-in per deployment (FAST_LIST_SERIALIZATION)
+    or per view (fast_list_serialization = True/False; None follows the setting):
+    - The page is fetched with values_list() and rendered through the serializer's FieldPlan,
+      without model instances or the per-row field machinery.
+    - The JSON is byte-identical to the serializer's. Requests the plan can't reproduce
+      (expanded nested fields, method fields, paginators that need instances) take the
+      regular path.
+    Mixins overriding list/alist must come before this class; AsyncReadMixin after it.
+    """
+    fast_list_serialization = None
+
+    def get_list_plan(self):
+        enabled = self.fast_list_serialization
+        if enabled is None:
+            enabled = getattr(settings, 'FAST_LIST_SERIALIZATION', False)
+        if not enabled:
+            return None
+        paginator = self.paginator
+        if paginator is not None and not getattr(paginator, 'accepts_values', lambda request: False)(self.request):
+            return None
+        return get_plan(self.get_serializer())
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_list_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        queryset = plan.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(queryset))
+
+    async def alist(self, request, *args, **kwargs):
+        plan = self.get_list_plan()
+        if plan is None:
+            return await super().alist(request, *args, **kwargs)
+        queryset = plan.values(await self.afilter_queryset(self.get_queryset()))
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page))
+        return Response(plan.render(await afetch(queryset)))
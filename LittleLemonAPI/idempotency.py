@@ -0,0 +1,197 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils import encoders
+from .models import IdempotencyRecord
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+PRUNE_EVERY = 1000  # Claims per process between deletions of expired records
+POLL_SECONDS = 0.05
+
+_claims = 0
+
+def digest(*parts):
+    return hashlib.sha256('\x1f'.join(str(part) for part in parts).encode()).hexdigest()
+
+def request_fingerprint(request):
+    data = request.data
+    if hasattr(data, 'lists'):  # QueryDict from form posts
+        data = dict(data.lists())
+    return digest(json.dumps(data, sort_keys=True, default=str))
+
+def prune():
+    """
+    Delete records past their expiry; returns how many.
+    """
+    deleted, _ = IdempotencyRecord.objects.filter(expires__lt=timezone.now()).delete()
+    return deleted
+
+def _fresh(fingerprint, now):
+    return {
+        'fingerprint': fingerprint, 'status_code': None, 'body': b'',
+        'started': now, 'expires': now + timedelta(seconds=settings.IDEMPOTENCY_TTL),
+    }
+
+def claim(key, fingerprint):
+    """
+    Record that a request with this key is starting; returns (started, None) when this request
+    holds the key, else (None, existing record).
+    - Only one of several concurrent duplicates inserts the row; the others get the existing record.
+    - A completed record past its expiry is replaced with a conditional UPDATE, which only one request can win.
+    started identifies the claim: hold(), complete() and release() only act while it is unchanged.
+    """
+    global _claims
+    _claims += 1
+    if _claims % PRUNE_EVERY == 0:
+        prune()
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            IdempotencyRecord.objects.create(key=key, **_fresh(fingerprint, now))
+        return now, None
+    except IntegrityError:
+        pass
+    record = IdempotencyRecord.objects.filter(key=key).first()
+    if record is None:  # Pruned or released in the meantime
+        return claim(key, fingerprint)
+    if record.status_code is not None and record.expires < now:
+        if IdempotencyRecord.objects.filter(key=key, started=record.started).update(**_fresh(fingerprint, now)):
+            return now, None
+        record = IdempotencyRecord.objects.filter(key=key).first() or record
+    return None, record
+
+def hold(key, started):
+    """
+    Lock the claim for the rest of the caller's transaction, which also stores the outcome (complete()).
+    While the work runs the record stays locked, so a claim found unlocked and without an outcome
+    has provably rolled back. False if a retry took the key over first.
+    """
+    return IdempotencyRecord.objects.select_for_update().filter(key=key, started=started, status_code__isnull=True).exists()
+
+def take_over(record):
+    """
+    Claim a key whose request never stored an outcome; returns the new started value, or None.
+    Only succeeds once that request's transaction has ended without committing (see hold()):
+    a request still running keeps the record locked, and this fails instead of waiting for it.
+    """
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            running = IdempotencyRecord.objects.select_for_update(
+                nowait=connection.features.has_select_for_update_nowait
+            ).filter(key=record.key, started=record.started, status_code__isnull=True)
+            if running.exists():
+                running.update(**_fresh(record.fingerprint, now))
+                return now
+    except DatabaseError:  # Locked by the running request
+        pass
+    return None
+
+def complete(key, started, response):
+    """
+    Store the response to a claimed key; retries get its data back.
+    """
+    IdempotencyRecord.objects.filter(key=key, started=started, status_code__isnull=True).update(
+        status_code=response.status_code,
+        body=json.dumps(response.data, cls=encoders.JSONEncoder).encode(),
+    )
+
+def release(key, started):
+    """
+    Forget a claim whose request failed, so a retry runs again.
+    """
+    IdempotencyRecord.objects.filter(key=key, started=started, status_code__isnull=True).delete()
+
+def wait_for(record):
+    """
+    Poll a running duplicate until it has a response, for up to IDEMPOTENCY_WAIT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while record is not None and record.status_code is None and time.monotonic() < deadline:
+        time.sleep(POLL_SECONDS)
+        record = IdempotencyRecord.objects.filter(key=record.key).first()
+    return record
+
+def replay(record):
+    return Response(json.loads(bytes(record.body)), status=record.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+class IdempotentCreateMixin:
+    """
+    Idempotency-Key support for create (POST), so a client can safely retry a request whose response it lost:
+    - The first request with a key runs normally; its response (anything but a 5xx) is stored for
+      IDEMPOTENCY_TTL seconds. A successful response is stored in the transaction that does the work,
+      so the work is never committed without it.
+    - A retry with the same key gets the stored response back, marked Idempotent-Replayed, without
+      running the view again. A concurrent retry waits for the first request to finish.
+    - Keys are scoped to the user, method and path. Reusing a key with a different body is a 422.
+    - Requests without the header are unaffected.
+    """
+    def create(self, request, *args, **kwargs):
+        value = request.headers.get(HEADER)
+        if value is None:
+            return super().create(request, *args, **kwargs)
+        if not value or len(value) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: [f'Must be 1 to {MAX_KEY_LENGTH} characters long.']})
+
+        key = digest(request.user.pk, request.method, request.path, value)
+        fingerprint = request_fingerprint(request)
+        started, record = claim(key, fingerprint)
+        if started is None:
+            if record.fingerprint != fingerprint:
+                return Response(
+                    {'error': f'This {HEADER} was already used for a different request.'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            record = wait_for(record)
+            if record is not None and record.status_code is not None:
+                return replay(record)
+            started = take_over(record) if record is not None else claim(key, fingerprint)[0]
+            if started is None:
+                return self.still_running(key)
+        try:
+            with transaction.atomic():
+                if not hold(key, started):
+                    return self.still_running(key)
+                request.idempotency_claim = (key, started)  # finalize_response() stores error responses
+                response = super().create(request, *args, **kwargs)
+                complete(key, started, response)
+                request.idempotency_claim = None
+                return response
+        except (APIException, Http404, PermissionDenied):
+            raise  # Handled by DRF; the error response is stored like any other
+        except Exception:
+            release(key, started)  # A 500: let the retry run again
+            raise
+
+    def still_running(self, key):
+        record = IdempotencyRecord.objects.filter(key=key, status_code__isnull=False).first()
+        if record is not None:  # Finished while this request was trying to take it over
+            return replay(record)
+        return Response(
+            {'error': f'A request with this {HEADER} is still being processed.'},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Retry-After': '1'},
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        claimed = getattr(request, 'idempotency_claim', None)
+        if claimed is None:
+            return response
+        if response.status_code >= 500:
+            release(*claimed)
+        else:
+            complete(*claimed, response)  # An error response; the work rolled back
+        return response
@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+from pathlib import Path
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import BaseSerializer
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('wall_ms', 'db_ms', 'serializer_ms', 'queries')
+
+_current = ContextVar('littlelemon_request_metrics', default=None)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class RequestMetrics:
+    """
+    Counters for one request, filled in by the DB execute wrapper and the serializer timer.
+    """
+    def __init__(self):
+        self.label = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.queries += 1
+            self.db_ms += elapsed
+            if elapsed >= settings.INSTRUMENTATION_SLOW_QUERY_MS:
+                logger.warning('Slow query (%.1f ms) in %s: %s', elapsed, self.label or 'unresolved view', sql)
+
+
+class Registry:
+    """
+    Rolling window of the last INSTRUMENTATION_SAMPLES values of each metric per view label.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = defaultdict(int)
+            self.samples = defaultdict(lambda: {name: deque(maxlen=settings.INSTRUMENTATION_SAMPLES) for name in METRICS})
+
+    def record(self, label, metrics, wall_ms):
+        with self.lock:
+            self.counts[label] += 1
+            samples = self.samples[label]
+            samples['wall_ms'].append(round(wall_ms, 3))
+            samples['db_ms'].append(round(metrics.db_ms, 3))
+            samples['serializer_ms'].append(round(metrics.serializer_ms, 3))
+            samples['queries'].append(metrics.queries)
+
+    def export(self):
+        """
+        Raw counts and samples, for dumping and merging across processes.
+        """
+        with self.lock:
+            return {
+                label: {'count': self.counts[label], **{name: list(values) for name, values in samples.items()}}
+                for label, samples in self.samples.items()
+            }
+
+    def snapshot(self):
+        return summarize(self.export())
+
+
+def summarize(exported):
+    """
+    Percentiles per view label from exported (possibly merged) samples.
+    """
+    report = {}
+    for label, data in sorted(exported.items()):
+        report[label] = {'count': data['count']}
+        for name in METRICS:
+            values = data[name]
+            report[label][name] = {
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': max(values, default=0),
+            }
+    return report
+
+
+def merge(exports):
+    merged = {}
+    for exported in exports:
+        for label, data in exported.items():
+            target = merged.setdefault(label, {'count': 0, **{name: [] for name in METRICS}})
+            target['count'] += data['count']
+            for name in METRICS:
+                target[name].extend(data[name])
+    return merged
+
+
+registry = Registry()
+
+
+def view_label(request, view_func):
+    """
+    'ViewClass.action' for DRF ViewSets, 'ViewClass.method' for other class-based views.
+    """
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return getattr(view_func, '__qualname__', repr(view_func))
+    method = request.method.lower()
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{cls.__name__}.{actions.get(method, method)}'
+    return f'{cls.__name__}.{method}'
+
+
+_serializer_timer_installed = False
+
+def install_serializer_timer():
+    """
+    Time serializer.data evaluation; only the outermost serializer of a request is counted.
+    """
+    global _serializer_timer_installed
+    if _serializer_timer_installed:
+        return
+    original = BaseSerializer.data
+
+    def timed_data(serializer):
+        metrics = _current.get()
+        if metrics is None:
+            return original.fget(serializer)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(serializer)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_ms += (time.perf_counter() - start) * 1000
+
+    BaseSerializer.data = property(timed_data)
+    _serializer_timer_installed = True
+
+
+def dump_path(directory):
+    return Path(directory) / f'{os.getpid()}.json'
+
+def dump(directory=None):
+    """
+    Write this process's samples to INSTRUMENTATION_DUMP_DIR/<pid>.json.
+    """
+    directory = directory or settings.INSTRUMENTATION_DUMP_DIR
+    if not directory:
+        return None
+    path = dump_path(directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(registry.export()))
+    tmp.replace(path)
+    return path
+
+
+class InstrumentationMiddleware:
+    """
+    Opt-in (INSTRUMENTATION_ENABLED) per-view metrics:
+    - number of DB queries and total DB time, serializer time and wall time;
+    - aggregated per 'View.action' into rolling p50/p95/p99 (see /api/instrumentation/);
+    - queries slower than INSTRUMENTATION_SLOW_QUERY_MS are logged with the view that issued them;
+    - samples are dumped to INSTRUMENTATION_DUMP_DIR every INSTRUMENTATION_DUMP_SECONDS
+      for the instrumentation_report command.
+    """
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTATION_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.last_dump = time.monotonic()
+        install_serializer_timer()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if metrics.label:
+            registry.record(metrics.label, metrics, (time.perf_counter() - start) * 1000)
+        self.maybe_dump()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.label = view_label(request, view_func)
+
+    def maybe_dump(self):
+        if not settings.INSTRUMENTATION_DUMP_DIR:
+            return
+        now = time.monotonic()
+        if now - self.last_dump >= settings.INSTRUMENTATION_DUMP_SECONDS:
+            self.last_dump = now
+            try:
+                dump()
+            except OSError:
+                logger.exception('Could not dump instrumentation samples')
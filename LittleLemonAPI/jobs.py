@@ -0,0 +1,177 @@
+import logging
+import threading
+import traceback
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Job name -> handlers, registered with @handler (see tasks.py)
+handlers = defaultdict(list)
+
+# Set when a transaction that queued jobs commits; workers in this process stop waiting
+_wakeup = threading.Event()
+
+def handler(name):
+    """
+    Register a function to run for every job with this name; it is called with the job's payload.
+    Jobs run at least once (a retry or an expired lease runs them again), so handlers must be idempotent.
+    """
+    def register(func):
+        handlers[name].append(func)
+        return func
+    return register
+
+def enqueue(name, payload=None, key=None, delay=0):
+    """
+    Queue a job in the caller's transaction, so it is committed or rolled back with the change it describes.
+    - A key makes the call idempotent: a job with the same key is never queued twice.
+    - delay (seconds) postpones the first run.
+    """
+    job = Job(name=name, payload=payload or {}, key=key, run_at=timezone.now() + timedelta(seconds=delay))
+    Job.objects.bulk_create([job], ignore_conflicts=key is not None) # INSERT ... ON CONFLICT DO NOTHING
+    transaction.on_commit(_wakeup.set)
+
+def backoff(attempts):
+    """
+    Seconds before retrying a job that failed its attempts-th run: doubles each time, up to JOBS_RETRY_MAX_DELAY.
+    """
+    return min(settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1), settings.JOBS_RETRY_MAX_DELAY)
+
+def ready(now):
+    """
+    Jobs due to run and not leased by a live worker, oldest first (served by job_queue_idx).
+    """
+    return (
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+        .order_by('run_at', 'id')
+    )
+
+def claim(limit):
+    """
+    Lease up to limit due jobs for JOBS_LEASE_SECONDS and count the attempt.
+    - Rows are picked with select_for_update(skip_locked=True) so concurrent workers skip each other's;
+      the UPDATE re-checks that they are still free, and only the rows it took are returned.
+    """
+    now = timezone.now()
+    owner = uuid.uuid4().hex
+    with transaction.atomic():
+        ids = list(ready(now).select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit])
+        if not ids:
+            return []
+        ready(now).filter(pk__in=ids).update(
+            owner=owner, locked_until=now + timedelta(seconds=settings.JOBS_LEASE_SECONDS), attempts=F('attempts') + 1
+        )
+    return list(Job.objects.filter(pk__in=ids, owner=owner).order_by('run_at', 'id'))
+
+def run(job):
+    """
+    Run the job's handlers; returns None on success, the traceback otherwise.
+    A job that already used up its attempts (its worker died holding the lease) is not run again.
+    """
+    if job.attempts > settings.JOBS_MAX_ATTEMPTS:
+        return 'Lease expired on the last attempt'
+    try:
+        for func in handlers.get(job.name, ()):
+            func(job.payload)
+    except Exception:
+        logger.exception('Job %s (%s) failed on attempt %s', job.pk, job.name, job.attempts)
+        return traceback.format_exc()
+    return None
+
+def finish(jobs, errors):
+    """
+    Record the outcome of a claimed batch: one UPDATE for the jobs that succeeded, one per failure
+    (queued again after backoff(), or failed for good after JOBS_MAX_ATTEMPTS).
+    Jobs whose lease was taken over meanwhile are left to their new owner.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        done = [job.pk for job in jobs if errors.get(job.pk) is None]
+        if done:
+            Job.objects.filter(pk__in=done, owner=jobs[0].owner).update(
+                status=Job.DONE, finished=now, locked_until=None, last_error=''
+            )
+        for job in jobs:
+            error = errors.get(job.pk)
+            if error is None:
+                continue
+            if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+                changes = {'status': Job.FAILED, 'finished': now}
+            else:
+                changes = {'run_at': now + timedelta(seconds=backoff(job.attempts))}
+            Job.objects.filter(pk=job.pk, owner=job.owner).update(locked_until=None, last_error=error, **changes)
+
+def purge(older_than=None):
+    """
+    Delete jobs that finished successfully more than older_than (default JOBS_KEEP_DONE) seconds ago.
+    Failed jobs are kept for inspection.
+    """
+    seconds = settings.JOBS_KEEP_DONE if older_than is None else older_than
+    cutoff = timezone.now() - timedelta(seconds=seconds)
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished__lt=cutoff).delete()
+    return deleted
+
+
+class Worker:
+    """
+    Drains the queue: claims a batch, runs it on a pool of threads, records the outcomes.
+    - threads=1 runs the jobs in the calling thread.
+    - Pool threads have their own database connections, recycled between jobs like between requests.
+    - When idle, it waits for the next commit that queues jobs in this process, or interval seconds.
+    """
+    def __init__(self, threads=1, batch=None, interval=1.0):
+        self.threads = threads
+        self.batch = batch or settings.JOBS_BATCH_SIZE
+        self.interval = interval
+        self.stop = threading.Event()
+        self.processed = 0
+
+    def run_in_thread(self, job):
+        close_old_connections()
+        try:
+            return run(job)
+        finally:
+            close_old_connections()
+
+    def run_batch(self, pool=None):
+        """
+        Run one claimed batch; returns the number of jobs it ran.
+        """
+        jobs = claim(self.batch)
+        if not jobs:
+            return 0
+        if pool is None:
+            outcomes = [run(job) for job in jobs]
+        else:
+            outcomes = list(pool.map(self.run_in_thread, jobs))
+        finish(jobs, {job.pk: error for job, error in zip(jobs, outcomes)})
+        self.processed += len(jobs)
+        return len(jobs)
+
+    def run(self, once=False):
+        """
+        Process jobs until stop is set; with once, until the queue has no due job.
+        """
+        pool = ThreadPoolExecutor(self.threads, thread_name_prefix='job') if self.threads > 1 else None
+        try:
+            while not self.stop.is_set():
+                if self.run_batch(pool):
+                    continue
+                if once:
+                    break
+                purge()
+                _wakeup.wait(self.interval)
+                _wakeup.clear()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.processed
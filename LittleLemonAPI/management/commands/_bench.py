@@ -0,0 +1,180 @@
+"""
+Helpers shared by the bench_* management commands.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+from unittest import mock
+from django.conf import settings
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+
+class Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """
+    Run a benchmark inside a transaction that is always rolled back,
+    so seeded rows never reach the real database.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+@contextmanager
+def unthrottled():
+    """
+    Disable DRF throttling so a benchmark can issue more requests than the rate limits allow.
+    """
+    with mock.patch.object(APIView, 'get_throttles', lambda self: []):
+        yield
+
+
+def api_client():
+    """
+    In-process API client for a host the current settings accept.
+    """
+    # The test runner adds 'testserver'; with DEBUG and no ALLOWED_HOSTS only localhost passes
+    host = 'testserver' if 'testserver' in settings.ALLOWED_HOSTS else 'localhost'
+    return APIClient(SERVER_NAME=host)
+
+
+def client_for(user):
+    """
+    In-process API client authenticated with the user's token, like a real client.
+    """
+    client = api_client()
+    token, _ = Token.objects.get_or_create(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def measure(func, repeat=1):
+    """
+    Call func repeat times and return (timings in ms, queries of the last run).
+    """
+    timings = []
+    for _ in range(repeat):
+        connection.queries_log.clear()  # The log is a bounded deque; a full one breaks the capture
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings, len(ctx.captured_queries)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(timings):
+    return {
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+BENCH_PASSWORD = 'bench-password'
+
+
+def seed(prefix='bench', categories=5, menu_items=100, customers=20, crew=5, managers=2,
+         orders=1000, items_per_order=3, cart_lines=3, stdout=None):
+    """
+    Seed a benchmark data set: categories, menu items, users per role (plus one admin),
+    a cart per customer and orders with line items, in bulk.
+    Every user gets BENCH_PASSWORD so the token login can be exercised.
+    """
+    from decimal import Decimal
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import Group, User
+    from LittleLemonAPI.models import Cart, Category, MenuItem, Order, OrderItem
+    from LittleLemonAPI.roles import DELIVERY_CREW, MANAGER
+    from LittleLemonAPI.counters import rebuild_user_stats
+    from LittleLemonAPI.search import rebuild_index
+
+    password = make_password(BENCH_PASSWORD)  # Hashed once; hashing per user would dominate seeding
+    manager_group, _ = Group.objects.get_or_create(name=MANAGER)
+    crew_group, _ = Group.objects.get_or_create(name=DELIVERY_CREW)
+
+    def users(role, count, **extra):
+        return User.objects.bulk_create([
+            User(username=f'{prefix}-{role}-{i}', email=f'{prefix}-{role}-{i}@example.com', password=password, **extra)
+            for i in range(count)
+        ])
+
+    admins = users('admin', 1, is_staff=True)
+    manager_users = users('manager', managers)
+    crew_users = users('crew', crew)
+    customer_users = users('customer', customers)
+    manager_group.user_set.add(*manager_users)
+    crew_group.user_set.add(*crew_users)
+
+    category_rows = Category.objects.bulk_create([
+        Category(slug=f'{prefix}-category-{i}', title=f'{prefix.title()} category {i}') for i in range(categories)
+    ])
+    menuitem_rows = MenuItem.objects.bulk_create([
+        MenuItem(
+            title=f'{prefix.title()} dish {i}',
+            price=Decimal(300 + (i * 37) % 2000) / 100,
+            featured=i % 10 == 0,
+            category=category_rows[i % categories],
+        )
+        for i in range(menu_items)
+    ])
+    rebuild_index()  # bulk_create() sends no signals
+
+    Cart.objects.bulk_create([
+        Cart(user=customer, menuitem=item, quantity=2, unit_price=item.price, total_price=item.price * 2)
+        for index, customer in enumerate(customer_users)
+        for item in menuitem_rows[index % menu_items:][:cart_lines]
+    ])
+
+    batch = 5000
+    for offset in range(0, orders, batch):
+        chunk = range(offset, min(offset + batch, orders))
+        lines = {
+            i: [menuitem_rows[(i + k) % menu_items] for k in range(min(items_per_order, menu_items))] for i in chunk
+        }
+        order_rows = Order.objects.bulk_create([
+            Order(
+                user=customer_users[i % customers],
+                delivery_crew=crew_users[i % crew] if crew and i % 3 else None,
+                status=i % 4 == 0,
+                total=sum((item.price for item in lines[i]), Decimal('0.00')),
+                item_count=len(lines[i]),
+            )
+            for i in chunk
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menuitem=item, quantity=1, unit_price=item.price, total_price=item.price)
+            for i, order in zip(chunk, order_rows) for item in lines[i]
+        ])
+        if stdout:
+            stdout.write(f'seeded {chunk.stop}/{orders} orders', ending='\r')
+    rebuild_user_stats()  # bulk_create() skips the counters
+    if stdout:
+        stdout.write('')
+    return {
+        'admin': admins[0],
+        'managers': manager_users,
+        'crew': crew_users,
+        'customers': customer_users,
+        'categories': category_rows,
+        'menu_items': menuitem_rows,
+    }
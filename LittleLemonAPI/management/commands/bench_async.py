@@ -0,0 +1,123 @@
+import asyncio
+import time
+from types import ModuleType
+from urllib.parse import urlsplit
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import include, path
+from rest_framework.authtoken.models import Token
+from rest_framework.routers import DefaultRouter
+from LittleLemonAPI import urls as api_urls
+from ._bench import percentile, unthrottled
+
+
+def urlconf(async_views):
+    """
+    The API routes with the sync views or with the native async read views.
+    """
+    router = DefaultRouter()
+    for prefix, viewset, basename in api_urls.router.registry:
+        router.register(prefix, viewset, basename=basename)
+    with override_settings(ASYNC_READ_VIEWS=async_views):
+        patterns = router.urls  # The views are built here
+    module = ModuleType(f'bench_async_urls_{"async" if async_views else "sync"}')
+    module.urlpatterns = [path('api/', include(patterns))]
+    return module
+
+
+async def call(application, url, token):
+    """
+    One HTTP request through the ASGI application, the way an ASGI server hands it over.
+    """
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Token {token}'.encode())],
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 50000),
+    }
+    body_sent = False
+    disconnected = asyncio.Event()
+    status = None
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    disconnected.set()
+    return status
+
+
+async def connection(application, url, token, requests, timings, statuses):
+    """
+    A keep-alive client: sends its requests one after another.
+    """
+    for _ in range(requests):
+        start = time.perf_counter()
+        statuses.add(await call(application, url, token))
+        timings.append((time.perf_counter() - start) * 1000)
+
+
+async def load(application, url, token, connections, requests):
+    timings, statuses = [], set()
+    await call(application, url, token)  # Warm-up
+    start = time.perf_counter()
+    await asyncio.gather(*(connection(application, url, token, requests, timings, statuses) for _ in range(connections)))
+    return timings, statuses, time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare sync and native async read views under ASGI: concurrent connections send requests '
+        'to the ASGI application in-process, like an ASGI server such as uvicorn would. '
+        'Reads the committed data created by seed_benchmark.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Prefix of the data created by seed_benchmark.')
+        parser.add_argument('--connections', type=int, default=50, help='Concurrent connections.')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per connection.')
+
+    def handle(self, *args, **options):
+        # The views read through their own connections, so the data must be committed rather than rolled back
+        customer = User.objects.filter(username__startswith=f'{options["prefix"]}-customer-').order_by('id').first()
+        if customer is None:
+            raise CommandError(f'No "{options["prefix"]}-" customers; run seed_benchmark first.')
+        token = Token.objects.get_or_create(user=customer)[0].key
+
+        urls = ['/api/menu-items/', '/api/menu-items/?ordering=-price&page=2', '/api/categories/', '/api/orders/', '/api/orders/?expand=items']
+        modes = {'sync': urlconf(False), 'async': urlconf(True)}
+        self.stdout.write(f'{"endpoint":<40} {"views":<6} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8}')
+        with unthrottled():
+            for url in urls:
+                for mode, patterns in modes.items():
+                    with override_settings(ROOT_URLCONF=patterns):
+                        application = ASGIHandler()
+                        timings, statuses, elapsed = asyncio.run(
+                            load(application, url, token, options['connections'], options['requests'])
+                        )
+                    if statuses != {200}:
+                        raise CommandError(f'{url} ({mode}) returned {sorted(statuses)}, expected [200].')
+                    self.stdout.write(
+                        f'{url:<40} {mode:<6} {len(timings) / elapsed:>8.1f} {percentile(timings, 50):>8.2f} '
+                        f'{percentile(timings, 95):>8.2f} {percentile(timings, 99):>8.2f}'
+                    )
@@ -0,0 +1,33 @@
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.views import APIView
+from LittleLemonAPI.authentication import CachedTokenAuthentication, token_cache
+from ._bench import client_for, measure, rolled_back, summary, unthrottled
+
+
+class Command(BaseCommand):
+    help = 'Benchmark token authentication: DB round trips and latency per hot request, uncached vs cached (rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--url', default='/api/cart/menu-items/')
+
+    def handle(self, *args, **options):
+        # One process, so the token cache is safe here even without a shared default cache
+        with rolled_back(), unthrottled(), override_settings(TOKEN_CACHE_TIMEOUT=60):
+            user = User.objects.create_user('bench-auth')  # A customer, so the default URL (the cart) is allowed
+            client = client_for(user)
+
+            for authentication in (TokenAuthentication, CachedTokenAuthentication):
+                token_cache.clear()
+                with mock.patch.object(APIView, 'get_authenticators', lambda self: [authentication()]):
+                    client.get(options['url'])  # Warm-up: fills the token cache
+                    timings, queries = measure(lambda: client.get(options['url']), options['repeat'])
+                stats = summary(timings)
+                self.stdout.write(
+                    f'{authentication.__name__:<28}: {queries} queries, '
+                    f'p50 {stats["p50_ms"]} ms, p95 {stats["p95_ms"]} ms'
+                )
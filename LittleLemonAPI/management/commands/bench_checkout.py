@@ -0,0 +1,38 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.checkout import place_order
+from LittleLemonAPI.models import Cart, Category, MenuItem
+from ._bench import measure, rolled_back, summary
+
+
+class Command(BaseCommand):
+    help = 'Benchmark checkout: queries and latency per cart size (all writes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 15, 50])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            category = Category.objects.create(slug='bench', title='Bench')
+            menuitems = MenuItem.objects.bulk_create([
+                MenuItem(title=f'Bench {i}', price=Decimal('4.25'), featured=False, category=category)
+                for i in range(max(options['sizes']))
+            ])
+            user = User.objects.create_user('bench-checkout')
+
+            for size in options['sizes']:
+                timings = []
+                for _ in range(options['repeat']):
+                    Cart.objects.bulk_create([
+                        Cart(user=user, menuitem=item, quantity=2, unit_price=item.price, total_price=item.price * 2)
+                        for item in menuitems[:size]
+                    ])
+                    run, queries = measure(lambda: place_order(user))
+                    timings.extend(run)
+                stats = summary(timings)
+                self.stdout.write(
+                    f'cart size {size:>4}: {queries} queries, '
+                    f'p50 {stats["p50_ms"]} ms, p95 {stats["p95_ms"]} ms'
+                )
@@ -0,0 +1,36 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.models import Category, MenuItem, Order
+from ._bench import client_for, measure, rolled_back, summary, unthrottled
+
+
+class Command(BaseCommand):
+    help = 'Benchmark 304 Not Modified against full responses for menu items and orders (writes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with rolled_back(), unthrottled():
+            category = Category.objects.create(slug='bench', title='Bench')
+            MenuItem.objects.bulk_create([
+                MenuItem(title=f'Bench {i}', price=Decimal('4.25'), featured=i % 2 == 0, category=category)
+                for i in range(rows)
+            ])
+            user = User.objects.create_user('bench-conditional')
+            Order.objects.bulk_create([Order(user=user, total=Decimal('20.00')) for _ in range(rows)])
+            client = client_for(user)
+
+            for url in ('/api/menu-items/', '/api/orders/'):
+                etag = client.get(url)['ETag']
+                full, full_queries = measure(lambda: client.get(url), options['repeat'])
+                cached, cached_queries = measure(lambda: client.get(url, HTTP_IF_NONE_MATCH=etag), options['repeat'])
+                full, cached = summary(full), summary(cached)
+                self.stdout.write(
+                    f'{url}: 200 p50 {full["p50_ms"]} ms ({full_queries} queries), '
+                    f'304 p50 {cached["p50_ms"]} ms ({cached_queries} queries), '
+                    f'speedup x{full["p50_ms"] / max(cached["p50_ms"], 0.001):.1f}'
+                )
@@ -0,0 +1,118 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection
+from django.db.backends.signals import connection_created
+from ._bench import client_for, percentile, seed, unthrottled
+
+PROFILES = {
+    'tuned': {'DATABASE_TUNING': '1'},
+    'django-default': {'DATABASE_TUNING': '0'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark concurrent cart and checkout writes against a throwaway SQLite database, '
+        'with the tuned database profile and with Django defaults. '
+        'Reports throughput, latency, "database is locked" errors and connections opened.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent customers.')
+        parser.add_argument('--iterations', type=int, default=20, help='Cart update + checkout rounds per worker.')
+        parser.add_argument('--profiles', nargs='*', default=list(PROFILES), choices=list(PROFILES))
+        parser.add_argument('--run', action='store_true', help='Run the workload with the current settings and print JSON.')
+
+    def handle(self, *args, **options):
+        if options['run']:
+            self.stdout.write(json.dumps(self.run_workload(options['workers'], options['iterations'])))
+            return
+
+        self.stdout.write(
+            f'{"profile":<16} {"rounds/s":>9} {"cart p50":>9} {"cart p95":>9} '
+            f'{"order p50":>10} {"order p95":>10} {"errors":>7} {"connections":>12}'
+        )
+        for name in options['profiles']:
+            with tempfile.TemporaryDirectory() as directory:
+                env = {**os.environ, **PROFILES[name], 'DATABASE_ENGINE': 'sqlite', 'DATABASE_NAME': str(Path(directory) / 'bench.sqlite3')}
+                command = [
+                    sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_db_writes', '--run',
+                    '--workers', str(options['workers']), '--iterations', str(options['iterations']),
+                ]
+                completed = subprocess.run(command, env=env, capture_output=True, text=True)
+            if completed.returncode:
+                raise CommandError(f'The {name} profile failed:\n{completed.stderr}')
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f'{name:<16} {result["rounds_per_s"]:>9} {result["cart_p50_ms"]:>9} {result["cart_p95_ms"]:>9} '
+                f'{result["order_p50_ms"]:>10} {result["order_p95_ms"]:>10} {result["errors"]:>7} {result["connections"]:>12}'
+            )
+
+    def run_workload(self, workers, iterations):
+        """
+        Each worker is one customer: fill the cart with a batch request, then check out.
+        Failed requests and "database is locked" errors are counted, not raised.
+        """
+        call_command('migrate', verbosity=0)
+        data = seed(customers=workers, crew=1, managers=1, orders=0, cart_lines=0, menu_items=50)
+        clients = [client_for(customer) for customer in data['customers']]
+        menuitems = [item.id for item in data['menu_items']]
+        connection.close()  # Workers open their own connections
+
+        lock = threading.Lock()
+        timings = {'cart': [], 'order': []}
+        counters = {'errors': 0, 'connections': 0}
+
+        def opened(sender, **kwargs):
+            with lock:
+                counters['connections'] += 1
+
+        def request(kind, call):
+            start = time.perf_counter()
+            # The test client skips the connection cleanup a server runs at request start and end
+            close_old_connections()
+            try:
+                ok = call().status_code < 300
+            except OperationalError:  # "database is locked"
+                ok = False
+            close_old_connections()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                timings[kind].append(elapsed)
+                counters['errors'] += not ok
+
+        def worker(index, client):
+            for round_ in range(iterations):
+                lines = [{'menuitem': menuitems[(index + round_ + k) % len(menuitems)], 'quantity': 1 + k} for k in range(3)]
+                request('cart', lambda: client.post('/api/cart/menu-items/batch/', {'lines': lines}, format='json'))
+                request('order', lambda: client.post('/api/orders/', {}, format='json'))
+            connection.close()
+
+        connection_created.connect(opened)
+        threads = [threading.Thread(target=worker, args=(index, client)) for index, client in enumerate(clients)]
+        start = time.perf_counter()
+        with unthrottled():
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+        connection_created.disconnect(opened)
+
+        return {
+            'rounds_per_s': round(workers * iterations / elapsed, 1),
+            'cart_p50_ms': round(percentile(timings['cart'], 50), 2),
+            'cart_p95_ms': round(percentile(timings['cart'], 95), 2),
+            'order_p50_ms': round(percentile(timings['order'], 50), 2),
+            'order_p95_ms': round(percentile(timings['order'], 95), 2),
+            **counters,
+        }
@@ -0,0 +1,41 @@
+from decimal import Decimal
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.dispatch import crew_loads, dispatch
+from LittleLemonAPI.models import Order
+from LittleLemonAPI.roles import DELIVERY_CREW
+from ._bench import measure, rolled_back
+
+
+class Command(BaseCommand):
+    help = 'Benchmark dispatcher throughput on a seeded queue (writes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=50_000)
+        parser.add_argument('--crew', type=int, default=50)
+        parser.add_argument('--batch', type=int, nargs='+', default=[50, 200, 1000])
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            group, _ = Group.objects.get_or_create(name=DELIVERY_CREW)
+            crew = User.objects.bulk_create([User(username=f'bench-crew-{i}') for i in range(options['crew'])])
+            group.user_set.add(*crew)
+            customer = User.objects.create_user('bench-dispatch')
+
+            for batch in options['batch']:
+                Order.objects.filter(user=customer).delete()
+                Order.objects.bulk_create(
+                    [Order(user=customer, total=Decimal('15.00')) for _ in range(options['orders'])],
+                    batch_size=5000,
+                )
+                calls, queries, elapsed = 0, 0, 0.0
+                while Order.objects.filter(user=customer, delivery_crew__isnull=True).exists():
+                    timings, call_queries = measure(lambda: dispatch(batch))
+                    calls += 1
+                    queries = max(queries, call_queries)
+                    elapsed += timings[0] / 1000
+                loads = crew_loads([member.pk for member in crew]).values()
+                self.stdout.write(
+                    f'batch {batch:>5}: {options["orders"] / elapsed:,.0f} orders/s over {calls} calls, '
+                    f'<= {queries} queries per call, crew load {min(loads)}-{max(loads)}'
+                )
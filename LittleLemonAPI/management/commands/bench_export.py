@@ -0,0 +1,58 @@
+import resource
+import time
+import tracemalloc
+from decimal import Decimal
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.models import Category, MenuItem, Order, OrderItem
+from LittleLemonAPI.roles import MANAGER
+from ._bench import client_for, rolled_back, unthrottled
+
+
+class Command(BaseCommand):
+    help = 'Measure peak memory of the streaming order export as the table grows (writes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+        parser.add_argument('--output', choices=['ndjson', 'csv'], default='ndjson')
+        parser.add_argument('--items', action='store_true', help='Seed two line items per order and export them.')
+        parser.add_argument('--batch', type=int, default=20_000)
+
+    def seed(self, user, menuitems, start, stop, with_items, batch):
+        for offset in range(start, stop, batch):
+            orders = Order.objects.bulk_create([
+                Order(user=user, total=Decimal('12.50')) for _ in range(offset, min(offset + batch, stop))
+            ])
+            if with_items:
+                OrderItem.objects.bulk_create([
+                    OrderItem(order=order, menuitem=item, quantity=1, unit_price=item.price, total_price=item.price)
+                    for order in orders for item in menuitems
+                ])
+
+    def handle(self, *args, **options):
+        query = f'?output={options["output"]}' + ('&expand=items' if options['items'] else '')
+        with rolled_back(), unthrottled():
+            manager = User.objects.create_user('bench-export')
+            manager.groups.add(Group.objects.get_or_create(name=MANAGER)[0])
+            category = Category.objects.create(slug='bench', title='Bench')
+            menuitems = [MenuItem.objects.create(title=f'Bench {i}', price=Decimal('6.25'), featured=False, category=category) for i in range(2)]
+            client = client_for(manager)
+
+            seeded = 0
+            for size in sorted(options['sizes']):
+                self.seed(manager, menuitems, seeded, size, options['items'], options['batch'])
+                seeded = size
+
+                tracemalloc.start()
+                start = time.perf_counter()
+                response = client.get(f'/api/orders/export/{query}')
+                total_bytes = sum(len(chunk) for chunk in response.streaming_content)
+                elapsed = time.perf_counter() - start
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+                self.stdout.write(
+                    f'{size:>9} orders: {total_bytes / 1e6:.1f} MB streamed in {elapsed:.1f} s, '
+                    f'peak Python allocations {peak / 1e6:.1f} MB, process max RSS {max_rss:.0f} MB'
+                )
@@ -0,0 +1,53 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from LittleLemonAPI.jobs import Worker, enqueue, handler, handlers
+from LittleLemonAPI.models import Job
+
+BENCH_JOB = 'bench.sleep'
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure job queue throughput: enqueuing one job per committed transaction (as checkout does), '
+        'then draining the queue with 1..N worker threads. Jobs sleep --work-ms to stand in for I/O. '
+        'The queue table must be reachable from several connections, so the jobs are committed and deleted afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=2000)
+        parser.add_argument('--work-ms', type=float, default=2.0, help='Time each job spends waiting, in ms.')
+        parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+        parser.add_argument('--batch', type=int, default=50, help='Jobs claimed per round trip.')
+
+    def enqueue_all(self, count):
+        start = time.perf_counter()
+        for i in range(count):
+            with transaction.atomic():
+                enqueue(BENCH_JOB, {'n': i}, key=f'{BENCH_JOB}:{i}')
+        return time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        if Job.objects.filter(name=BENCH_JOB).exists():
+            raise CommandError(f'Leftover {BENCH_JOB} jobs found; delete them first.')
+        delay = options['work_ms'] / 1000
+        if BENCH_JOB not in handlers:
+            handler(BENCH_JOB)(lambda payload: time.sleep(delay))
+
+        count = options['jobs']
+        self.stdout.write(f'{"phase":<18} {"jobs":>6} {"seconds":>8} {"jobs/s":>9}')
+        try:
+            for threads in options['threads']:
+                Job.objects.filter(name=BENCH_JOB).delete()
+                elapsed = self.enqueue_all(count)
+                self.stdout.write(f'{"enqueue":<18} {count:>6} {elapsed:>8.2f} {count / elapsed:>9.0f}')
+
+                worker = Worker(threads=threads, batch=options['batch'])
+                start = time.perf_counter()
+                processed = worker.run(once=True)
+                elapsed = time.perf_counter() - start
+                if processed != count or Job.objects.filter(name=BENCH_JOB).exclude(status=Job.DONE).exists():
+                    raise CommandError(f'Drained {processed} of {count} jobs.')
+                self.stdout.write(f'{f"drain x{threads} threads":<18} {count:>6} {elapsed:>8.2f} {count / elapsed:>9.0f}')
+        finally:
+            Job.objects.filter(name=BENCH_JOB).delete()
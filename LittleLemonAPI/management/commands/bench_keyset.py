@@ -0,0 +1,56 @@
+from decimal import Decimal
+from datetime import timedelta
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from LittleLemonAPI.models import Order
+from LittleLemonAPI.pagination import KeysetPagination
+from LittleLemonAPI.roles import MANAGER
+from ._bench import client_for, measure, rolled_back, summary, unthrottled
+
+
+class Command(BaseCommand):
+    help = 'Benchmark page-number against keyset pagination on a large seeded order table (writes are rolled back).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--batch', type=int, default=20_000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def seed(self, user, count, batch):
+        start = timezone.now() - timedelta(minutes=count)
+        for offset in range(0, count, batch):
+            Order.objects.bulk_create([
+                Order(user=user, total=Decimal(5 + i % 40), date=start + timedelta(minutes=i))
+                for i in range(offset, min(offset + batch, count))
+            ])
+            self.stdout.write(f'seeded {min(offset + batch, count)}/{count} orders', ending='\r')
+        self.stdout.write('')
+
+    def handle(self, *args, **options):
+        count = options['orders']
+        page_size = KeysetPagination.page_size
+        deep_page = max(1, count // page_size)
+        with rolled_back(), unthrottled():
+            manager = User.objects.create_user('bench-keyset')
+            manager.groups.add(Group.objects.get_or_create(name=MANAGER)[0])
+            self.seed(manager, count, options['batch'])
+            client = client_for(manager)
+
+            # Build the cursor a client would hold after walking to the deep page
+            paginator = KeysetPagination()
+            paginator.ordering = ['-date', '-id']
+            paginator.base_url = 'http://localhost/api/orders/'
+            row = Order.objects.order_by('-date', '-id').only('date')[(deep_page - 1) * page_size - 1]
+            deep_cursor = paginator.encode_cursor(row, reverse=False)
+
+            cases = [
+                ('page number, page 1', '/api/orders/?ordering=-date'),
+                (f'page number, page {deep_page}', f'/api/orders/?ordering=-date&page={deep_page}'),
+                ('keyset, page 1', '/api/orders/?pagination=keyset'),
+                (f'keyset, page {deep_page}', deep_cursor),
+            ]
+            for label, url in cases:
+                timings, queries = measure(lambda: client.get(url), options['repeat'])
+                stats = summary(timings)
+                self.stdout.write(f'{label:>28}: p50 {stats["p50_ms"]} ms, p95 {stats["p95_ms"]} ms, {queries} queries')
@@ -0,0 +1,79 @@
+import random
+from decimal import Decimal
+from itertools import product
+from django.core.management.base import BaseCommand
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from LittleLemonAPI.models import Category, MenuItem
+from LittleLemonAPI.search import MenuSearchFilter, rebuild_index
+from LittleLemonAPI.views import MenuItemViewSet
+from ._bench import measure, rolled_back, summary
+
+WORDS = [
+    'greek', 'salad', 'lemon', 'chicken', 'grilled', 'roasted', 'pasta', 'bruschetta', 'soup', 'lamb',
+    'souvlaki', 'feta', 'olive', 'garlic', 'spicy', 'tomato', 'basil', 'dessert', 'tiramisu', 'risotto',
+]
+# Made-up words fill out the vocabulary, so word frequencies look like a large menu's
+VOCABULARY = WORDS + [''.join(parts) for parts in product(['ka', 'lo', 'mi', 'ter', 'vos', 'ple', 'dra', 'un', 'zi', 'bar'], repeat=3)]
+
+# A search box sends one request per keystroke
+QUERIES = ['s', 'so', 'sou', 'souv', 'souvlaki', 'souvlaki l', 'souvlaki lemon', 'greek', 'lemon chicken', 'tiramisu']
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark menu search: the full-text index (MenuSearchFilter) against DRF\'s icontains '
+        'SearchFilter, for search-box keystrokes on a large menu (writes are rolled back). '
+        'Times the filtered page of 10 plus its count, as the paginated list runs them.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=100_000)
+        parser.add_argument('--batch', type=int, default=20_000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--category', action='store_true', help='Also match category titles.')
+
+    def seed(self, count, batch):
+        rng = random.Random(0)
+        weights = [1 / (rank + 1) for rank in range(len(VOCABULARY))]  # Zipf-like: few common words, many rare ones
+        categories = Category.objects.bulk_create([
+            Category(slug=f'bench-{word}', title=f'{word.title()} specials') for word in WORDS[:10]
+        ])
+        for offset in range(0, count, batch):
+            MenuItem.objects.bulk_create([
+                MenuItem(
+                    title=' '.join(word.title() for word in rng.choices(VOCABULARY, weights, k=3)),
+                    price=Decimal(300 + i % 2000) / 100,
+                    featured=False,
+                    category=categories[i % len(categories)],
+                )
+                for i in range(offset, min(offset + batch, count))
+            ])
+            self.stdout.write(f'seeded {min(offset + batch, count)}/{count} menu items', ending='\r')
+        self.stdout.write('')
+        rebuild_index()
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = MenuItemViewSet()
+        view.search_fields = ['title', 'category__title'] if options['category'] else ['title']
+        extra = '&search_category=1' if options['category'] else ''
+
+        def run(backend, query):
+            request = Request(factory.get(f'/api/menu-items/?search={query}{extra}'))
+            queryset = backend.filter_queryset(request, MenuItem.objects.all(), view)
+            return queryset.count(), list(queryset[:10])
+
+        with rolled_back():
+            self.seed(options['items'], options['batch'])
+            self.stdout.write(f'{"search":<16} {"matches":>8} {"icontains p50":>14} {"index p50":>10} {"speedup":>8}')
+            for query in QUERIES:
+                baseline, _ = measure(lambda: run(SearchFilter(), query), options['repeat'])
+                indexed, _ = measure(lambda: run(MenuSearchFilter(), query), options['repeat'])
+                matches = run(MenuSearchFilter(), query)[0]
+                baseline, indexed = summary(baseline), summary(indexed)
+                self.stdout.write(
+                    f'{query!r:<16} {matches:>8} {baseline["p50_ms"]:>11} ms {indexed["p50_ms"]:>7} ms '
+                    f'x{baseline["p50_ms"] / max(indexed["p50_ms"], 0.001):>6.1f}'
+                )
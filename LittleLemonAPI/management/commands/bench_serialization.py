@@ -0,0 +1,79 @@
+import time
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from LittleLemonAPI.fast_lists import get_plan
+from LittleLemonAPI.models import Cart, Category, MenuItem, Order
+from LittleLemonAPI.serializers import CartSerializer, MenuItemSerializer, OrderSerializer
+from ._bench import percentile, rolled_back
+
+
+def cpu_ms(func, repeat):
+    """
+    CPU time (not wall time) of each call, in ms.
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        timings.append((time.process_time() - start) * 1000)
+    return timings
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the CPU cost of a list page rendered by the serializers (model instances) and by the '
+        'values_list() field plans, for menu items, orders and cart lines (writes are rolled back).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Rows per page.')
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def seed(self, rows):
+        user = User.objects.create_user('bench-serialization')
+        crew = User.objects.create_user('bench-serialization-crew')
+        category = Category.objects.create(slug='bench', title='Bench')
+        menuitems = MenuItem.objects.bulk_create([
+            MenuItem(title=f'Bench dish {i}', price=Decimal(300 + i) / 100, featured=i % 5 == 0, category=category)
+            for i in range(rows)
+        ])
+        Order.objects.bulk_create([
+            Order(user=user, total=Decimal(1000 + i) / 100, item_count=i % 7, delivery_crew=crew if i % 2 else None)
+            for i in range(rows)
+        ])
+        Cart.objects.bulk_create([
+            Cart(user=user, menuitem=item, quantity=1 + i % 3, unit_price=item.price, total_price=item.price * (1 + i % 3))
+            for i, item in enumerate(menuitems)
+        ])
+
+    def handle(self, *args, **options):
+        size, repeat = options['page_size'], options['repeat']
+        renderer = JSONRenderer()
+        with rolled_back():
+            self.seed(size)
+            cases = [
+                ('menu-items', MenuItemSerializer, MenuItem.objects.order_by('id')),
+                ('orders', OrderSerializer, Order.objects.order_by('-date', '-id')),
+                ('cart', CartSerializer, Cart.objects.order_by('id')),
+            ]
+            self.stdout.write(f'{"endpoint":<12} {"rows":>5} {"serializer p50":>15} {"plan p50":>9} {"speedup":>8}')
+            for name, serializer_class, queryset in cases:
+                serializer = serializer_class(context={'expand': set()})
+                plan = get_plan(serializer)
+                if plan is None:
+                    raise CommandError(f'{serializer_class.__name__} has no field plan.')
+
+                def slow():
+                    return renderer.render(serializer_class(list(queryset[:size]), many=True, context={'expand': set()}).data)
+
+                def fast():
+                    return renderer.render(plan.render(plan.values(queryset)[:size]))
+
+                if slow() != fast():
+                    raise CommandError(f'{name}: the field plan renders different JSON.')
+                slow_ms, fast_ms = percentile(cpu_ms(slow, repeat), 50), percentile(cpu_ms(fast, repeat), 50)
+                self.stdout.write(
+                    f'{name:<12} {size:>5} {slow_ms:>12.3f} ms {fast_ms:>6.3f} ms x{slow_ms / max(fast_ms, 0.001):>6.1f}'
+                )
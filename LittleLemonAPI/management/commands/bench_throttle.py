@@ -0,0 +1,52 @@
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.throttling import CacheCounterStore, SQLiteCounterStore
+
+
+def hammer(store, key, limit, checks, results):
+    allowed, start = 0, time.perf_counter()
+    for _ in range(checks):
+        if store.incr(key, 60) <= limit:
+            allowed += 1
+    results.put((allowed, (time.perf_counter() - start) * 1000 / checks))
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark throttle stores: several processes check the same limit at once. '
+        'Reports requests allowed against the limit and the cost of one check.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--checks', type=int, default=500, help='Checks per worker.')
+
+    def handle(self, *args, **options):
+        context = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as directory:
+            stores = {
+                'cache (THROTTLE_CACHE_ALIAS)': CacheCounterStore(),
+                'sqlite': SQLiteCounterStore(Path(directory) / 'throttle.sqlite3'),
+            }
+            for name, store in stores.items():
+                key = f'bench_throttle:{time.time()}'
+                results = context.Queue()
+                workers = [
+                    context.Process(target=hammer, args=(store, key, options['limit'], options['checks'], results))
+                    for _ in range(options['workers'])
+                ]
+                for worker in workers:
+                    worker.start()
+                outcomes = [results.get() for _ in workers]
+                for worker in workers:
+                    worker.join()
+                allowed = sum(outcome[0] for outcome in outcomes)
+                per_check = max(outcome[1] for outcome in outcomes)
+                self.stdout.write(
+                    f'{name:<28}: {allowed} allowed for a limit of {options["limit"]} '
+                    f'across {options["workers"]} processes, {per_check:.3f} ms per check'
+                )
@@ -0,0 +1,25 @@
+import time
+from django.core.management.base import BaseCommand
+from LittleLemonAPI.dispatch import dispatch
+
+
+class Command(BaseCommand):
+    help = 'Assign queued orders to the least-loaded Delivery Crew members.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=100, help='Orders assigned per transaction.')
+        parser.add_argument('--loop', action='store_true', help='Keep dispatching, sleeping when the queue is empty.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep when idle with --loop.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            assigned = sum(len(orders) for orders in dispatch(options['batch']).values())
+            total += assigned
+            if assigned:
+                self.stdout.write(f'Assigned {assigned} orders ({total} total)')
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f'Dispatched {total} orders'))
@@ -0,0 +1,50 @@
+import csv
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from LittleLemonAPI.menu_import import import_menu_items
+
+
+class Command(BaseCommand):
+    help = (
+        'Create and update menu items from a CSV or JSON file in one transaction. Columns/keys: '
+        'id (updates that item), title, price, featured, category (id). Nothing is written if any row is invalid.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV with a header row, or JSON: a list of rows or {"items": [...]}.')
+        parser.add_argument('--format', choices=['csv', 'json'], help='Defaults to the file extension.')
+        parser.add_argument('--batch-size', type=int, help='Rows per INSERT/UPDATE (MENU_IMPORT_BATCH_SIZE).')
+
+    def read_rows(self, path, format):
+        with open(path, newline='', encoding='utf-8') as file:
+            if format == 'csv':
+                # Empty cells leave the field unchanged (updates) or missing (creates)
+                return [{key: value for key, value in row.items() if value not in ('', None)} for row in csv.DictReader(file)]
+            data = json.load(file)
+        rows = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise CommandError('The JSON file must hold a list of objects or {"items": [...]}.')
+        return rows
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        format = options['format'] or path.suffix.lstrip('.').lower()
+        if format not in ('csv', 'json'):
+            raise CommandError('Cannot tell the file format from the extension; pass --format.')
+        try:
+            rows = self.read_rows(path, format)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Cannot read {path}: {error}')
+        if not rows:
+            raise CommandError(f'{path} has no rows.')
+
+        try:
+            result = import_menu_items(rows, batch_size=options['batch_size'])
+        except ValidationError as error:
+            for number, errors in enumerate(error.detail['items'], start=1):
+                for field, messages in errors.items():
+                    self.stderr.write(f'row {number}: {field}: {" ".join(str(message) for message in messages)}')
+            raise CommandError('Nothing was imported.')
+        self.stdout.write(self.style.SUCCESS(f'{result["created"]} menu items created, {result["updated"]} updated'))
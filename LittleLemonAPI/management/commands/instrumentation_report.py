@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.instrumentation import merge, summarize
+
+
+class Command(BaseCommand):
+    help = 'Merge the per-process instrumentation dumps and print per-view percentiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=settings.INSTRUMENTATION_DUMP_DIR, help='Directory with <pid>.json dumps.')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON.')
+        parser.add_argument('--reset', action='store_true', help='Delete the dumps after reporting.')
+
+    def handle(self, *args, **options):
+        if not options['dir']:
+            raise CommandError('INSTRUMENTATION_DUMP_DIR is not set.')
+        paths = sorted(Path(options['dir']).glob('*.json'))
+        if not paths:
+            raise CommandError(f'No instrumentation dumps in {options["dir"]}.')
+        report = summarize(merge(json.loads(path.read_text()) for path in paths))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            self.stdout.write(f'{"view":<40} {"count":>7} {"wall p50/p95/p99 ms":>24} {"db ms p95":>10} {"ser ms p95":>10} {"queries p50/max":>16}')
+            for label, data in sorted(report.items(), key=lambda item: -item[1]['wall_ms']['p95']):
+                wall = data['wall_ms']
+                self.stdout.write(
+                    f'{label:<40} {data["count"]:>7} '
+                    f'{wall["p50"]:>8.1f}{wall["p95"]:>8.1f}{wall["p99"]:>8.1f} '
+                    f'{data["db_ms"]["p95"]:>10.1f} {data["serializer_ms"]["p95"]:>10.1f} '
+                    f'{data["queries"]["p50"]:>8}{data["queries"]["max"]:>8}'
+                )
+        if options['reset']:
+            for path in paths:
+                path.unlink()
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+from LittleLemonAPI.counters import rebuild_item_counts, rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the denormalized order counters (Order.item_count and UserOrderStats) from the '
+        'orders and line items, one transaction per batch, and fix the rows that drifted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help='Orders or users per transaction.')
+        parser.add_argument('--check', action='store_true', help='Only verify; fail if any counter is wrong.')
+
+    def handle(self, *args, **options):
+        fix = not options['check']
+        orders = rebuild_item_counts(options['batch'], fix=fix)
+        users = rebuild_user_stats(options['batch'], fix=fix)
+        self.stdout.write(f'{orders} orders with a wrong item count, {users} users with wrong order stats')
+        if options['check'] and (orders or users):
+            raise CommandError('Order counters are out of date; run rebuild_order_counters to fix them.')
+        self.stdout.write(self.style.SUCCESS('Order counters verified' if options['check'] else 'Order counters rebuilt'))
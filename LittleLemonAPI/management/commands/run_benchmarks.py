@@ -0,0 +1,245 @@
+import json
+import platform
+from dataclasses import dataclass, field
+from decimal import Decimal
+from pathlib import Path
+from typing import Callable, Optional
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncRequestFactory, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from LittleLemonAPI.models import Cart, Category, MenuItem, Order
+from LittleLemonAPI.views import OrderViewSet
+from ._bench import BENCH_PASSWORD, api_client, client_for, measure, rolled_back, seed, summary, unthrottled
+
+
+@dataclass
+class Case:
+    """
+    One endpoint exercise: who calls it, how, and an untimed setup run before every request.
+    """
+    name: str
+    client: APIClient
+    method: str
+    url: object  # str, or a callable returning the URL after setup
+    data: Optional[dict] = None
+    setup: Optional[Callable] = None
+    expect: tuple = (200,)
+    stream: bool = False
+    timings: list = field(default_factory=list)
+
+
+class EventStreamClient:
+    """
+    Opens /api/orders/events/ on the async view, as served under ASGI (the sync view only answers 501):
+    each get() authenticates, subscribes, reads the opening chunk and disconnects.
+    """
+    def __init__(self, user, host):
+        with override_settings(ASYNC_READ_VIEWS=True):
+            self.view = OrderViewSet.as_view({'get': 'events'}, basename='order', detail=False, **OrderViewSet.events.kwargs)
+        self.factory = AsyncRequestFactory(SERVER_NAME=host)
+        self.headers = {'Authorization': f'Token {Token.objects.get_or_create(user=user)[0].key}', 'Accept': 'text/event-stream'}
+
+    def get(self, url, data=None, format=None):
+        return async_to_sync(self.open)(url)
+
+    async def open(self, url):
+        response = await self.view(self.factory.get(url, headers=self.headers))
+        if response.status_code == 200:
+            await anext(response.streaming_content)
+        response.close()  # Releases the subscription, as on a client disconnect
+        return response
+
+
+class Command(BaseCommand):
+    help = (
+        'Exercise every API endpoint in-process and report throughput, latency percentiles and query counts. '
+        'All writes are rolled back. Fails when results regress past --tolerance against --baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Prefix of the data created by seed_benchmark.')
+        parser.add_argument('--seed', action='store_true', help='Seed a fresh data set (rolled back afterwards).')
+        parser.add_argument('--orders', type=int, default=1000, help='Orders to seed with --seed.')
+        parser.add_argument('--repeat', type=int, default=30, help='Requests per endpoint.')
+        parser.add_argument('--only', nargs='*', help='Run only endpoints whose name starts with one of these.')
+        parser.add_argument('--output', help='Write the results as JSON to this path.')
+        parser.add_argument('--baseline', help='Compare against results previously saved with --output.')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative p50 latency regression.')
+        parser.add_argument('--query-tolerance', type=int, default=0, help='Allowed extra queries per request.')
+
+    def handle(self, *args, **options):
+        with rolled_back(), unthrottled():
+            if options['seed']:
+                seed(prefix=options['prefix'], orders=options['orders'], stdout=self.stdout)
+            results = self.run_cases(options)
+
+        report = {
+            'meta': {
+                'date': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'repeat': options['repeat'],
+                'orders': Order.objects.count() if not options['seed'] else options['orders'],
+            },
+            'endpoints': results,
+        }
+        self.print_report(results)
+        if options['output']:
+            path = Path(options['output'])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2))
+            self.stdout.write(f'Results written to {path}')
+        if options['baseline']:
+            self.check_regressions(results, options)
+
+    def load_users(self, prefix):
+        users = User.objects.filter(username__startswith=f'{prefix}-').order_by('id')
+        by_role = {}
+        for user in users:
+            by_role.setdefault(user.username.split('-')[-2], []).append(user)
+        missing = {'admin', 'manager', 'crew', 'customer'} - set(by_role)
+        if missing:
+            raise CommandError(f'No "{prefix}-" {", ".join(sorted(missing))} users; run seed_benchmark first or pass --seed.')
+        return by_role
+
+    def build_cases(self, prefix):
+        users = self.load_users(prefix)
+        admin, manager, crew, customer = users['admin'][0], users['manager'][0], users['crew'][0], users['customer'][0]
+        spare = users['customer'][-1]
+        spares = users['customer'][-6:-1]
+        menuitem = MenuItem.objects.filter(title__startswith=prefix.title()).order_by('id').first()
+        menuitems = list(MenuItem.objects.filter(title__startswith=prefix.title()).order_by('id')[:10])
+        category = Category.objects.filter(slug__startswith=f'{prefix}-').order_by('id').first()
+        own_order = Order.objects.filter(user=customer).order_by('id').first()
+        crew_order = Order.objects.filter(delivery_crew=crew).order_by('id').first()
+        if not (menuitem and category and own_order and crew_order):
+            raise CommandError('The seeded data set is incomplete; reseed with at least one order per customer and crew member.')
+
+        anonymous = api_client()
+        as_admin, as_manager, as_crew, as_customer = (client_for(user) for user in (admin, manager, crew, customer))
+        streaming = EventStreamClient(customer, anonymous.defaults['SERVER_NAME'])
+        state = {}
+
+        def fill_cart():
+            Cart.objects.filter(user=customer).delete()
+            Cart.objects.bulk_create([
+                Cart(user=customer, menuitem=item, quantity=1, unit_price=item.price, total_price=item.price)
+                for item in menuitems[:5]
+            ])
+
+        def new_menuitem():
+            state['menuitem'] = MenuItem.objects.create(title=f'{prefix.title()} temp', price=Decimal('1.00'), featured=False, category=category)
+
+        def queue_orders():
+            Order.objects.bulk_create([Order(user=customer, total=Decimal('9.00')) for _ in range(20)])
+
+        return [
+            Case('auth.token_login', anonymous, 'post', '/auth/token/login/', {'username': customer.username, 'password': BENCH_PASSWORD}),
+            Case('menu-items.list', as_customer, 'get', '/api/menu-items/'),
+            Case('menu-items.list_filtered', as_customer, 'get', f'/api/menu-items/?category={category.id}&ordering=-price&search=dish&page=2', expect=(200, 404)),
+            Case('menu-items.retrieve', as_customer, 'get', f'/api/menu-items/{menuitem.id}/'),
+            Case('menu-items.create', as_manager, 'post', '/api/menu-items/', {'title': f'{prefix.title()} new', 'price': '4.50', 'featured': False, 'category': category.id}, expect=(201,)),
+            Case('menu-items.partial_update', as_manager, 'patch', f'/api/menu-items/{menuitem.id}/', {'price': '7.25'}),
+            Case('menu-items.bulk', as_manager, 'post', '/api/menu-items/bulk/', {'items': [
+                {'id': item.id, 'price': '6.75'} for item in menuitems
+            ] + [
+                {'title': f'{prefix.title()} bulk {i}', 'price': '3.25', 'featured': False, 'category': category.id} for i in range(10)
+            ]}),
+            Case('menu-items.destroy', as_manager, 'delete', lambda: f'/api/menu-items/{state["menuitem"].id}/', setup=new_menuitem, expect=(204,)),
+            Case('categories.list', as_customer, 'get', '/api/categories/'),
+            Case('categories.retrieve', as_customer, 'get', f'/api/categories/{category.id}/'),
+            Case('categories.create', as_manager, 'post', '/api/categories/', {'slug': f'{prefix}-new', 'title': 'New'}, expect=(201,)),
+            Case('cart.list', as_customer, 'get', '/api/cart/menu-items/', setup=fill_cart),
+            Case('cart.create', as_customer, 'post', '/api/cart/menu-items/', {'menuitem': menuitems[-1].id, 'quantity': 2},
+                 setup=lambda: Cart.objects.filter(user=customer, menuitem=menuitems[-1]).delete(), expect=(201,)),
+            Case('cart.batch', as_customer, 'post', '/api/cart/menu-items/batch/', {'lines': [{'menuitem': item.id, 'quantity': 3} for item in menuitems]}),
+            Case('cart.summary', as_customer, 'get', '/api/cart/summary/'),
+            Case('cart.destroy', as_customer, 'delete', '/api/cart/menu-items/', setup=fill_cart),
+            Case('orders.list_customer', as_customer, 'get', '/api/orders/'),
+            Case('orders.list_crew', as_crew, 'get', '/api/orders/'),
+            Case('orders.list_manager', as_manager, 'get', '/api/orders/?ordering=-date'),
+            Case('orders.list_expanded', as_manager, 'get', '/api/orders/?expand=items'),
+            Case('orders.list_keyset', as_manager, 'get', '/api/orders/?pagination=keyset'),
+            Case('orders.retrieve', as_customer, 'get', f'/api/orders/{own_order.id}/'),
+            Case('orders.create', as_customer, 'post', '/api/orders/', setup=fill_cart, expect=(201,)),
+            Case('orders.partial_update', as_crew, 'patch', f'/api/orders/{crew_order.id}/', {'status': True}),
+            Case('orders.summary', as_manager, 'get', '/api/orders/summary/?group_by=status,day,delivery_crew'),
+            Case('orders.export', as_manager, 'get', '/api/orders/export/?status=true', stream=True),
+            Case('orders.dispatch', as_manager, 'post', '/api/orders/dispatch/', {'limit': 20}, setup=queue_orders),
+            Case('orders.events', streaming, 'get', '/api/orders/events/'),
+            Case('groups.manager.list', as_manager, 'get', '/api/groups/manager/users/'),
+            Case('groups.manager.add', as_manager, 'post', '/api/groups/manager/users/', {'username': spare.username}, expect=(201,)),
+            Case('groups.manager.remove', as_manager, 'delete', f'/api/groups/manager/users/{spare.id}/'),
+            Case('groups.manager.add_many', as_manager, 'post', '/api/groups/manager/users/', {'usernames': [user.username for user in spares]}, expect=(201,)),
+            Case('groups.manager.remove_many', as_manager, 'delete', '/api/groups/manager/users/', {'ids': [user.id for user in spares]}),
+            Case('groups.delivery_crew.list', as_manager, 'get', '/api/groups/delivery-crew/users/'),
+            Case('groups.delivery_crew.add', as_manager, 'post', '/api/groups/delivery-crew/users/', {'username': spare.username}, expect=(201,)),
+            Case('groups.delivery_crew.remove', as_manager, 'delete', f'/api/groups/delivery-crew/users/{spare.id}/'),
+            Case('groups.delivery_crew.add_many', as_manager, 'post', '/api/groups/delivery-crew/users/', {'usernames': [user.username for user in spares]}, expect=(201,)),
+            Case('groups.delivery_crew.remove_many', as_manager, 'delete', '/api/groups/delivery-crew/users/', {'ids': [user.id for user in spares]}),
+            Case('catalog.cache_stats', as_admin, 'get', '/api/catalog/cache-stats/'),
+            Case('instrumentation', as_admin, 'get', '/api/instrumentation/'),
+        ]
+
+    def run_cases(self, options):
+        cases = self.build_cases(options['prefix'])
+        if options['only']:
+            cases = [case for case in cases if case.name.startswith(tuple(options['only']))]
+        results = {}
+        for case in cases:
+            statuses, queries = set(), []
+
+            def request():
+                url = case.url() if callable(case.url) else case.url
+                response = getattr(case.client, case.method)(url, case.data, format='json')
+                if case.stream:
+                    for _ in response.streaming_content:
+                        pass
+                statuses.add(response.status_code)
+
+            # One untimed warm-up request so per-process caches don't skew the first sample
+            if case.setup:
+                case.setup()
+            request()
+            for _ in range(options['repeat']):
+                if case.setup:
+                    case.setup()
+                timings, count = measure(request)
+                case.timings.extend(timings)
+                queries.append(count)
+            unexpected = statuses - set(case.expect)
+            if unexpected:
+                raise CommandError(f'{case.name} returned {sorted(unexpected)}, expected {list(case.expect)}.')
+            results[case.name] = {
+                **summary(case.timings),
+                'throughput_rps': round(len(case.timings) / (sum(case.timings) / 1000), 1),
+                'queries': max(queries),
+                'requests': len(case.timings),
+            }
+        return results
+
+    def print_report(self, results):
+        self.stdout.write(f'{"endpoint":<34} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<34} {result["throughput_rps"]:>8} {result["p50_ms"]:>8} '
+                f'{result["p95_ms"]:>8} {result["p99_ms"]:>8} {result["queries"]:>8}'
+            )
+
+    def check_regressions(self, results, options):
+        baseline = json.loads(Path(options['baseline']).read_text())['endpoints']
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result['p50_ms'] > before['p50_ms'] * (1 + options['tolerance']):
+                regressions.append(f'{name}: p50 {before["p50_ms"]} -> {result["p50_ms"]} ms')
+            if result['queries'] > before['queries'] + options['query_tolerance']:
+                regressions.append(f'{name}: queries {before["queries"]} -> {result["queries"]}')
+        if regressions:
+            raise CommandError('Performance regressions against the baseline:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f'No regressions beyond {options["tolerance"]:.0%} against {options["baseline"]}.'))
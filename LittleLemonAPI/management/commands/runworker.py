@@ -0,0 +1,44 @@
+import multiprocessing
+import signal
+from django.core.management.base import BaseCommand
+from django.db import connections
+from LittleLemonAPI.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs (order events and other post-checkout work) from the database queue, '
+        'on a pool of threads, optionally in several processes. Stops on SIGINT/SIGTERM after the current batch.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4, help='Jobs run concurrently per process.')
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes, each with its own threads.')
+        parser.add_argument('--batch', type=int, help='Jobs claimed per round trip (JOBS_BATCH_SIZE).')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Exit when no job is due instead of waiting.')
+
+    def work(self, options):
+        worker = Worker(threads=options['threads'], batch=options['batch'], interval=options['interval'])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop.set())
+        return worker.run(once=options['once'])
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            processed = self.work(options)
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=self.work, args=(options,)) for _ in range(options['processes'])]
+        for child in children:
+            child.start()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            # Each child finishes its current batch on SIGTERM
+            signal.signal(signum, lambda *args: [child.terminate() for child in children])
+        for child in children:
+            child.join()
+        self.stdout.write(self.style.SUCCESS(f'{len(children)} worker processes stopped'))
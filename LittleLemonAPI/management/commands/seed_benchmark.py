@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from ._bench import BENCH_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = 'Seed categories, menu items, users per role, carts and orders with line items for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='bench', help='Prefix for usernames, slugs and titles.')
+        parser.add_argument('--categories', type=int, default=5)
+        parser.add_argument('--menu-items', type=int, default=100)
+        parser.add_argument('--customers', type=int, default=20)
+        parser.add_argument('--crew', type=int, default=5)
+        parser.add_argument('--managers', type=int, default=2)
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--items-per-order', type=int, default=3)
+        parser.add_argument('--cart-lines', type=int, default=3)
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(f'Users prefixed "{prefix}-" already exist; use another --prefix or a fresh database.')
+        with transaction.atomic():
+            seed(
+                prefix=prefix,
+                categories=options['categories'],
+                menu_items=options['menu_items'],
+                customers=options['customers'],
+                crew=options['crew'],
+                managers=options['managers'],
+                orders=options['orders'],
+                items_per_order=options['items_per_order'],
+                cart_lines=options['cart_lines'],
+                stdout=self.stdout,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded benchmark data with prefix "{prefix}"; every user has the password "{BENCH_PASSWORD}".'
+        ))
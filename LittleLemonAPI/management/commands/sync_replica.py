@@ -0,0 +1,28 @@
+import sqlite3
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database onto the replica file (DATABASE_REPLICA), '
+        'standing in for replication when running locally with two SQLite files.'
+    )
+
+    def handle(self, *args, **options):
+        alias = settings.REPLICA_DATABASE_ALIAS
+        if not alias:
+            raise CommandError('No replica configured; set DATABASE_REPLICA to the replica SQLite file.')
+        primary, replica = settings.DATABASES[DEFAULT_DB_ALIAS], settings.DATABASES[alias]
+        if not (primary['ENGINE'] == replica['ENGINE'] == 'django.db.backends.sqlite3'):
+            raise CommandError('sync_replica only copies SQLite files; use the database server\'s replication otherwise.')
+
+        source = sqlite3.connect(primary['NAME'])
+        target = sqlite3.connect(replica['NAME'])
+        try:
+            source.backup(target)  # Consistent online copy, even while the primary is being written
+        finally:
+            target.close()
+            source.close()
+        self.stdout.write(self.style.SUCCESS(f'Copied {primary["NAME"]} to {replica["NAME"]}.'))
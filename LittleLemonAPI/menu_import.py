@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+from .catalog_cache import bump_version
+from .models import Category, MenuItem
+from .search import index_menu_items
+from .serializers import MenuItemRowSerializer
+
+FIELDS = ('title', 'price', 'featured', 'category')
+
+def import_menu_items(rows, batch_size=None):
+    """
+    Create and update many menu items in one transaction, in a fixed number of queries per batch:
+    - Every row is validated first; categories and existing items are resolved with one in_bulk each.
+    - New items are written with bulk_create, changed ones with bulk_update, batch_size rows per query.
+    - The search index is refreshed for the written items and the catalog invalidated once, on commit.
+    rows is a list of dicts (see MenuItemRowSerializer); errors are reported per row and nothing is written.
+    Returns {'created': n, 'updated': n, 'ids': [item id per row]}.
+    """
+    batch_size = batch_size or settings.MENU_IMPORT_BATCH_SIZE
+    validated, errors = [], []
+    for row in rows:
+        serializer = MenuItemRowSerializer(data=row)
+        valid = serializer.is_valid()
+        validated.append(serializer.validated_data if valid else None)
+        errors.append({} if valid else dict(serializer.errors))
+
+    with transaction.atomic():
+        ids = [row['id'] for row in validated if row and 'id' in row]
+        existing = MenuItem.objects.select_for_update().in_bulk(ids)
+        categories = Category.objects.only('id').in_bulk({row['category'] for row in validated if row and 'category' in row})
+        seen = set()
+        for row, error in zip(validated, errors):
+            if row is None:
+                continue
+            if 'id' in row:
+                if row['id'] not in existing:
+                    error['id'] = [f'Invalid pk "{row["id"]}" - object does not exist.']
+                elif row['id'] in seen:
+                    error['id'] = ['Each menu item may appear only once.']
+                seen.add(row['id'])
+            if 'category' in row and row['category'] not in categories:
+                error['category'] = [f'Invalid pk "{row["category"]}" - object does not exist.']
+        if any(errors):
+            raise ValidationError({'items': errors})
+
+        created, updated, changed_fields = [], [], set()
+        for row in validated:
+            values = {('category_id' if name == 'category' else name): row[name] for name in FIELDS if name in row}
+            if 'id' in row:
+                item = existing[row['id']]
+                for name, value in values.items():
+                    setattr(item, name, value)
+                changed_fields.update(values)
+                updated.append(item)
+            else:
+                created.append(MenuItem(**values))
+        MenuItem.objects.bulk_create(created, batch_size=batch_size)
+        if updated and changed_fields:
+            MenuItem.objects.bulk_update(updated, sorted(changed_fields), batch_size=batch_size)
+
+        # bulk_create()/bulk_update() send no signals: refresh the search index and the catalog here
+        written = [item.pk for item in created] + [item.pk for item in updated]
+        for start in range(0, len(written), batch_size):
+            index_menu_items(written[start:start + batch_size])
+        transaction.on_commit(bump_version)
+
+    created_ids = iter(item.pk for item in created)
+    return {
+        'created': len(created),
+        'updated': len(updated),
+        'ids': [row['id'] if 'id' in row else next(created_ids) for row in validated],
+    }
@@ -0,0 +1,54 @@
+from django.db import migrations, models, router
+import django.db.models.deletion
+
+
+def create_search_index(apps, schema_editor):
+    from LittleLemonAPI.search import get_index
+    alias = schema_editor.connection.alias
+    index = get_index(alias)
+    if index is None or not router.allow_migrate(alias, 'LittleLemonAPI'):
+        return  # No full-text index on this engine; search falls back to icontains
+    # Filled from the historical model: later migrations may change the current one
+    MenuItem = apps.get_model('LittleLemonAPI', 'MenuItem')
+    rows = MenuItem.objects.using(alias).order_by('id').values_list('id', 'title', 'category__title')
+    with schema_editor.connection.cursor() as cursor:
+        index.create(cursor)
+        last = 0
+        while chunk := list(rows.filter(id__gt=last)[:5000]):
+            cursor.executemany(
+                'INSERT INTO "LittleLemonAPI_menuitemsearch" (rowid, title, category) VALUES (%s, %s, %s)', chunk
+            )
+            last = chunk[-1][0]
+
+
+def drop_search_index(apps, schema_editor):
+    from LittleLemonAPI.search import get_index
+    alias = schema_editor.connection.alias
+    index = get_index(alias)
+    if index is None or not router.allow_migrate(alias, 'LittleLemonAPI'):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        index.drop(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0006_order_dispatch_queue_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MenuItemSearch',
+            fields=[
+                ('menuitem', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='LittleLemonAPI.menuitem')),
+                ('title', models.TextField()),
+                ('category', models.TextField()),
+            ],
+            options={
+                'db_table': 'LittleLemonAPI_menuitemsearch',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    Compute the counters for existing orders and give every user a row;
+    rebuild_order_counters does the same in batches.
+    """
+    Order = apps.get_model('LittleLemonAPI', 'Order')
+    OrderItem = apps.get_model('LittleLemonAPI', 'OrderItem')
+    UserOrderStats = apps.get_model('LittleLemonAPI', 'UserOrderStats')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    units = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(units=Sum('quantity'))
+    Order.objects.update(item_count=Coalesce(Subquery(units.values('units')), 0))
+
+    users = User.objects.annotate(
+        order_count=Count('order'),
+        total_spent=Coalesce(Sum('order__total'), 0, output_field=models.DecimalField()),
+    )
+    stats = {
+        pk: UserOrderStats(user_id=pk, order_count=count, total_spent=spent)
+        for pk, count, spent in users.values_list('pk', 'order_count', 'total_spent')
+    }
+    crew = Order.objects.filter(delivery_crew__isnull=False, status=False).order_by().values('delivery_crew')
+    for row in crew.annotate(open=Count('id')):
+        stats[row['delivery_crew']].open_deliveries = row['open']
+    UserOrderStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0007_menuitem_search_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserOrderStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='order_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('total_spent', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('open_deliveries', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
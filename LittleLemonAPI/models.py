@@ -19,6 +19,22 @@ class MenuItem(models.Model):
     def __str__(self):
         return self.title
 
+class MenuItemSearch(models.Model):
+    """
+    Full-text index over menu item and category titles, kept in sync by search.py:
+    an FTS5 table on SQLite, a tsvector table on PostgreSQL. Created by migration 0007,
+    keyed by rowid (FTS5's row id) on both engines.
+    """
+    menuitem = models.OneToOneField(
+        MenuItem, primary_key=True, db_column='rowid', on_delete=models.DO_NOTHING, related_name='search_index'
+    )
+    title = models.TextField()
+    category = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'LittleLemonAPI_menuitemsearch'
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     menuitem = models.ForeignKey(MenuItem, on_delete=models.CASCADE)
@@ -38,6 +54,22 @@ class Order(models.Model):
     status = models.BooleanField(db_index=True, default=0)
     total = models.DecimalField(max_digits=6, decimal_places=2)
     date = models.DateTimeField(default=timezone.now, db_index=True)
+    updated = models.DateTimeField(auto_now=True, db_index=True) # Last change, used for ETag/Last-Modified
+    item_count = models.PositiveIntegerField(default=0) # Units ordered (sum of line quantities), kept by counters.py
+
+    class Meta:
+        # Composite indexes matching the role-scoped keyset pages (id is the tiebreaker)
+        indexes = [
+            models.Index(fields=['user', 'date', 'id'], name='order_user_date_idx'),
+            models.Index(fields=['delivery_crew', 'date', 'id'], name='order_crew_date_idx'),
+            models.Index(fields=['status', 'date', 'id'], name='order_status_date_idx'),
+            # Dispatch queue: only unassigned, undelivered orders are indexed
+            models.Index(
+                fields=['date', 'id'],
+                name='order_dispatch_queue_idx',
+                condition=models.Q(delivery_crew__isnull=True, status=False),
+            ),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
@@ -53,4 +85,69 @@ class OrderItem(models.Model):
         unique_together = ('order', 'menuitem')
 
     def __str__(self):
-        return f"{self.quantity} x {self.menuitem.title} in Order {self.order.id}"
\ No newline at end of file
+        return f"{self.quantity} x {self.menuitem.title} in Order {self.order.id}"
+
+class UserOrderStats(models.Model):
+    """
+    Per-user order counters, maintained incrementally by counters.py and rebuilt by rebuild_order_counters:
+    - order_count and total_spent over the orders the user placed.
+    - open_deliveries: undelivered orders assigned to the user as Delivery Crew.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='order_stats')
+    order_count = models.PositiveIntegerField(default=0)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    open_deliveries = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Order stats for {self.user.username}"
+
+class Job(models.Model):
+    """
+    A queued background job, run by the runworker command (see jobs.py):
+    - name selects the handlers; payload is their JSON argument.
+    - key, when set, makes enqueuing idempotent: a second job with the same key is not created.
+    - A worker leases the job until locked_until; an expired lease makes it claimable again.
+    """
+    QUEUED = 'queued'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Queued'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    key = models.CharField(max_length=255, null=True, blank=True, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField(default=timezone.now) # Not before; pushed back by retries
+    attempts = models.PositiveSmallIntegerField(default=0)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    owner = models.CharField(max_length=32, blank=True) # The claim holding the lease
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The queue: only jobs still to run are indexed
+            models.Index(fields=['run_at', 'id'], name='job_queue_idx', condition=models.Q(status='queued')),
+            models.Index(fields=['status', 'finished'], name='job_status_finished_idx'),
+        ]
+
+    def __str__(self):
+        return f"Job {self.id} {self.name} ({self.status})"
+
+class IdempotencyRecord(models.Model):
+    """
+    The stored response to a write sent with an Idempotency-Key header (see idempotency.py):
+    - key is a digest of the user, method, path and header value, so keys never collide across users.
+    - fingerprint is a digest of the request body; reusing a key for another request is refused.
+    - status_code is null while the first request is still running; body is its response data as JSON.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    body = models.BinaryField(default=b'')
+    started = models.DateTimeField(default=timezone.now)
+    expires = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Idempotency record {self.key[:12]} ({self.status_code or 'running'})"
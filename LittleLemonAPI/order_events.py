@@ -0,0 +1,258 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED = 'order.created'
+ORDER_UPDATED = 'order.updated'
+RESYNC = 'resync'  # Events were dropped: the client should refetch its orders
+
+def order_event(kind, order, previous_crew_id=None):
+    """
+    The JSON-ready event for an order change; previous_crew_id is the crew member it was taken from.
+    """
+    return {
+        'type': kind,
+        'order': {
+            'id': order.pk,
+            'user': order.user_id,
+            'delivery_crew': order.delivery_crew_id,
+            'status': order.status,
+            'total': str(order.total),
+            'item_count': order.item_count,
+            'updated': order.updated.isoformat() if order.updated else None,
+        },
+        'previous_delivery_crew': previous_crew_id,
+    }
+
+def event_scopes(event):
+    """
+    The order_scope() keys allowed to see the event: everyone who can list the order, and the
+    crew member it was just taken from.
+    """
+    order = event['order']
+    scopes = {'all', f'user:{order["user"]}'}
+    for crew_id in (order['delivery_crew'], event.get('previous_delivery_crew')):
+        if crew_id is not None:
+            scopes.add(f'crew:{crew_id}')
+    return scopes
+
+
+class Subscription:
+    """
+    One stream's bounded queue, fed from any thread and read on the stream's event loop.
+    When the queue is full new events are dropped and the reader gets one RESYNC instead,
+    so a slow client costs at most ORDER_EVENTS_QUEUE_SIZE events of memory.
+    """
+    def __init__(self, broker, scope, loop, size):
+        self.broker = broker
+        self.scope = scope
+        self.loop = loop
+        self.queue = asyncio.Queue(size)
+        self.lagged = False
+
+    def offer(self, event):
+        try:
+            self.loop.call_soon_threadsafe(self.put, event)
+        except RuntimeError:  # The loop is closed; the stream is gone
+            self.broker.unsubscribe(self)
+
+    def put(self, event):
+        if self.queue.full():
+            self.lagged = True
+        else:
+            self.queue.put_nowait(event)
+
+    async def get(self, timeout):
+        """
+        The next event, a RESYNC after dropped events, or None after timeout seconds.
+        """
+        if self.lagged:
+            self.lagged = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return {'type': RESYNC}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class SubscriberLimit(Exception):
+    pass
+
+
+class LocalBroker:
+    """
+    In-process pub/sub: events published in this process reach the streams served by it.
+    Enough for a single ASGI worker; with several, use a broker that fans out between them.
+    Subscribers are indexed by role scope, so a publish only touches the streams allowed to see it.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = defaultdict(set)
+        self.count = 0
+
+    def subscribe(self, scope, loop=None):
+        subscription = Subscription(self, scope, loop or asyncio.get_running_loop(), settings.ORDER_EVENTS_QUEUE_SIZE)
+        with self.lock:
+            if self.count >= settings.ORDER_EVENTS_MAX_SUBSCRIBERS:
+                raise SubscriberLimit
+            self.subscribers[scope].add(subscription)
+            self.count += 1
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscribers = self.subscribers.get(subscription.scope)
+            if subscribers and subscription in subscribers:
+                subscribers.remove(subscription)
+                self.count -= 1
+                if not subscribers:
+                    del self.subscribers[subscription.scope]
+
+    def deliver(self, event):
+        with self.lock:
+            targets = [sub for scope in event_scopes(event) for sub in self.subscribers.get(scope, ())]
+        for subscription in targets:
+            subscription.offer(event)
+
+    def resync_all(self):
+        with self.lock:
+            targets = [sub for subscribers in self.subscribers.values() for sub in subscribers]
+        for subscription in targets:
+            subscription.offer({'type': RESYNC})
+
+    def publish(self, event):
+        self.deliver(event)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Fan-out between worker processes through Redis pub/sub (ORDER_EVENTS_REDIS_URL):
+    - publish() sends the event to one channel; every process that serves streams listens on it
+      with one background thread and delivers to its own subscribers.
+    - After a lost connection the local streams get a RESYNC, since events may have been missed.
+    - Messages that cannot be delivered are logged and skipped.
+    """
+    channel = 'littlelemon:order-events'
+
+    def __init__(self, url=None):
+        super().__init__()
+        import redis  # Only needed with this broker
+
+        self.redis = redis
+        self.client = redis.Redis.from_url(url or settings.ORDER_EVENTS_REDIS_URL)
+        self.listener = None
+
+    def publish(self, event):
+        self.client.publish(self.channel, json.dumps(event))
+
+    def subscribe(self, scope, loop=None):
+        subscription = super().subscribe(scope, loop)
+        with self.lock:
+            if self.listener is None:
+                self.listener = threading.Thread(target=self.listen, name='order-events', daemon=True)
+                self.listener.start()
+        return subscription
+
+    def listen(self):
+        connected_before = False
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                if connected_before:
+                    self.resync_all()
+                connected_before = True
+                for message in pubsub.listen():
+                    try:
+                        self.deliver(json.loads(message['data']))
+                    except Exception:  # One bad message must not stop the process's only listener
+                        logger.exception('Could not deliver order event %r', message.get('data'))
+            except self.redis.RedisError:
+                logger.warning('Order event listener lost its Redis connection; reconnecting', exc_info=True)
+                time.sleep(1)
+
+
+@lru_cache(maxsize=None)
+def _load_broker(path):
+    return import_string(path)()
+
+def get_broker():
+    """
+    The process-wide broker named by ORDER_EVENTS_BROKER.
+    """
+    return _load_broker(settings.ORDER_EVENTS_BROKER)
+
+def publish_on_commit(kind, order, previous_crew_id=None):
+    """
+    Publish the order's change once the transaction commits, so streams never show a rolled-back change.
+    A broker error is logged, not raised: the change is committed and the request must still succeed.
+    """
+    event = order_event(kind, order, previous_crew_id)
+    transaction.on_commit(lambda: get_broker().publish(event), robust=True)
+
+
+def format_event(event, event_id):
+    return f'id: {event_id}\nevent: {event["type"]}\ndata: {json.dumps(event)}\n\n'
+
+class EventStream:
+    """
+    The Server-Sent Events body for a subscription:
+    - A comment every heartbeat seconds keeps proxies from closing an idle stream.
+    - The stream ends after duration seconds; EventSource reconnects (and authenticates again).
+    - The subscription is released when the stream ends or the response is closed, which the
+      ASGI handler does when the client disconnects.
+    """
+    def __init__(self, subscription, heartbeat=None, duration=None):
+        self.subscription = subscription
+        self.heartbeat = heartbeat or settings.ORDER_EVENTS_HEARTBEAT
+        self.duration = duration or settings.ORDER_EVENTS_STREAM_SECONDS
+
+    def __aiter__(self):
+        return self.events()
+
+    async def events(self):
+        deadline = time.monotonic() + self.duration
+        event_id = 0
+        try:
+            yield f'retry: {settings.ORDER_EVENTS_RETRY_MS}\n\n'
+            while (remaining := deadline - time.monotonic()) > 0:
+                event = await self.subscription.get(min(self.heartbeat, remaining))
+                if event is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                event_id += 1
+                yield format_event(event, event_id)
+        finally:
+            self.close()
+
+    def close(self):
+        self.subscription.close()
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """
+    Lets EventSource's Accept: text/event-stream through content negotiation;
+    errors raised before the stream starts are sent as a single 'error' event.
+    """
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return f'event: error\ndata: {json.dumps(data, cls=encoders.JSONEncoder)}\n\n'.encode()
@@ -0,0 +1,204 @@
+import json
+from base64 import b64decode, b64encode
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .async_views import afetch
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination:
+    - Each page is "WHERE (sort fields, id) after the cursor ORDER BY ... LIMIT n",
+      so page 50,000 costs the same as page 1.
+    - Follows the view's OrderingFilter, with id as the tiebreaker.
+    - No COUNT(*) query is made.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    default_ordering = ('-date',)
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+        ordering = [field for field in (ordering or self.default_ordering) if field.lstrip('-') != 'id']
+        ordering.append('-id' if ordering and ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def accepts_values(self, request):
+        return False  # Cursors are read from model instances
+
+    def decode_cursor(self, request, model, ordering):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = data['v']
+            if len(values) != len(ordering):
+                raise ValueError
+            values = [model._meta.get_field(field.lstrip('-')).to_python(value) for field, value in zip(ordering, values)]
+            return values, bool(data.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse):
+        values = []
+        for field in self.ordering:
+            value = getattr(row, field.lstrip('-'))
+            values.append(value.isoformat() if hasattr(value, 'isoformat') else str(value))
+        data = {'v': values}
+        if reverse:
+            data['r'] = 1
+        encoded = b64encode(json.dumps(data, separators=(',', ':')).encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def seek(ordering, values):
+        """
+        Rows strictly after values in the given ordering, as a lexicographic OR of ANDs.
+        A redundant inclusive bound on the leading field lets the database range-scan its index.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        leading = ordering[0]
+        bound = 'lte' if leading.startswith('-') else 'gte'
+        return Q(**{f'{leading.lstrip("-")}__{bound}': values[0]}) & condition
+
+    def get_window(self, queryset, request, view=None):
+        """
+        The ordered, seeked and limited queryset for the requested page (page_size + 1 rows).
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.values, self.reverse = self.decode_cursor(request, queryset.model, self.ordering)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+        queryset = queryset.order_by(*ordering)
+        if self.values is not None:
+            queryset = queryset.filter(self.seek(ordering, self.values))
+        return queryset[:self.page_size + 1]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(list(self.get_window(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(await afetch(self.get_window(queryset, request, view)))
+
+    def paginate_rows(self, rows):
+        """
+        Trim the look-ahead row from the window and work out the links.
+        """
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.values is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination that can also paginate from async views:
+    the count and the page rows are read with the async ORM.
+    """
+    def accepts_values(self, request):
+        return True  # Pages any sliceable queryset, values_list() rows included
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()  # Paginator.count is a cached property; fill it in up front
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = await afetch(self.page.object_list)
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True  # The browsable API should display pagination controls
+        return list(self.page)
+
+
+class OrderPagination(AsyncPageNumberPagination):
+    """
+    Page numbers by default, for backwards compatibility.
+    Switches to keyset pagination (no count query) when a cursor is given or ?pagination=keyset.
+    """
+    keyset_class = KeysetPagination
+
+    def wants_keyset(self, request):
+        return self.keyset_class.cursor_query_param in request.query_params or request.query_params.get('pagination') == 'keyset'
+
+    def accepts_values(self, request):
+        return not self.wants_keyset(request)
+
+    def get_window(self, queryset, request, view=None):
+        """
+        The rows a keyset page will read, or None in page number mode.
+        """
+        if not self.wants_keyset(request):
+            return None
+        return self.keyset_class().get_window(queryset, request, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.wants_keyset(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
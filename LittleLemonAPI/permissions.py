@@ -1,16 +1,14 @@
 from rest_framework.permissions import BasePermission
+from .roles import is_manager, is_delivery_crew, is_customer
 
 class IsManager(BasePermission):
     def has_permission(self, request, view):
-        return request.user.groups.filter(name='Manager').exists()
-    
+        return is_manager(request.user)
+
 class IsDeliveryCrew(BasePermission):
     def has_permission(self, request, view):
-        return request.user.groups.filter(name='Delivery Crew').exists()
-    
+        return is_delivery_crew(request.user)
+
 class IsCustomer(BasePermission):
     def has_permission(self, request, view):
-        if not request.user.is_authenticated:
-            return False  # Unauthenticated users are not customers
-        return not (request.user.groups.filter(name='Manager').exists() or
-                   request.user.groups.filter(name='Delivery Crew').exists())
\ No newline at end of file
+        return is_customer(request.user)
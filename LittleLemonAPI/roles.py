@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+
+MANAGER = 'Manager'
+DELIVERY_CREW = 'Delivery Crew'
+
+ROLE_CACHE_PREFIX = 'littlelemon:roles:'
+
+# Role group ids for this process, filled on first use and dropped when a Group is saved or deleted
+_group_ids = {}
+
+def _role_cache_timeout():
+    """
+    Seconds a user's group names are kept in the default cache (see ROLE_CACHE_TIMEOUT).
+    A falsy value disables the cross-request cache.
+    """
+    return getattr(settings, 'ROLE_CACHE_TIMEOUT', 0)
+
+def role_cache_key(user_id):
+    return f'{ROLE_CACHE_PREFIX}{user_id}'
+
+def _cached_roles(user):
+    """
+    The roles memoized on the user or, when enabled, kept in the default cache; None if unknown.
+    """
+    roles = getattr(user, '_littlelemon_roles', None)
+    if roles is None and _role_cache_timeout():
+        roles = cache.get(role_cache_key(user.pk))
+        if roles is not None:
+            user._littlelemon_roles = roles
+    return roles
+
+async def _acached_roles(user):
+    roles = getattr(user, '_littlelemon_roles', None)
+    if roles is None and _role_cache_timeout():
+        roles = await cache.aget(role_cache_key(user.pk))
+        if roles is not None:
+            user._littlelemon_roles = roles
+    return roles
+
+def _remember_roles(user, roles):
+    timeout = _role_cache_timeout()
+    if timeout:
+        cache.set(role_cache_key(user.pk), roles, timeout)
+    user._littlelemon_roles = roles
+    return roles
+
+async def _aremember_roles(user, roles):
+    timeout = _role_cache_timeout()
+    if timeout:
+        await cache.aset(role_cache_key(user.pk), roles, timeout)
+    user._littlelemon_roles = roles
+    return roles
+
+def get_roles(user):
+    """
+    Return the set of group names for a user.
+    - Loaded once per request and memoized on the user instance.
+    - Optionally shared across requests through Django's cache.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = _cached_roles(user)
+    if roles is None:
+        roles = _remember_roles(user, frozenset(user.groups.values_list('name', flat=True)))
+    return roles
+
+async def aget_roles(user):
+    """
+    get_roles() for async views: the group query runs through the async ORM and the cache
+    through its async methods. Once resolved, the sync role helpers below need no query.
+    """
+    if not user or not user.is_authenticated:
+        return frozenset()
+    roles = await _acached_roles(user)
+    if roles is None:
+        names = [name async for name in user.groups.values_list('name', flat=True)]
+        roles = await _aremember_roles(user, frozenset(names))
+    return roles
+
+def invalidate_roles(*user_ids):
+    """
+    Drop the cached group names for the given users.
+    """
+    if user_ids:
+        cache.delete_many([role_cache_key(user_id) for user_id in user_ids])
+
+def get_group_id(name):
+    """
+    The id of a role group, read once per process for both roles; a missing group is created.
+    """
+    if name not in _group_ids:
+        _group_ids.update(Group.objects.filter(name__in=[MANAGER, DELIVERY_CREW]).values_list('name', 'id'))
+        if name not in _group_ids:
+            _group_ids[name] = Group.objects.get_or_create(name=name)[0].pk
+    return _group_ids[name]
+
+def reset_group_ids():
+    _group_ids.clear()
+
+def is_manager(user):
+    return MANAGER in get_roles(user)
+
+def is_delivery_crew(user):
+    return DELIVERY_CREW in get_roles(user)
+
+def is_admin(user):
+    return bool(user and user.is_staff)
+
+def is_manager_or_admin(user):
+    return is_admin(user) or is_manager(user)
+
+def is_customer(user):
+    if not user or not user.is_authenticated:
+        return False  # Unauthenticated users are not customers
+    roles = get_roles(user)
+    return MANAGER not in roles and DELIVERY_CREW not in roles
+
+def order_scope(user):
+    """
+    Which orders a user may see, as (scope key, filter kwargs for Order):
+    - Managers and Admins see all orders.
+    - Delivery Crew see orders assigned to them.
+    - Customers see their own orders.
+    The scope key identifies users that see the same orders, e.g. for shared caches.
+    """
+    if is_manager_or_admin(user):
+        return 'all', {}
+    if is_delivery_crew(user):
+        return f'crew:{user.pk}', {'delivery_crew': user}
+    return f'user:{user.pk}', {'user': user}
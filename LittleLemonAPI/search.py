@@ -0,0 +1,176 @@
+import re
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import SearchFilter
+from .models import MenuItem, MenuItemSearch
+
+SEARCH_TABLE = MenuItemSearch._meta.db_table
+
+# Indexed columns and the model fields they hold
+COLUMNS = {'title': 'title', 'category': 'category__title'}
+
+WORD = re.compile(r'\w+')
+
+
+class SQLiteIndex:
+    """
+    FTS5 table keyed by the menu item id (rowid), with prefix indexes for 1 to 3 characters.
+    """
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE "{SEARCH_TABLE}" USING fts5('
+            "title, category, tokenize='unicode61 remove_diacritics 2', prefix='1 2 3')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS "{SEARCH_TABLE}"')
+
+    def remove(self, cursor, ids):
+        cursor.executemany(f'DELETE FROM "{SEARCH_TABLE}" WHERE rowid = %s', [(pk,) for pk in ids])
+
+    def expression(self, words, columns):
+        # Every word must match as a prefix in one of the columns; quoting keeps words literal
+        scope = '{' + ' '.join(columns) + '}'
+        return ' AND '.join(f'{scope} : "{word}"*' for word in words)
+
+    def match(self, expression):
+        return RawSQL(f'"{SEARCH_TABLE}" MATCH %s', [expression], output_field=BooleanField())
+
+    def rank(self, expression):
+        # Lower is better; title hits weigh more than category hits
+        return RawSQL(f'bm25("{SEARCH_TABLE}", 10.0, 2.0)', [], output_field=FloatField())
+
+    rank_ordering = 'search_rank'
+
+
+class PostgreSQLIndex:
+    """
+    Table with a weighted tsvector (title A, category B) kept by a generated column and a GIN index.
+    """
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE "{SEARCH_TABLE}" ('
+            f'rowid bigint PRIMARY KEY REFERENCES "{MenuItem._meta.db_table}" (id) ON DELETE CASCADE, '
+            'title text NOT NULL, category text NOT NULL, '
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', category), 'B')"
+            ') STORED)'
+        )
+        cursor.execute(f'CREATE INDEX "{SEARCH_TABLE}_document_idx" ON "{SEARCH_TABLE}" USING gin (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS "{SEARCH_TABLE}"')
+
+    def remove(self, cursor, ids):
+        cursor.execute(f'DELETE FROM "{SEARCH_TABLE}" WHERE rowid = ANY(%s)', [list(ids)])
+
+    def expression(self, words, columns):
+        # Weights select the columns: A is the title, B the category
+        weights = ''.join({'title': 'A', 'category': 'B'}[column] for column in columns)
+        return ' & '.join(f'{word}:*{weights}' for word in words)
+
+    def match(self, expression):
+        return RawSQL(
+            f'"{SEARCH_TABLE}".document @@ to_tsquery(\'simple\', %s)', [expression], output_field=BooleanField()
+        )
+
+    def rank(self, expression):
+        return RawSQL(
+            f'ts_rank("{SEARCH_TABLE}".document, to_tsquery(\'simple\', %s))', [expression], output_field=FloatField()
+        )
+
+    rank_ordering = '-search_rank'  # Higher is better
+
+
+BACKENDS = {'sqlite': SQLiteIndex(), 'postgresql': PostgreSQLIndex()}
+
+def get_index(using=DEFAULT_DB_ALIAS):
+    """
+    The search index for the database's engine, or None where there is none (icontains fallback).
+    """
+    return BACKENDS.get(connections[using].vendor)
+
+
+def insert_rows(cursor, rows):
+    cursor.executemany(f'INSERT INTO "{SEARCH_TABLE}" (rowid, title, category) VALUES (%s, %s, %s)', rows)
+
+def index_menu_items(ids, using=DEFAULT_DB_ALIAS):
+    """
+    (Re)index these menu items; ids that no longer exist are just removed.
+    """
+    index = get_index(using)
+    if index is None or not ids:
+        return
+    rows = MenuItem.objects.using(using).filter(id__in=ids).values_list('id', 'title', 'category__title')
+    with connections[using].cursor() as cursor:
+        index.remove(cursor, ids)
+        insert_rows(cursor, list(rows))
+
+def remove_menu_items(ids, using=DEFAULT_DB_ALIAS):
+    index = get_index(using)
+    if index is not None and ids:
+        with connections[using].cursor() as cursor:
+            index.remove(cursor, ids)
+
+def index_category(category, using=DEFAULT_DB_ALIAS):
+    """
+    A renamed category changes the indexed category title of all its items.
+    """
+    ids = list(MenuItem.objects.using(using).filter(category=category).values_list('id', flat=True))
+    index_menu_items(ids, using)
+
+def rebuild_index(using=DEFAULT_DB_ALIAS, batch=5000):
+    """
+    Reindex every menu item, e.g. after bulk_create() or queryset.update(), which send no signals.
+    """
+    if get_index(using) is None:
+        return
+    rows = MenuItem.objects.using(using).order_by('id').values_list('id', 'title', 'category__title')
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM "{SEARCH_TABLE}"')
+        last = 0
+        while chunk := list(rows.filter(id__gt=last)[:batch]):
+            insert_rows(cursor, chunk)
+            last = chunk[-1][0]
+
+
+class MenuSearchFilter(SearchFilter):
+    """
+    ?search= through the full-text index instead of LIKE '%term%' scans:
+    - Every word of the search must match the start of a word in the title ("gre sal" finds "Greek Salad").
+    - Results are ordered by relevance unless the request asks for an ordering, or every word is
+      shorter than rank_min_length: those match much of the menu, and ranking them all costs more
+      than the order is worth.
+    - ?search_category=true also matches the category title.
+    - Databases without an index fall back to DRF's icontains search on the same fields.
+    The index is kept in sync by the MenuItem and Category signals; run rebuild_index()
+    after bulk writes that bypass them.
+    """
+    category_param = 'search_category'
+    rank_min_length = 3
+
+    def get_columns(self, request):
+        if request.query_params.get(self.category_param, '').lower() in ('1', 'true', 'yes'):
+            return ['title', 'category']
+        return ['title']
+
+    def get_search_fields(self, view, request):
+        return [COLUMNS[column] for column in self.get_columns(request)]
+
+    def filter_queryset(self, request, queryset, view):
+        index = get_index(queryset.db)
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+        words = [word.lower() for term in self.get_search_terms(request) for word in WORD.findall(term)]
+        if not words:
+            return queryset
+
+        # The isnull filter joins the index table, which match() and rank() refer to by name
+        expression = index.expression(words, self.get_columns(request))
+        queryset = queryset.filter(index.match(expression), search_index__isnull=False)
+        if queryset.query.order_by:  # An explicit ?ordering= wins over relevance
+            return queryset
+        if max(len(word) for word in words) < self.rank_min_length:
+            return queryset.order_by('id')
+        return queryset.annotate(search_rank=index.rank(expression)).order_by(index.rank_ordering, 'id')
@@ -2,6 +2,23 @@ from django.contrib.auth.models import User
 from rest_framework import serializers
 from . models import *
 
+class DynamicFieldsMixin:
+    """
+    Trim the payload from the serializer context:
+    - 'fields': only these fields are rendered (None keeps all).
+    - 'expand': expandable fields (Meta.expandable_fields) are rendered only when listed here.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = self.context.get('expand', set())
+        for name in getattr(self.Meta, 'expandable_fields', []):
+            if name not in expand:
+                self.fields.pop(name, None)
+        requested = self.context.get('fields')
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -13,6 +30,26 @@ class MenuItemSerializer(serializers.ModelSerializer):
         model = MenuItem
         fields = ['id', 'title', 'price', 'featured', 'category']
 
+class MenuItemRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk menu import: rows with an id update that item, rows without one create an item.
+    """
+    id = serializers.IntegerField(min_value=1, required=False) # Resolved in bulk, not per row
+    title = serializers.CharField(max_length=255, required=False)
+    price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    featured = serializers.BooleanField(required=False)
+    category = serializers.IntegerField(min_value=1, required=False) # Resolved in bulk, not per row
+
+    def validate(self, attrs):
+        if 'id' not in attrs:
+            missing = {'title', 'price', 'featured', 'category'} - set(attrs)
+            if missing:
+                raise serializers.ValidationError({name: ['This field is required.'] for name in sorted(missing)})
+        return attrs
+
+class MenuImportSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=1000) # Validated by import_menu_items
+
 class CartSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)  # Make user read-only
     unit_price = serializers.DecimalField(read_only=True, max_digits=6, decimal_places=2)  # Make unit_price read-only
@@ -21,19 +58,86 @@ class CartSerializer(serializers.ModelSerializer):
         model = Cart
         fields = ['id', 'user', 'menuitem', 'quantity', 'unit_price', 'total_price']
 
-class OrderSerializer(serializers.ModelSerializer):
+class CartLineSerializer(serializers.Serializer):
+    menuitem = serializers.IntegerField(min_value=1) # Resolved in bulk by the view, not per line
+    quantity = serializers.IntegerField(min_value=0, max_value=32767) # 0 removes the line
+
+class CartBatchSerializer(serializers.Serializer):
+    lines = CartLineSerializer(many=True, allow_empty=False, max_length=100)
+
+    def validate_lines(self, lines):
+        menuitems = [line['menuitem'] for line in lines]
+        if len(set(menuitems)) != len(menuitems):
+            raise serializers.ValidationError('Each menu item may appear only once.')
+        return lines
+
+class CartSummarySerializer(serializers.Serializer):
+    items = serializers.IntegerField()
+    quantity = serializers.IntegerField()
+    subtotal = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+class OrderItemSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source='menuitem.title', read_only=True)  # Needs menuitem prefetched
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'menuitem', 'title', 'quantity', 'unit_price', 'total_price']
+
+class OrderSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)  # Make user read-only
     total = serializers.DecimalField(read_only=True, max_digits=6, decimal_places=2)  # Make total read-only
+    item_count = serializers.IntegerField(read_only=True) # Maintained at checkout
     date = serializers.DateTimeField(read_only=True) # Make date read only
+    items = OrderItemSerializer(source='orderitem_set', many=True, read_only=True) # Nested line items
     class Meta:
         model = Order
-        fields = ['id', 'user', 'delivery_crew', 'status', 'total', 'date']
+        fields = ['id', 'user', 'delivery_crew', 'status', 'total', 'item_count', 'date', 'items']
+        expandable_fields = ['items'] # Rendered only when expanded
 
+class OrderTotalsSerializer(serializers.Serializer):
+    count = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
 
-class OrderItemSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = OrderItem
-        fields = ['id']
+class OrderSummarySerializer(OrderTotalsSerializer):
+    """
+    Totals plus the requested breakdowns; absent groupings are left out.
+    """
+    by_status = serializers.SerializerMethodField()
+    by_day = serializers.SerializerMethodField()
+    by_delivery_crew = serializers.SerializerMethodField()
+
+    def group(self, summary, name):
+        rows = summary.get(f'by_{name}')
+        if rows is None:
+            return None
+        return [{name: row[name], **OrderTotalsSerializer(row).data} for row in rows]
+
+    def get_by_status(self, summary):
+        return self.group(summary, 'status')
+
+    def get_by_day(self, summary):
+        return self.group(summary, 'day')
+
+    def get_by_delivery_crew(self, summary):
+        return self.group(summary, 'delivery_crew')
+
+    def to_representation(self, summary):
+        data = super().to_representation(summary)
+        return {name: value for name, value in data.items() if value is not None}
+
+class DispatchSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, max_value=1000, default=100) # Orders assigned per call
+    orders = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000) # Restrict to these orders
+    delivery_crew = serializers.ListField(child=serializers.IntegerField(), required=False) # Restrict to these crew members
+
+class GroupMembershipSerializer(serializers.Serializer):
+    username = serializers.CharField(required=False) # A single user, as in the original endpoints
+    usernames = serializers.ListField(child=serializers.CharField(), required=False, max_length=1000)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, max_length=1000)
+
+    def validate(self, attrs):
+        if not any(attrs.get(name) for name in ('username', 'usernames', 'ids')):
+            raise serializers.ValidationError({'usernames': ['Give a username, usernames or ids.']})
+        return attrs
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,99 @@
+from django.contrib.auth.models import Group, User
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+from .authentication import invalidate_user_tokens, token_cache
+from .catalog_cache import bump_version
+from .models import Category, MenuItem, UserOrderStats
+from .roles import invalidate_roles, reset_group_ids
+from .search import index_category, index_menu_items, remove_menu_items
+
+def invalidate_users(*user_ids):
+    """
+    Drop everything cached about these users: their roles and their authenticated tokens.
+    """
+    invalidate_roles(*user_ids)
+    invalidate_user_tokens(*user_ids)
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_group_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keep the cached roles and tokens in sync when group membership changes.
+    - user.groups.add(...) sends the user as instance.
+    - group.user_set.add(...) sends the group as instance and user ids in pk_set.
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_users(instance.pk)
+    elif pk_set:
+        invalidate_users(*pk_set)
+    elif action == 'pre_clear':
+        invalidate_users(*instance.user_set.values_list('pk', flat=True))
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_group_ids(sender, **kwargs):
+    """
+    A renamed, recreated or deleted role group changes the id the membership endpoints use.
+    """
+    reset_group_ids()
+
+@receiver(post_save, sender=User)
+def invalidate_changed_user(sender, instance, update_fields=None, **kwargs):
+    """
+    A saved user may have been deactivated or promoted; the login's last_login update is ignored.
+    """
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_users(instance.pk)
+
+@receiver(post_save, sender=User)
+def create_order_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Give every new user a counters row, so checkout and dispatch only ever UPDATE it.
+    """
+    if created and not raw:
+        UserOrderStats.objects.get_or_create(user=instance)
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """
+    Covers djoser's token logout and tokens deleted anywhere else.
+    """
+    token_cache.invalidate_key(instance.key)
+    invalidate_user_tokens(instance.user_id)
+
+@receiver(user_logged_out)
+def invalidate_logged_out_user(sender, user=None, **kwargs):
+    if user is not None and user.pk is not None:
+        invalidate_user_tokens(user.pk)
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog(sender, **kwargs):
+    """
+    Bump the catalog version once the change is committed, so no reader can
+    cache the old rows under the new version.
+    """
+    transaction.on_commit(bump_version)
+
+@receiver(post_save, sender=MenuItem)
+def index_saved_menu_item(sender, instance, using, **kwargs):
+    """
+    Keep the search index in the same transaction as the row, so they commit or roll back together.
+    """
+    index_menu_items([instance.pk], using)
+
+@receiver(post_delete, sender=MenuItem)
+def unindex_deleted_menu_item(sender, instance, using, **kwargs):
+    remove_menu_items([instance.pk], using)
+
+@receiver(post_save, sender=Category)
+def index_saved_category(sender, instance, using, created, **kwargs):
+    if not created:  # A new category has no items yet
+        index_category(instance, using)
@@ -0,0 +1,40 @@
+from decimal import Decimal
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from .models import Cart
+
+ZERO = Decimal('0.00')
+
+ORDER_GROUPS = {
+    'status': F('status'),
+    'day': TruncDate('date'),
+    'delivery_crew': F('delivery_crew'),
+}
+
+def cart_summary(user):
+    """
+    Line count, total quantity and subtotal of the user's cart in one query.
+    """
+    row = Cart.objects.filter(user=user).aggregate(
+        items=Count('id'), quantity=Sum('quantity'), subtotal=Sum('total_price'),
+    )
+    return {'items': row['items'], 'quantity': row['quantity'] or 0, 'subtotal': row['subtotal'] or ZERO}
+
+def order_summary(queryset, group_by=()):
+    """
+    Order count and revenue for a (scoped, filtered) queryset, one query per grouping:
+    - totals: {'count', 'revenue'}
+    - by_<group>: [{<group>, 'count', 'revenue'}] for each name in group_by.
+    """
+    queryset = queryset.order_by()
+    totals = queryset.aggregate(count=Count('id'), revenue=Sum('total'))
+    summary = {'count': totals['count'], 'revenue': totals['revenue'] or ZERO}
+    for name in group_by:
+        rows = (
+            queryset.annotate(group=ORDER_GROUPS[name]).values('group')
+            .annotate(count=Count('id'), revenue=Sum('total')).order_by('group')
+        )
+        summary[f'by_{name}'] = [
+            {name: row['group'], 'count': row['count'], 'revenue': row['revenue'] or ZERO} for row in rows
+        ]
+    return summary
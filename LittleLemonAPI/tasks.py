@@ -0,0 +1,28 @@
+from django.conf import settings
+from .dispatch import dispatch
+from .jobs import enqueue, handler
+
+# Order events, queued in the transaction that makes the change and handled by the runworker command.
+# Receipts, kitchen tickets or analytics subscribe with @handler(ORDER_PLACED) instead of running in checkout.
+ORDER_PLACED = 'order.placed'
+ORDER_STATUS_CHANGED = 'order.status_changed'
+
+def queue_order_placed(order):
+    enqueue(ORDER_PLACED, {'order': order.pk, 'user': order.user_id}, key=f'{ORDER_PLACED}:{order.pk}')
+
+def queue_status_changed(order):
+    # The update time tells apart successive changes of the same order
+    enqueue(
+        ORDER_STATUS_CHANGED,
+        {'order': order.pk, 'status': order.status, 'delivery_crew': order.delivery_crew_id},
+        key=f'{ORDER_STATUS_CHANGED}:{order.pk}:{order.updated.isoformat()}',
+    )
+
+@handler(ORDER_PLACED)
+def auto_dispatch(payload):
+    """
+    Assign the new order to the least-loaded Delivery Crew member (ORDER_AUTO_DISPATCH).
+    Running it twice is harmless: dispatch() only picks orders that are still unassigned.
+    """
+    if settings.ORDER_AUTO_DISPATCH:
+        dispatch(limit=1, order_ids=[payload['order']])
@@ -1,3 +1,1542 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import threading
+import tracemalloc
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+from django.contrib.auth.models import Group, User
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection
+from django.db.models import QuerySet
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from .models import *
+from . import catalog_cache, counters, idempotency, instrumentation, jobs, order_events, roles, throttling
+from .db_router import ReplicaRouter
+from .fast_lists import FieldPlan
+from .authentication import token_cache
+from .views import CategoryViewSet, MenuItemViewSet, OrderViewSet
+from .roles import MANAGER, DELIVERY_CREW, get_group_id, get_roles
+
+# Throttle counters and the catalog version in local memory, never in the shared SQLite file of a running server
+local_stores = override_settings(
+    THROTTLE_STORE='LittleLemonAPI.throttling.CacheCounterStore',
+    CATALOG_VERSION_STORE='LittleLemonAPI.catalog_cache.CacheVersionStore',
+)
 
 # Create your tests here.
+@local_stores
+class LittleLemonTestCase(TestCase):
+    """
+    Shared fixtures: the two role groups, one user per role and a small menu.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager_group = Group.objects.create(name=MANAGER)
+        cls.crew_group = Group.objects.create(name=DELIVERY_CREW)
+        cls.manager = User.objects.create_user('manager', password='pass')
+        cls.manager.groups.add(cls.manager_group)
+        cls.crew = User.objects.create_user('crew', password='pass')
+        cls.crew.groups.add(cls.crew_group)
+        cls.customer = User.objects.create_user('customer', password='pass')
+        cls.category = Category.objects.create(slug='mains', title='Mains')
+        cls.menuitems = [
+            MenuItem.objects.create(title=f'Dish {i}', price=Decimal('5.50') + i, featured=False, category=cls.category)
+            for i in range(20)
+        ]
+
+    def setUp(self):
+        cache.clear()  # The role cache lives in the default cache
+        throttling.get_store().clear()
+        caches['catalog'].clear()
+        catalog_cache.reset_stats()
+        token_cache.clear()
+        roles.reset_group_ids()  # Ids of groups a previous test created were rolled back
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def role_queries(self, queries):
+        return [q for q in queries if 'auth_group' in q['sql']]
+
+
+class RoleResolutionTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = Order.objects.create(user=self.customer, total=Decimal('10.00'))
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0)
+    def test_single_role_query_per_request(self):
+        client = self.client_for(self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.patch(f'/api/orders/{self.order.id}/', {'status': True, 'delivery_crew': self.crew.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.role_queries(ctx.captured_queries)), 1)
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0)
+    def test_customer_permission_single_role_query(self):
+        client = self.client_for(self.customer)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/cart/menu-items/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.role_queries(ctx.captured_queries)), 1)
+
+    @override_settings(ROLE_CACHE_TIMEOUT=60)
+    def test_cross_request_cache_skips_role_query(self):
+        client = self.client_for(self.manager)
+        client.get('/api/orders/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.role_queries(ctx.captured_queries)), 0)
+
+    @override_settings(ROLE_CACHE_TIMEOUT=60)
+    def test_group_change_invalidates_cached_roles(self):
+        self.assertNotIn(MANAGER, get_roles(User.objects.get(pk=self.customer.pk)))
+        client = self.client_for(self.manager)
+        response = client.post('/api/groups/manager/users/', {'username': 'customer'})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(MANAGER, get_roles(User.objects.get(pk=self.customer.pk)))
+        client.delete(f'/api/groups/manager/users/{self.customer.id}/')
+        self.assertNotIn(MANAGER, get_roles(User.objects.get(pk=self.customer.pk)))
+
+
+
+@override_settings(ROLE_CACHE_TIMEOUT=0)
+@override_settings(TOKEN_CACHE_TIMEOUT=60)  # Off by default with the local memory test cache
+class CachedTokenAuthenticationTests(LittleLemonTestCase):
+    def auth_queries(self, client, url='/api/cart/menu-items/'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        return response, [q for q in ctx.captured_queries if 'authtoken_token' in q['sql'] or 'auth_group' in q['sql']]
+
+    def test_hot_request_skips_token_and_role_queries(self):
+        client = self.client_for(self.customer)
+        response, cold = self.auth_queries(client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(cold), 2)
+        response, hot = self.auth_queries(client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(hot, [])
+
+    def test_logout_revokes_cached_token(self):
+        client = self.client_for(self.customer)
+        client.get('/api/cart/menu-items/')
+        self.assertEqual(client.post('/auth/token/logout/').status_code, 204)
+        self.assertEqual(client.get('/api/cart/menu-items/').status_code, 401)
+
+    def test_deleted_token_and_inactive_user_are_rejected(self):
+        client = self.client_for(self.customer)
+        client.get('/api/cart/menu-items/')
+        Token.objects.filter(user=self.customer).delete()
+        self.assertEqual(client.get('/api/cart/menu-items/').status_code, 401)
+
+        client = self.client_for(self.customer)
+        client.get('/api/cart/menu-items/')
+        self.customer.is_active = False
+        self.customer.save()
+        self.assertEqual(client.get('/api/cart/menu-items/').status_code, 401)
+
+    def test_group_change_refreshes_cached_roles(self):
+        client = self.client_for(self.customer)
+        self.assertEqual(client.get('/api/cart/menu-items/').status_code, 200)
+        self.client_for(self.manager).post('/api/groups/delivery-crew/users/', {'username': 'customer'})
+        self.assertEqual(client.get('/api/cart/menu-items/').status_code, 403)
+        self.client_for(self.manager).delete(f'/api/groups/delivery-crew/users/{self.customer.id}/')
+        self.assertEqual(client.get('/api/cart/menu-items/').status_code, 200)
+
+
+@override_settings(ROLE_CACHE_TIMEOUT=0, TOKEN_CACHE_TIMEOUT=0)
+class GroupMembershipTests(LittleLemonTestCase):
+    url = '/api/groups/delivery-crew/users/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.drivers = User.objects.bulk_create([User(username=f'driver{i}') for i in range(30)])
+
+    def request(self, method, data, url=None):
+        client = self.client_for(self.manager)
+        client.get('/api/cart/menu-items/')  # Authenticate once outside the captured queries
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(client, method)(url or self.url, data, format='json')
+        return response, ctx.captured_queries
+
+    def crew_ids(self):
+        return set(self.crew_group.user_set.values_list('id', flat=True))
+
+    def test_bulk_add_by_username_and_id(self):
+        data = {'usernames': ['driver0', 'driver1', 'crew'], 'ids': [self.drivers[2].id]}
+        response, _ = self.request('post', data)
+        self.assertEqual(response.status_code, 201)
+        expected = {self.crew.id} | {driver.id for driver in self.drivers[:3]}
+        self.assertEqual(set(response.data['users']), expected)
+        self.assertEqual(self.crew_ids(), expected)
+
+    def test_query_count_independent_of_user_count(self):
+        get_group_id(DELIVERY_CREW)  # Looked up once per process
+        _, small = self.request('post', {'usernames': ['driver0']})
+        _, large = self.request('post', {'usernames': [driver.username for driver in self.drivers[1:]]})
+        self.assertEqual(len(small), len(large))
+        self.assertFalse([q for q in large if '"auth_group"."name" IN' in q['sql']])  # The group id is cached
+        self.assertEqual(len(self.crew_ids()), 31)
+        _, removed = self.request('delete', {'ids': [driver.id for driver in self.drivers]})
+        self.assertEqual(self.crew_ids(), {self.crew.id})
+        self.assertLessEqual(len(removed), len(large))
+
+    def test_unknown_users_are_reported_and_nothing_is_written(self):
+        response, _ = self.request('post', {'usernames': ['driver0', 'nobody'], 'ids': [99999]})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nobody', str(response.data['usernames']))
+        self.assertIn('99999', str(response.data['ids']))
+        self.assertEqual(self.crew_ids(), {self.crew.id})
+        response, _ = self.request('post', {'username': 'nobody'})
+        self.assertEqual(response.status_code, 404)
+        response, _ = self.request('post', {})
+        self.assertEqual(response.status_code, 400)
+
+    def test_listing_is_paginated(self):
+        self.request('post', {'ids': [driver.id for driver in self.drivers]})
+        response = self.client_for(self.manager).get(self.url)
+        self.assertEqual(response.data['count'], 31)
+        self.assertEqual(len(response.data['results']), settings.REST_FRAMEWORK['PAGE_SIZE'])
+        response = self.client_for(self.manager).get('/api/groups/manager/users/')
+        self.assertEqual([user['username'] for user in response.data['results']], ['manager'])
+
+    def test_recreated_group_is_picked_up(self):
+        self.request('post', {'username': 'driver0'})
+        self.crew_group.delete()
+        group = Group.objects.create(name=DELIVERY_CREW)
+        response, _ = self.request('post', {'username': 'driver1'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(group.user_set.values_list('username', flat=True)), ['driver1'])
+
+    def test_group_recreated_by_another_process_is_retried(self):
+        stale = self.crew_group.pk
+        self.crew_group.delete()
+        group = Group.objects.create(name=DELIVERY_CREW)
+        roles._group_ids[DELIVERY_CREW] = stale  # Another worker still has the old id
+        through = User.groups.through
+        bulk_create = QuerySet.bulk_create
+
+        def checked(queryset, objs, *args, **kwargs):  # Foreign keys checked at once, as on commit
+            if queryset.model is through and not Group.objects.filter(pk__in={obj.group_id for obj in objs}).exists():
+                raise IntegrityError('FOREIGN KEY constraint failed')
+            return bulk_create(queryset, objs, *args, **kwargs)
+        with mock.patch.object(QuerySet, 'bulk_create', checked):
+            response, _ = self.request('post', {'username': 'driver1'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(group.user_set.values_list('username', flat=True)), ['driver1'])
+        self.assertEqual(roles._group_ids[DELIVERY_CREW], group.pk)
+
+
+class ThrottlingTests(LittleLemonTestCase):
+    def test_order_create_has_a_stricter_endpoint_limit(self):
+        client = self.client_for(self.customer)
+        statuses = [client.post('/api/orders/').status_code for _ in range(11)]
+        self.assertEqual(statuses[:10], [400] * 10)  # Empty cart, but each attempt counts
+        self.assertEqual(statuses[10], 429)
+        response = client.post('/api/orders/')
+        self.assertLessEqual(int(response['Retry-After']), 60)
+        self.assertEqual(client.get('/api/menu-items/').status_code, 200)
+
+    def test_user_limit_spans_endpoints(self):
+        client = self.client_for(self.customer)
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': {'anon': '10/minute', 'user': '3/minute'}}):
+            statuses = [client.get(url).status_code for url in ('/api/menu-items/', '/api/categories/', '/api/orders/', '/api/cart/summary/')]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+    def test_sqlite_store_counts_accurately_across_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'throttle.sqlite3'
+            stores = [throttling.SQLiteCounterStore(path) for _ in range(2)]  # Separate connections, like two workers
+
+            def hammer(store):
+                for _ in range(50):
+                    store.incr('throttle_user_1:0', 60)
+            threads = [threading.Thread(target=hammer, args=(stores[i % 2],)) for i in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(stores[0].incr('throttle_user_1:0', 60), 301)
+
+            client = self.client_for(self.customer)
+            with mock.patch.object(throttling, 'get_store', lambda: stores[1]):
+                statuses = [client.post('/api/orders/').status_code for _ in range(11)]
+            self.assertEqual(statuses.count(429), 1)
+
+class CheckoutTests(LittleLemonTestCase):
+    def fill_cart(self, size):
+        Cart.objects.bulk_create([
+            Cart(user=self.customer, menuitem=item, quantity=2, unit_price=item.price, total_price=item.price * 2)
+            for item in self.menuitems[:size]
+        ])
+
+    def checkout(self):
+        client = self.client_for(self.customer)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post('/api/orders/')
+        return response, len(ctx.captured_queries)
+
+    def test_checkout_moves_cart_into_order(self):
+        self.fill_cart(3)
+        response, _ = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual(order.total, sum(item.price * 2 for item in self.menuitems[:3]))
+        self.assertEqual(order.orderitem_set.count(), 3)
+        self.assertFalse(Cart.objects.filter(user=self.customer).exists())
+
+    def test_empty_cart_is_rejected(self):
+        response, _ = self.checkout()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Cart is empty'})
+        self.assertFalse(Order.objects.exists())
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0, TOKEN_CACHE_TIMEOUT=0)
+    def test_query_count_independent_of_cart_size(self):
+        counts = []
+        for size in (1, 15):
+            self.fill_cart(size)
+            response, queries = self.checkout()
+            self.assertEqual(response.status_code, 201)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+
+
+class CatalogCacheTests(LittleLemonTestCase):
+    def catalog_queries(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        return response, [q for q in ctx.captured_queries if 'LittleLemonAPI_' in q['sql']]
+
+    def test_repeated_list_is_served_from_cache(self):
+        client = self.client_for(self.customer)
+        response, queries = self.catalog_queries(client, '/api/menu-items/?ordering=price&page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries)
+        cached, queries = self.catalog_queries(client, '/api/menu-items/?page=2&ordering=price')
+        self.assertEqual(queries, [])
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(catalog_cache.stats()['hits'], 1)
+
+    def test_params_get_their_own_entries(self):
+        client = self.client_for(self.customer)
+        first = client.get('/api/menu-items/?ordering=price')
+        second = client.get('/api/menu-items/?ordering=-price')
+        self.assertNotEqual(first.data['results'], second.data['results'])
+        self.assertEqual(catalog_cache.stats()['misses'], 2)
+
+    def test_save_and_delete_bump_the_version(self):
+        client = self.client_for(self.customer)
+        url = f'/api/menu-items/{self.menuitems[0].id}/'
+        client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            item = MenuItem.objects.get(pk=self.menuitems[0].pk)
+            item.title = 'Renamed'
+            item.save()
+        self.assertEqual(client.get(url).data['title'], 'Renamed')
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(slug='drinks', title='Drinks')
+        response, queries = self.catalog_queries(client, '/api/categories/')
+        self.assertEqual(response.data['count'], 2)
+        self.assertTrue(queries)
+
+    def test_version_is_shared_between_workers(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'throttle.sqlite3'
+            workers = [catalog_cache.SQLiteVersionStore(path) for _ in range(2)]  # Separate connections, like two workers
+            version, modified = workers[0].get()
+            self.assertIsNone(modified)
+            self.assertEqual(workers[1].get(), (version, None))
+
+            client = self.client_for(self.customer)
+            with mock.patch.object(catalog_cache, '_load_version_store', lambda path: workers[0]):
+                etag = client.get('/api/categories/')['ETag']
+            with mock.patch.object(catalog_cache, '_load_version_store', lambda path: workers[1]), \
+                    self.captureOnCommitCallbacks(execute=True):
+                Category.objects.create(slug='drinks', title='Drinks')
+            self.assertEqual(workers[0].get()[0], version + 1)
+            with mock.patch.object(catalog_cache, '_load_version_store', lambda path: workers[0]):
+                response = client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data['count'], 2)
+
+
+class ConditionalGetTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.orders = [Order.objects.create(user=self.customer, total=Decimal('12.00')) for _ in range(3)]
+
+    def test_menu_items_304_without_catalog_queries(self):
+        client = self.client_for(self.customer)
+        response = client.get('/api/menu-items/')
+        self.assertIn('ETag', response)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/menu-items/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse([q for q in ctx.captured_queries if 'LittleLemonAPI_' in q['sql']])
+
+    def test_catalog_change_changes_etag(self):
+        client = self.client_for(self.customer)
+        etag = client.get('/api/categories/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(slug='drinks', title='Drinks')
+        response = client.get('/api/categories/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_orders_304_runs_only_the_aggregate(self):
+        client = self.client_for(self.customer)
+        etag = client.get('/api/orders/')['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/orders/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        order_queries = [q for q in ctx.captured_queries if 'LittleLemonAPI_order' in q['sql']]
+        self.assertEqual(len(order_queries), 1)
+
+    def test_order_update_changes_etag(self):
+        customer = self.client_for(self.customer)
+        etag = customer.get('/api/orders/')['ETag']
+        detail_etag = customer.get(f'/api/orders/{self.orders[0].id}/')['ETag']
+        Order.objects.filter(pk=self.orders[0].pk).update(delivery_crew=self.crew)
+        response = self.client_for(self.crew).patch(f'/api/orders/{self.orders[0].id}/', {'status': True})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(customer.get('/api/orders/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(customer.get(f'/api/orders/{self.orders[0].id}/', HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        client = self.client_for(self.customer)
+        last_modified = client.get('/api/orders/')['Last-Modified']
+        response = client.get('/api/orders/', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+
+class KeysetPaginationTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        # Repeated totals exercise the id tiebreaker
+        Order.objects.bulk_create([
+            Order(user=self.customer, total=Decimal(10 + i % 3)) for i in range(25)
+        ])
+
+    def walk(self, client, url):
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_walks_every_order_once_in_order(self):
+        client = self.client_for(self.customer)
+        expected = list(Order.objects.order_by('total', 'id').values_list('id', flat=True))
+        ids = self.walk(client, '/api/orders/?pagination=keyset&ordering=total')
+        self.assertEqual(ids, expected)
+        expected = list(Order.objects.order_by('-date', '-id').values_list('id', flat=True))
+        ids = self.walk(client, '/api/orders/?pagination=keyset')
+        self.assertEqual(ids, expected)
+
+    def test_previous_link_returns_previous_page(self):
+        client = self.client_for(self.customer)
+        first = client.get('/api/orders/?pagination=keyset&ordering=-total')
+        second = client.get(first.data['next'])
+        back = client.get(second.data['previous'])
+        self.assertEqual([row['id'] for row in back.data['results']], [row['id'] for row in first.data['results']])
+        self.assertIsNone(back.data['previous'])
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client_for(self.customer).get('/api/orders/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_stay_default(self):
+        response = self.client_for(self.customer).get('/api/orders/?page=2')
+        self.assertEqual(response.data['count'], 25)
+
+
+class OrderItemsTests(LittleLemonTestCase):
+    def create_orders(self, count, items):
+        orders = Order.objects.bulk_create([Order(user=self.customer, total=Decimal('0.00')) for _ in range(count)])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menuitem=item, quantity=1, unit_price=item.price, total_price=item.price)
+            for order in orders for item in self.menuitems[:items]
+        ])
+        return orders
+
+    def list_queries(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_detail_embeds_line_items(self):
+        order = self.create_orders(1, 2)[0]
+        response = self.client_for(self.customer).get(f'/api/orders/{order.id}/')
+        self.assertEqual(len(response.data['items']), 2)
+        line = response.data['items'][0]
+        self.assertEqual(line['title'], self.menuitems[0].title)
+        self.assertEqual(line['unit_price'], str(self.menuitems[0].price))
+
+    def test_list_skips_items_unless_expanded(self):
+        self.create_orders(2, 2)
+        client = self.client_for(self.customer)
+        self.assertNotIn('items', client.get('/api/orders/').data['results'][0])
+        self.assertIn('items', client.get('/api/orders/?expand=items').data['results'][0])
+        self.assertEqual(set(client.get('/api/orders/?fields=id,total').data['results'][0]), {'id', 'total'})
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0, TOKEN_CACHE_TIMEOUT=0)
+    def test_query_count_independent_of_orders_and_items(self):
+        client = self.client_for(self.customer)
+        self.create_orders(1, 1)
+        _, small = self.list_queries(client, '/api/orders/?expand=items')
+        self.create_orders(9, 15)
+        response, large = self.list_queries(client, '/api/orders/?expand=items')
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(small, large)
+
+
+class CartBatchTests(LittleLemonTestCase):
+    def post_batch(self, client, lines):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post('/api/cart/menu-items/batch/', {'lines': lines}, format='json')
+        return response, len(ctx.captured_queries)
+
+    def test_add_update_and_remove_in_one_request(self):
+        client = self.client_for(self.customer)
+        response, _ = self.post_batch(client, [{'menuitem': item.id, 'quantity': 2} for item in self.menuitems[:3]])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        lines = [{'menuitem': self.menuitems[0].id, 'quantity': 5}, {'menuitem': self.menuitems[1].id, 'quantity': 0}]
+        response, _ = self.post_batch(client, lines)
+        cart = {line['menuitem']: line for line in response.data}
+        self.assertEqual(set(cart), {self.menuitems[0].id, self.menuitems[2].id})
+        self.assertEqual(cart[self.menuitems[0].id]['quantity'], 5)
+        self.assertEqual(cart[self.menuitems[0].id]['total_price'], str(self.menuitems[0].price * 5))
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0, TOKEN_CACHE_TIMEOUT=0)
+    def test_query_count_independent_of_line_count(self):
+        client = self.client_for(self.customer)
+        _, small = self.post_batch(client, [{'menuitem': self.menuitems[0].id, 'quantity': 1}])
+        _, large = self.post_batch(client, [{'menuitem': item.id, 'quantity': 3} for item in self.menuitems])
+        self.assertEqual(small, large)
+
+    def test_unknown_and_duplicate_menu_items_are_rejected(self):
+        client = self.client_for(self.customer)
+        response, _ = self.post_batch(client, [{'menuitem': self.menuitems[0].id, 'quantity': 1}, {'menuitem': 9999, 'quantity': 1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['lines'][0], {})
+        self.assertIn('menuitem', response.data['lines'][1])
+        response, _ = self.post_batch(client, [{'menuitem': self.menuitems[0].id, 'quantity': 1}] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Cart.objects.exists())
+
+    def test_line_totals_must_fit_the_price_field(self):
+        item = MenuItem.objects.create(title='Feast', price=Decimal('9999.99'), featured=False, category=self.category)
+        client = self.client_for(self.customer)
+        response, _ = self.post_batch(client, [{'menuitem': self.menuitems[0].id, 'quantity': 1}, {'menuitem': item.id, 'quantity': 2}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['lines'][0], {})
+        self.assertIn('quantity', response.data['lines'][1])
+        self.assertFalse(Cart.objects.exists())
+        response, _ = self.post_batch(client, [{'menuitem': item.id, 'quantity': 1}])
+        self.assertEqual(response.status_code, 200)
+
+
+class IdempotencyTests(LittleLemonTestCase):
+    def post(self, user, url, data=None, key='retry-1'):
+        client = self.client_for(user)
+        headers = {'Idempotency-Key': key} if key else {}
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.post(url, data or {}, format='json', headers=headers)
+        return response, ctx.captured_queries
+
+    def add_to_cart(self, item=0, key='retry-1'):
+        return self.post(self.customer, '/api/cart/menu-items/', {'menuitem': self.menuitems[item].id, 'quantity': 2}, key)
+
+    def test_retried_checkout_replays_the_first_response(self):
+        self.add_to_cart(key=None)
+        first, _ = self.post(self.customer, '/api/orders/')
+        self.assertEqual(first.status_code, 201)
+        retry, queries = self.post(self.customer, '/api/orders/')
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertFalse([q for q in queries if 'INSERT INTO "LittleLemonAPI_order"' in q['sql']])
+
+    def test_retried_cart_add_replays_instead_of_failing(self):
+        first, _ = self.add_to_cart()
+        retry, _ = self.add_to_cart()
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+        self.assertEqual(Cart.objects.count(), 1)
+        # Without a key the duplicate is a validation error, not an IntegrityError
+        response, _ = self.add_to_cart(key=None)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('menuitem', response.data)
+
+    def test_key_reused_for_another_request_is_refused(self):
+        self.add_to_cart(0)
+        response, _ = self.add_to_cart(1)
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Cart.objects.count(), 1)
+        response, _ = self.post(self.customer, '/api/orders/')  # Same key, other endpoint
+        self.assertEqual(response.status_code, 201)
+
+    def test_keys_are_scoped_per_user(self):
+        customer2 = User.objects.create_user('customer2')
+        self.add_to_cart()
+        response, _ = self.post(customer2, '/api/cart/menu-items/', {'menuitem': self.menuitems[0].id, 'quantity': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn('Idempotent-Replayed', response)
+        self.assertEqual(Cart.objects.count(), 2)
+
+    def test_server_errors_are_not_stored(self):
+        self.add_to_cart(key=None)
+        with mock.patch('LittleLemonAPI.views.place_order', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.post(self.customer, '/api/orders/')
+        self.assertFalse(IdempotencyRecord.objects.exists())
+        response, _ = self.post(self.customer, '/api/orders/')
+        self.assertEqual(response.status_code, 201)
+
+    def test_concurrent_duplicate_waits_for_the_first_response(self):
+        first, _ = self.add_to_cart()
+        record = IdempotencyRecord.objects.get()
+        IdempotencyRecord.objects.update(status_code=None, body=b'')  # The first request is still running
+
+        def finish(seconds):
+            IdempotencyRecord.objects.update(status_code=201, body=first.content)
+        with mock.patch('LittleLemonAPI.idempotency.time.sleep', side_effect=finish) as sleep:
+            retry, _ = self.add_to_cart()
+        sleep.assert_called_once()
+        self.assertEqual((retry.status_code, retry.content), (201, first.content))
+
+        # Still running after the wait: the first request holds the record locked, so no takeover
+        IdempotencyRecord.objects.update(status_code=None)
+        with override_settings(IDEMPOTENCY_WAIT_SECONDS=0), mock.patch.object(idempotency, 'take_over', return_value=None):
+            retry, _ = self.add_to_cart()
+        self.assertEqual(retry.status_code, 409)
+
+        # A request that died before committing left the record unlocked and without an outcome
+        Cart.objects.all().delete()
+        with override_settings(IDEMPOTENCY_WAIT_SECONDS=0):
+            retry, _ = self.add_to_cart()
+        self.assertNotIn('Idempotent-Replayed', retry)
+        self.assertEqual(retry.status_code, 201)
+        self.assertNotEqual(IdempotencyRecord.objects.get().started, record.started)
+
+    def test_outcome_is_committed_with_the_order(self):
+        self.add_to_cart(key=None)
+        # The process dies after the checkout committed, before the response is finalized
+        with mock.patch.object(idempotency.IdempotentCreateMixin, 'finalize_response', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                self.post(self.customer, '/api/orders/')
+        self.assertEqual(IdempotencyRecord.objects.get().status_code, 201)
+        retry, _ = self.post(self.customer, '/api/orders/')
+        self.assertEqual((retry.status_code, retry['Idempotent-Replayed']), (201, 'true'))
+        self.assertEqual(retry.data['id'], Order.objects.get().id)
+
+    def test_error_responses_are_replayed(self):
+        first, _ = self.post(self.customer, '/api/orders/')  # Empty cart
+        self.assertEqual(first.status_code, 400)
+        self.add_to_cart(key=None)
+        retry, _ = self.post(self.customer, '/api/orders/')
+        self.assertEqual((retry.status_code, retry.content), (400, first.content))
+        self.assertFalse(Order.objects.exists())
+
+    def test_expired_records_are_pruned(self):
+        self.add_to_cart()
+        IdempotencyRecord.objects.update(expires=timezone.now() - timedelta(seconds=1))
+        Cart.objects.all().delete()
+        response, _ = self.add_to_cart()
+        self.assertNotIn('Idempotent-Replayed', response)  # Expired: runs again
+        IdempotencyRecord.objects.update(expires=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(idempotency.prune(), 1)
+
+
+class SummaryTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user('other', password='pass')
+        Order.objects.bulk_create([
+            Order(user=self.customer, total=Decimal('10.00'), status=True, delivery_crew=self.crew),
+            Order(user=self.customer, total=Decimal('5.50')),
+            Order(user=other, total=Decimal('7.25'), delivery_crew=self.crew),
+        ])
+
+    def test_cart_summary(self):
+        Cart.objects.create(user=self.customer, menuitem=self.menuitems[0], quantity=3, unit_price=Decimal('2.00'), total_price=Decimal('6.00'))
+        Cart.objects.create(user=self.customer, menuitem=self.menuitems[1], quantity=1, unit_price=Decimal('4.00'), total_price=Decimal('4.00'))
+        response = self.client_for(self.customer).get('/api/cart/summary/')
+        self.assertEqual(response.data, {'items': 2, 'quantity': 4, 'subtotal': '10.00'})
+
+    def test_order_summary_respects_role_scope(self):
+        response = self.client_for(self.customer).get('/api/orders/summary/?group_by=status')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['revenue'], '15.50')
+        self.assertEqual(response.data['by_status'], [
+            {'status': False, 'count': 1, 'revenue': '5.50'},
+            {'status': True, 'count': 1, 'revenue': '10.00'},
+        ])
+        response = self.client_for(self.crew).get('/api/orders/summary/')
+        self.assertEqual((response.data['count'], response.data['revenue']), (2, '17.25'))
+
+    def test_manager_breakdowns(self):
+        client = self.client_for(self.manager)
+        response = client.get('/api/orders/summary/?group_by=day,delivery_crew&status=false')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['by_day']), 1)
+        self.assertEqual(response.data['by_delivery_crew'], [
+            {'delivery_crew': None, 'count': 1, 'revenue': '5.50'},
+            {'delivery_crew': self.crew.id, 'count': 1, 'revenue': '7.25'},
+        ])
+        self.assertEqual(self.client_for(self.customer).get('/api/orders/summary/?group_by=delivery_crew').status_code, 403)
+        self.assertEqual(client.get('/api/orders/summary/?group_by=week').status_code, 400)
+
+    def test_summary_is_cached(self):
+        client = self.client_for(self.manager)
+        client.get('/api/orders/summary/')
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/orders/summary/')
+        self.assertEqual(response.data['count'], 3)
+        self.assertFalse([q for q in ctx.captured_queries if 'LittleLemonAPI_order' in q['sql']])
+
+
+class ExportTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.orders = Order.objects.bulk_create([
+            Order(user=self.customer, total=Decimal('9.00'), status=i % 2 == 0) for i in range(5)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, menuitem=item, quantity=1, unit_price=item.price, total_price=item.price)
+            for order in self.orders[:2] for item in self.menuitems[:2]
+        ])
+
+    def export(self, user, query=''):
+        response = self.client_for(user).get(f'/api/orders/export/{query}')
+        content = b''.join(response.streaming_content).decode() if response.status_code == 200 else ''
+        return response, content
+
+    def test_ndjson_streams_every_order(self):
+        response, content = self.export(self.manager)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [order.id for order in self.orders])
+        self.assertNotIn('items', rows[0])
+
+    def test_csv_with_items_and_filters(self):
+        response, content = self.export(self.manager, '?output=csv&expand=items&status=true')
+        rows = list(csv.DictReader(io.StringIO(content)))
+        # Order 0 has two items, orders 2 and 4 have none
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['item_title'], self.menuitems[0].title)
+        self.assertEqual(rows[-1]['item_id'], '')
+
+    def test_export_is_manager_only(self):
+        response, _ = self.export(self.customer)
+        self.assertEqual(response.status_code, 403)
+        response, _ = self.export(self.manager, '?output=xml')
+        self.assertEqual(response.status_code, 400)
+
+
+class DispatchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.crew2 = User.objects.create_user('crew2', password='pass')
+        self.crew2.groups.add(self.crew_group)
+        # crew already carries two open orders, crew2 none
+        Order.objects.bulk_create([Order(user=self.customer, total=Decimal('8.00'), delivery_crew=self.crew) for _ in range(2)])
+        self.queued = Order.objects.bulk_create([Order(user=self.customer, total=Decimal('8.00')) for _ in range(6)])
+        counters.rebuild_user_stats()  # bulk_create() skips the counters dispatch reads
+
+    def test_assigns_to_least_loaded_crew(self):
+        response = self.client_for(self.manager).post('/api/orders/dispatch/', {'limit': 6}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['assigned'], 6)
+        self.assertEqual(Order.objects.filter(delivery_crew=self.crew).count(), 4)
+        self.assertEqual(Order.objects.filter(delivery_crew=self.crew2).count(), 4)
+        self.assertFalse(Order.objects.filter(delivery_crew__isnull=True).exists())
+
+    def test_restricts_orders_and_crew(self):
+        ids = [order.id for order in self.queued[:2]]
+        response = self.client_for(self.manager).post(
+            '/api/orders/dispatch/', {'orders': ids, 'delivery_crew': [self.crew.id]}, format='json'
+        )
+        self.assertEqual(response.data['assignments'], [{'delivery_crew': self.crew.id, 'orders': ids}])
+
+    def test_assigned_and_delivered_orders_are_not_requeued(self):
+        Order.objects.filter(pk=self.queued[0].pk).update(status=True)
+        self.client_for(self.manager).post('/api/orders/dispatch/', {}, format='json')
+        self.assertIsNone(Order.objects.get(pk=self.queued[0].pk).delivery_crew)
+        response = self.client_for(self.manager).post('/api/orders/dispatch/', {}, format='json')
+        self.assertEqual(response.data['assigned'], 0)
+
+    def test_dispatch_is_manager_only(self):
+        response = self.client_for(self.crew).post('/api/orders/dispatch/', {}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class OrderCounterTests(LittleLemonTestCase):
+    def stats(self, user):
+        row = UserOrderStats.objects.filter(user=user).values('order_count', 'total_spent', 'open_deliveries').first()
+        return row or counters.EMPTY_STATS
+
+    def checkout(self):
+        client = self.client_for(self.customer)
+        lines = [{'menuitem': self.menuitems[0].id, 'quantity': 2}, {'menuitem': self.menuitems[1].id, 'quantity': 3}]
+        client.post('/api/cart/menu-items/batch/', {'lines': lines}, format='json')
+        response = client.post('/api/orders/', {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Order.objects.get(pk=response.data['id'])
+
+    def test_checkout_counts_items_and_customer_totals(self):
+        order = self.checkout()
+        self.assertEqual(order.item_count, 5)
+        self.checkout()
+        self.assertEqual(self.stats(self.customer), {'order_count': 2, 'total_spent': order.total * 2, 'open_deliveries': 0})
+
+    def test_crew_changes_and_deletes_move_the_counters(self):
+        order = self.checkout()
+        crew2 = User.objects.create_user('crew2')
+        crew2.groups.add(self.crew_group)
+        manager = self.client_for(self.manager)
+        manager.patch(f'/api/orders/{order.id}/', {'delivery_crew': self.crew.id}, format='json')
+        self.assertEqual(self.stats(self.crew)['open_deliveries'], 1)
+        manager.patch(f'/api/orders/{order.id}/', {'delivery_crew': crew2.id}, format='json')
+        self.assertEqual((self.stats(self.crew)['open_deliveries'], self.stats(crew2)['open_deliveries']), (0, 1))
+        self.client_for(crew2).patch(f'/api/orders/{order.id}/', {'status': True}, format='json')
+        self.assertEqual(self.stats(crew2)['open_deliveries'], 0)
+        manager.patch(f'/api/orders/{order.id}/', {'status': False}, format='json')
+        self.assertEqual(self.stats(crew2)['open_deliveries'], 1)
+        self.assertEqual(manager.delete(f'/api/orders/{order.id}/').status_code, 204)
+        self.assertEqual(self.stats(crew2)['open_deliveries'], 0)
+        self.assertEqual(self.stats(self.customer)['order_count'], 0)
+
+    def test_update_reads_the_order_once_under_lock(self):
+        order = self.checkout()
+        locked, depths = [], []
+        select_for_update = QuerySet.select_for_update
+        perform_update = OrderViewSet.perform_update
+
+        def spy(queryset, *args, **kwargs):
+            locked.append(queryset.model)
+            return select_for_update(queryset, *args, **kwargs)
+
+        def in_transaction(view, serializer):
+            depths.append(len(connection.atomic_blocks))
+            return perform_update(view, serializer)
+        outside = len(connection.atomic_blocks)  # The test's own transactions
+        with mock.patch.object(QuerySet, 'select_for_update', spy), \
+                mock.patch.object(OrderViewSet, 'perform_update', in_transaction), \
+                CaptureQueriesContext(connection) as ctx:
+            response = self.client_for(self.manager).patch(f'/api/orders/{order.id}/', {'delivery_crew': self.crew.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(Order, locked)
+        self.assertEqual(len(depths), 1)
+        self.assertGreater(depths[0], outside)  # The save, counters and job commit together
+        sql = [q['sql'] for q in ctx.captured_queries]
+        first_write = next(i for i, q in enumerate(sql) if q.startswith('UPDATE "LittleLemonAPI_order"'))
+        reads = [q for q in sql[:first_write] if q.startswith('SELECT') and 'FROM "LittleLemonAPI_order"' in q]
+        self.assertEqual(len(reads), 1)  # The serializer saves the row it locked, not an earlier copy
+
+    def test_dispatch_counts_assigned_orders(self):
+        Order.objects.create(user=self.customer, total=Decimal('8.00'))
+        self.client_for(self.manager).post('/api/orders/dispatch/', {}, format='json')
+        self.assertEqual(self.stats(self.crew)['open_deliveries'], 1)
+
+    def test_rebuild_verifies_and_repairs(self):
+        order = self.checkout()
+        Order.objects.filter(pk=order.pk).update(item_count=0)
+        Order.objects.create(user=self.customer, total=Decimal('4.00'), delivery_crew=self.crew)  # Skips the counters
+        with self.assertRaises(CommandError):
+            call_command('rebuild_order_counters', '--check', stdout=io.StringIO())
+        call_command('rebuild_order_counters', '--batch', '2', stdout=io.StringIO())
+        self.assertEqual(Order.objects.get(pk=order.pk).item_count, 5)
+        self.assertEqual(self.stats(self.customer)['order_count'], 2)
+        self.assertEqual(self.stats(self.crew)['open_deliveries'], 1)
+        call_command('rebuild_order_counters', '--check', stdout=io.StringIO())
+
+
+@override_settings(JOBS_MAX_ATTEMPTS=3, JOBS_RETRY_DELAY=10, JOBS_RETRY_MAX_DELAY=15)
+class JobQueueTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.calls = []
+        self.failures = 0
+        jobs.handlers['test.record'] = [self.record]
+        self.addCleanup(jobs.handlers.pop, 'test.record')
+
+    def record(self, payload):
+        self.calls.append(payload)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('boom')
+
+    def place_order(self):
+        Cart.objects.create(user=self.customer, menuitem=self.menuitems[0], quantity=1, unit_price=Decimal('5.50'), total_price=Decimal('5.50'))
+        response = self.client_for(self.customer).post('/api/orders/')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def test_enqueue_is_idempotent_by_key(self):
+        jobs.enqueue('test.record', {'n': 1}, key='k')
+        jobs.enqueue('test.record', {'n': 2}, key='k')
+        jobs.enqueue('test.record', {'n': 3})
+        self.assertEqual(jobs.Worker().run(once=True), 2)
+        self.assertEqual(self.calls, [{'n': 1}, {'n': 3}])
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.DONE})
+
+    def test_jobs_are_queued_with_the_order_and_its_status_changes(self):
+        order_id = self.place_order()
+        job = Job.objects.get()
+        self.assertEqual(job.name, 'order.placed')
+        self.assertEqual(job.payload, {'order': order_id, 'user': self.customer.id})
+        self.assertEqual(job.key, f'order.placed:{order_id}')
+        client = self.client_for(self.manager)
+        client.patch(f'/api/orders/{order_id}/', {'delivery_crew': self.crew.id}, format='json')
+        self.assertEqual(Job.objects.count(), 1)  # Not a status change
+        client.patch(f'/api/orders/{order_id}/', {'status': True}, format='json')
+        job = Job.objects.get(name='order.status_changed')
+        self.assertEqual(job.payload, {'order': order_id, 'status': True, 'delivery_crew': self.crew.id})
+
+    def test_failed_job_is_retried_with_backoff_then_marked_failed(self):
+        self.failures = 3
+        jobs.enqueue('test.record')
+        with self.assertLogs('LittleLemonAPI.jobs', 'ERROR'):
+            self.assertEqual(jobs.Worker().run(once=True), 1)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('boom', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        self.assertEqual(jobs.Worker().run(once=True), 0)  # Not due yet
+
+        for attempt in (2, 3):
+            Job.objects.update(run_at=timezone.now())
+            with self.assertLogs('LittleLemonAPI.jobs', 'ERROR'):
+                jobs.Worker().run(once=True)
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual((jobs.backoff(1), jobs.backoff(2)), (10, 15))
+
+    def test_expired_lease_is_claimed_again(self):
+        jobs.enqueue('test.record')
+        claimed = jobs.claim(10)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(jobs.claim(10), [])  # Leased
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = jobs.claim(10)
+        self.assertEqual([job.attempts for job in reclaimed], [2])
+        jobs.finish(claimed, {claimed[0].pk: None})  # The old owner lost the lease
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+        jobs.finish(reclaimed, {reclaimed[0].pk: None})
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_purge_keeps_failed_and_recent_jobs(self):
+        jobs.enqueue('test.record')
+        jobs.Worker().run(once=True)
+        self.assertEqual(jobs.purge(), 0)
+        Job.objects.create(name='test.record', status=Job.FAILED, finished=timezone.now() - timedelta(days=30))
+        Job.objects.filter(status=Job.DONE).update(finished=timezone.now() - timedelta(days=30))
+        self.assertEqual(jobs.purge(), 1)
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    @override_settings(ORDER_AUTO_DISPATCH=True)
+    def test_runworker_auto_dispatches_placed_orders(self):
+        order_id = self.place_order()
+        self.assertIsNone(Order.objects.get(pk=order_id).delivery_crew_id)
+        call_command('runworker', '--once', '--threads', '1', stdout=io.StringIO())
+        self.assertEqual(Order.objects.get(pk=order_id).delivery_crew_id, self.crew.id)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)  # Both paths render instead of sharing cached data
+class FastListTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        Order.objects.bulk_create([
+            Order(user=self.customer, total=Decimal('12.50') + i, item_count=i, status=i % 2 == 0,
+                  delivery_crew=self.crew if i % 3 else None)
+            for i in range(15)
+        ])
+        Cart.objects.bulk_create([
+            Cart(user=self.customer, menuitem=item, quantity=2, unit_price=item.price, total_price=item.price * 2)
+            for item in self.menuitems[:3]
+        ])
+
+    def both_paths(self, user, url):
+        """
+        The response body with the serializers and with the field plans, and how many pages the plans rendered.
+        """
+        client = self.client_for(user)
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            slow = client.get(url)
+        with override_settings(FAST_LIST_SERIALIZATION=True), \
+                mock.patch.object(FieldPlan, 'render', autospec=True, side_effect=FieldPlan.render) as render:
+            fast = client.get(url)
+        self.assertEqual(fast.status_code, slow.status_code)
+        return slow.content, fast.content, render.call_count
+
+    def test_lists_are_byte_identical(self):
+        cases = [
+            (self.customer, '/api/menu-items/'),
+            (self.customer, '/api/menu-items/?ordering=-price&page=2'),
+            (self.customer, '/api/menu-items/?search=dish&category=%d' % self.category.id),
+            (self.manager, '/api/orders/'),
+            (self.manager, '/api/orders/?fields=id,total,date&ordering=-total'),
+            (self.crew, '/api/orders/?status=true'),
+            (self.customer, '/api/cart/menu-items/'),
+        ]
+        for user, url in cases:
+            with self.subTest(url=url):
+                slow, fast, rendered = self.both_paths(user, url)
+                self.assertEqual(fast, slow)
+                self.assertEqual(rendered, 1)
+
+    def test_instances_are_used_where_the_plan_cannot_render(self):
+        for url in ('/api/orders/?expand=items', '/api/orders/?pagination=keyset'):
+            with self.subTest(url=url):
+                slow, fast, rendered = self.both_paths(self.manager, url)
+                self.assertEqual(fast, slow)
+                self.assertEqual(rendered, 0)
+
+    def test_off_unless_opted_in(self):
+        client = self.client_for(self.manager)
+        with mock.patch.object(FieldPlan, 'render', autospec=True, side_effect=FieldPlan.render) as render:
+            client.get('/api/orders/')
+            self.assertEqual(render.call_count, 0)
+            with mock.patch.object(OrderViewSet, 'fast_list_serialization', True):
+                client.get('/api/orders/')
+            self.assertEqual(render.call_count, 1)
+        with override_settings(FAST_LIST_SERIALIZATION=True), mock.patch.object(OrderViewSet, 'fast_list_serialization', False), \
+                mock.patch.object(FieldPlan, 'render') as render:
+            client.get('/api/orders/')
+        render.assert_not_called()
+
+
+@override_settings(CATALOG_CACHE_TIMEOUT=0)  # Both paths render instead of sharing cached data
+class AsyncReadTests(LittleLemonTestCase):
+    """
+    The async read views must answer exactly like the sync ones. The async ORM raises
+    SynchronousOnlyOperation if any sync query slips into the async path.
+    """
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        for i in range(12):
+            order = Order.objects.create(user=self.customer, total=Decimal(10 + i % 3))
+            OrderItem.objects.create(order=order, menuitem=self.menuitems[i], quantity=1,
+                                     unit_price=self.menuitems[i].price, total_price=self.menuitems[i].price)
+        Order.objects.create(user=self.manager, total=Decimal('8.00'))
+        self.tokens = {user.pk: Token.objects.get_or_create(user=user)[0].key for user in (self.customer, self.manager)}
+
+    def views(self, viewset, actions, **initkwargs):
+        with override_settings(ASYNC_READ_VIEWS=False):
+            sync_view = viewset.as_view(dict(actions), **initkwargs)
+        with override_settings(ASYNC_READ_VIEWS=True):
+            async_view = viewset.as_view(dict(actions), **initkwargs)
+        self.assertTrue(asyncio.iscoroutinefunction(async_view))
+        return sync_view, async_view
+
+    async def compare(self, views, user, path, method='get', **kwargs):
+        sync_view, async_view = views
+        headers = {'Authorization': f'Token {self.tokens[user.pk]}'} if user else {}
+        make = getattr(self.factory, method)
+        sync_response = await sync_to_async(sync_view)(make(path, headers=headers), **kwargs)
+        token_cache.clear()  # The async path authenticates and resolves roles with its own queries
+        cache.clear()
+        async_response = await async_view(make(path, headers=headers), **kwargs)
+        for response in (sync_response, async_response):
+            if hasattr(response, 'render'):
+                response.render()
+        self.assertEqual(async_response.status_code, sync_response.status_code, path)
+        self.assertEqual(async_response.content, sync_response.content, path)
+        self.assertEqual(dict(async_response.headers), dict(sync_response.headers), path)
+        return async_response
+
+    async def test_menu_items_match_sync(self):
+        views = self.views(MenuItemViewSet, {'get': 'list'}, basename='menuitem', detail=False)
+        for path in ['/api/menu-items/', '/api/menu-items/?page=2', f'/api/menu-items/?category={self.category.pk}',
+                     '/api/menu-items/?category=999', '/api/menu-items/?search=Dish%201&ordering=-price',
+                     '/api/menu-items/?page=9']:
+            await self.compare(views, self.customer, path)
+        await self.compare(views, None, '/api/menu-items/')
+        response = await self.compare(views, self.customer, '/api/menu-items/', 'head')
+        self.assertEqual(response.status_code, 200)
+
+        views = self.views(MenuItemViewSet, {'get': 'retrieve', 'delete': 'destroy'}, basename='menuitem', detail=True)
+        await self.compare(views, self.customer, '/api/menu-items/1/', pk=self.menuitems[0].pk)
+        await self.compare(views, self.customer, '/api/menu-items/999/', pk='999')
+        await self.compare(views, self.customer, '/api/menu-items/x/', pk='x')
+        response = await self.compare(views, self.customer, '/api/menu-items/1/', 'delete', pk=self.menuitems[0].pk)
+        self.assertEqual(response.status_code, 403)  # Writes still go through the sync view
+
+    async def test_categories_match_sync(self):
+        views = self.views(CategoryViewSet, {'get': 'list'}, basename='category', detail=False)
+        response = await self.compare(views, self.customer, '/api/categories/')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_orders_match_sync(self):
+        views = self.views(OrderViewSet, {'get': 'list'}, basename='order', detail=False)
+        for user in (self.customer, self.manager):
+            for path in ['/api/orders/', '/api/orders/?page=2', '/api/orders/?expand=items&ordering=total',
+                         '/api/orders/?pagination=keyset&ordering=-total', '/api/orders/?fields=id,total',
+                         '/api/orders/?status=true', '/api/orders/?cursor=bad']:
+                await self.compare(views, user, path)
+        response = await self.compare(views, self.customer, '/api/orders/')
+        self.assertEqual(response.data['count'], 12)
+
+    @override_settings(ROLE_CACHE_TIMEOUT=60, TOKEN_CACHE_TIMEOUT=60, DEFAULT_CACHE_SHARED=True, REPLICA_DATABASE_ALIAS='default')
+    async def test_cache_and_throttle_calls_stay_off_the_event_loop(self):
+        on_loop = []
+
+        def watch(cls, name):
+            original = getattr(cls, name)
+
+            def spy(*args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    on_loop.append(f'{cls.__name__}.{name}')
+                except RuntimeError:  # Called from a thread, not the loop
+                    pass
+                return original(*args, **kwargs)
+            return mock.patch.object(cls, name, spy)
+
+        with override_settings(ASYNC_READ_VIEWS=True):
+            menu = MenuItemViewSet.as_view({'get': 'list'}, basename='menuitem', detail=False)
+            orders = OrderViewSet.as_view({'get': 'list'}, basename='order', detail=False)
+        headers = {'Authorization': f'Token {self.tokens[self.customer.pk]}'}
+        with watch(LocMemCache, 'get'), watch(LocMemCache, 'set'), watch(LocMemCache, 'add'), watch(throttling.CacheCounterStore, 'incr'):
+            for _ in range(2):  # Cold, then served from the token, role and catalog caches
+                self.assertEqual((await menu(self.factory.get('/api/menu-items/', headers=headers))).status_code, 200)
+                self.assertEqual((await orders(self.factory.get('/api/orders/?expand=items', headers=headers))).status_code, 200)
+        self.assertEqual(on_loop, [])
+
+
+@override_settings(ORDER_EVENTS_QUEUE_SIZE=10, ORDER_EVENTS_HEARTBEAT=0.05, ROLE_CACHE_TIMEOUT=60)
+class OrderEventsTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        order_events._load_broker.cache_clear()  # A fresh LocalBroker per test
+        self.factory = AsyncRequestFactory()
+        self.responses = []
+        self.customer2 = User.objects.create_user('customer2')
+        self.tokens = {
+            user.pk: Token.objects.get_or_create(user=user)[0].key
+            for user in (self.manager, self.crew, self.customer, self.customer2)
+        }
+        with override_settings(ASYNC_READ_VIEWS=True):
+            self.view = OrderViewSet.as_view({'get': 'events'}, basename='order', detail=False, **OrderViewSet.events.kwargs)
+
+    async def open(self, user):
+        request = self.factory.get('/api/orders/events/', headers={
+            'Authorization': f'Token {self.tokens[user.pk]}', 'Accept': 'text/event-stream',
+        })
+        response = await self.view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.responses.append(response)
+        self.addCleanup(response.close)
+        stream = response.streaming_content
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        return stream
+
+    async def next_event(self, stream):
+        while (chunk := await asyncio.wait_for(anext(stream), 1)).startswith(b':'):
+            continue  # Keep-alive
+        kind, data = chunk.decode().split('\n')[1:3]
+        return kind.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+    def publish(self, kind, order, previous_crew_id=None):
+        order_events.get_broker().publish(order_events.order_event(kind, order, previous_crew_id))
+
+    async def test_events_are_scoped_like_the_order_list(self):
+        streams = {user.username: await self.open(user) for user in (self.manager, self.crew, self.customer, self.customer2)}
+        order = await Order.objects.acreate(user=self.customer, total=Decimal('9.00'), delivery_crew=self.crew)
+        self.publish('order.updated', order)
+        for name in ('manager', 'crew', 'customer'):
+            kind, event = await self.next_event(streams[name])
+            self.assertEqual((kind, event['order']['id']), ('order.updated', order.id))
+        broker = order_events.get_broker()
+        self.assertTrue(all(sub.queue.empty() for sub in broker.subscribers[f'user:{self.customer2.pk}']))
+
+        # The crew member the order was taken from hears about it too
+        crew2 = await User.objects.acreate(username='crew2')
+        order.delivery_crew = crew2
+        self.publish('order.updated', order, previous_crew_id=self.crew.pk)
+        kind, event = await self.next_event(streams['crew'])
+        self.assertEqual(event['previous_delivery_crew'], self.crew.pk)
+
+    async def test_many_subscribers_with_bounded_memory(self):
+        subscribers = 200
+        with mock.patch.object(OrderViewSet, 'get_throttles', lambda view: []):  # One user opens them all
+            streams = [await self.open(self.manager) for _ in range(subscribers)]
+        broker = order_events.get_broker()
+        self.assertEqual(broker.count, subscribers)
+        order = await Order.objects.acreate(user=self.customer, total=Decimal('9.00'))
+
+        # Nobody reads: each queue fills up to ORDER_EVENTS_QUEUE_SIZE and further events are dropped
+        for _ in range(10):
+            self.publish('order.updated', order)
+        await asyncio.sleep(0)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(500):
+            self.publish('order.updated', order)
+            await asyncio.sleep(0)
+        growth = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        self.assertLess(growth, 256 * 1024)  # 100,000 deliveries retain nothing past the queues
+        self.assertTrue(all(sub.queue.qsize() == 10 for sub in broker.subscribers['all']))
+
+        kind, _ = await self.next_event(streams[0])
+        self.assertEqual(kind, 'resync')  # The client refetches instead of replaying what it missed
+        self.publish('order.created', order)
+        kind, _ = await self.next_event(streams[0])
+        self.assertEqual(kind, 'order.created')
+
+        for response in self.responses:
+            response.close()  # What the ASGI handler does when a client disconnects
+        self.assertEqual(broker.count, 0)
+
+    @override_settings(ORDER_EVENTS_MAX_SUBSCRIBERS=2)
+    async def test_subscriber_limit(self):
+        await self.open(self.manager)
+        await self.open(self.crew)
+        request = self.factory.get('/api/orders/events/', headers={'Authorization': f'Token {self.tokens[self.customer.pk]}'})
+        response = await self.view(request)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+
+    async def test_stream_requires_authentication(self):
+        response = await self.view(self.factory.get('/api/orders/events/', headers={'Accept': 'text/event-stream'}))
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response.render().content.startswith(b'event: error'))
+
+    def test_sync_view_explains_asgi_is_needed(self):
+        response = self.client_for(self.customer).get('/api/orders/events/')
+        self.assertEqual(response.status_code, 501)
+
+    def test_checkout_update_and_dispatch_publish_on_commit(self):
+        published = []
+        with mock.patch.object(order_events.LocalBroker, 'publish', lambda broker, event: published.append(event)):
+            Cart.objects.create(user=self.customer, menuitem=self.menuitems[0], quantity=1,
+                                unit_price=Decimal('5.50'), total_price=Decimal('5.50'))
+            with self.captureOnCommitCallbacks(execute=True):
+                order_id = self.client_for(self.customer).post('/api/orders/').data['id']
+            self.assertEqual([(e['type'], e['order']['id']) for e in published], [('order.created', order_id)])
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client_for(self.manager).post('/api/orders/dispatch/', {}, format='json')
+            self.assertEqual(published[-1]['order']['delivery_crew'], self.crew.pk)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client_for(self.crew).patch(f'/api/orders/{order_id}/', {'status': True}, format='json')
+            self.assertEqual((published[-1]['type'], published[-1]['order']['status']), ('order.updated', True))
+            self.assertEqual(len(published), 3)
+
+    def test_broker_errors_do_not_fail_committed_writes(self):
+        Cart.objects.create(user=self.customer, menuitem=self.menuitems[0], quantity=1,
+                            unit_price=Decimal('5.50'), total_price=Decimal('5.50'))
+        with mock.patch.object(order_events.LocalBroker, 'publish', side_effect=ConnectionError):
+            with self.assertLogs('django', 'ERROR'), self.captureOnCommitCallbacks(execute=True):
+                response = self.client_for(self.customer).post('/api/orders/')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Order.objects.filter(pk=response.data['id']).exists())
+
+    def test_listener_skips_bad_messages(self):
+        class Stop(Exception):
+            pass
+
+        def listen():
+            yield {'data': b'not json'}
+            yield {'data': json.dumps(order_events.order_event('order.created', Order(pk=1, user_id=self.customer.pk, total=1)))}
+            raise Stop
+        broker = order_events.RedisBroker.__new__(order_events.RedisBroker)
+        order_events.LocalBroker.__init__(broker)
+        broker.redis = mock.Mock(RedisError=OSError)
+        broker.client = mock.Mock(**{'pubsub.return_value.listen': listen})
+        with mock.patch.object(broker, 'deliver', wraps=broker.deliver) as deliver:
+            with self.assertLogs('LittleLemonAPI.order_events', 'ERROR'), self.assertRaises(Stop):
+                broker.listen()
+        self.assertEqual(deliver.call_count, 1)  # The bad message never reached deliver()
+
+
+# The test database has no replica alias, so 'default' stands in and the router's choices are recorded
+@override_settings(REPLICA_DATABASE_ALIAS='default')
+class ReplicaRoutingTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        Order.objects.create(user=self.customer, total=Decimal('10.00'))
+
+    def routed_reads(self, call):
+        """
+        Call and return (response, {model: aliases the router picked}); None is the primary.
+        """
+        reads = {}
+        db_for_read = ReplicaRouter.db_for_read
+
+        def spy(router, model, **hints):
+            alias = db_for_read(router, model, **hints)
+            reads.setdefault(model, set()).add(alias)
+            return alias
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', spy):
+            response = call()
+        return response, reads
+
+    def test_catalog_and_order_history_read_the_replica(self):
+        client = self.client_for(self.customer)
+        response, reads = self.routed_reads(lambda: client.get('/api/menu-items/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(reads[MenuItem], {'default'})
+        self.assertEqual(reads[Token], {None})  # Authentication reads the primary
+        _, reads = self.routed_reads(lambda: client.get('/api/orders/'))
+        self.assertEqual(reads[Order], {'default'})
+        _, reads = self.routed_reads(lambda: client.get('/api/cart/menu-items/'))
+        self.assertEqual(reads[Cart], {None})
+
+    def test_writer_reads_the_primary_right_after_writing(self):
+        client = self.client_for(self.customer)
+        response = client.post('/api/cart/menu-items/batch/', {'lines': [{'menuitem': self.menuitems[0].id, 'quantity': 1}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        cache.clear()  # The next request is served by another worker, with its own memory
+        _, reads = self.routed_reads(lambda: client.get('/api/orders/'))
+        self.assertEqual(reads[Order], {None})
+        _, reads = self.routed_reads(lambda: self.client_for(self.manager).get('/api/orders/'))
+        self.assertEqual(reads[Order], {'default'})
+        client.cookies['littlelemon_primary'] = client.cookies['littlelemon_primary'].value.replace(str(self.customer.pk), '0', 1)
+        _, reads = self.routed_reads(lambda: client.get('/api/orders/'))
+        self.assertEqual(reads[Order], {'default'})  # A tampered pin is ignored
+
+    def test_catalog_reads_the_primary_right_after_a_change(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(slug='drinks', title='Drinks')
+        _, reads = self.routed_reads(lambda: self.client_for(self.customer).get('/api/categories/'))
+        self.assertEqual(reads[Category], {None})
+
+
+class MenuSearchTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.salads = Category.objects.create(slug='salads', title='Salads')
+        self.greek = MenuItem.objects.create(title='Greek Salad', price=Decimal('9.00'), featured=False, category=self.category)
+        self.green = MenuItem.objects.create(title='Green Curry', price=Decimal('12.00'), featured=False, category=self.category)
+        self.caesar = MenuItem.objects.create(title='Caesar', price=Decimal('8.00'), featured=False, category=self.salads)
+        self.client = self.client_for(self.customer)
+
+    def search(self, query):
+        caches['catalog'].clear()
+        response = self.client.get(f'/api/menu-items/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [item['title'] for item in response.data['results']]
+
+    def test_every_word_matches_a_prefix(self):
+        self.assertEqual(self.search('search=gre'), ['Greek Salad', 'Green Curry'])
+        self.assertEqual(self.search('search=sal gre'), ['Greek Salad'])
+        self.assertEqual(self.search('search=reek'), [])  # Prefixes, not substrings
+
+    def test_category_title_is_matched_on_request_and_ranked_below_titles(self):
+        self.assertEqual(self.search('search=salad'), ['Greek Salad'])
+        self.assertEqual(self.search('search=salad&search_category=true'), ['Greek Salad', 'Caesar'])
+
+    def test_explicit_ordering_wins_over_relevance(self):
+        self.assertEqual(self.search('search=gre&ordering=-price'), ['Green Curry', 'Greek Salad'])
+
+    def test_search_uses_the_index_not_like(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.search('search=gre')
+        self.assertFalse([q for q in ctx.captured_queries if 'LIKE' in q['sql']])
+
+    def test_index_follows_menu_item_and_category_changes(self):
+        self.greek.title = 'Horiatiki'
+        self.greek.save()
+        self.assertEqual(self.search('search=greek'), [])
+        self.assertEqual(self.search('search=hori'), ['Horiatiki'])
+        self.green.delete()
+        self.assertEqual(self.search('search=green'), [])
+        self.salads.title = 'Bowls'
+        self.salads.save()
+        self.assertEqual(self.search('search=bowl&search_category=1'), ['Caesar'])
+
+
+class MenuImportTests(LittleLemonTestCase):
+    def post_bulk(self, items, user=None):
+        client = self.client_for(user or self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = client.post('/api/menu-items/bulk/', {'items': items}, format='json')
+        return response, len(ctx.captured_queries), callbacks
+
+    def new_rows(self, count):
+        return [
+            {'title': f'Import {i}', 'price': '4.25', 'featured': i % 2 == 0, 'category': self.category.id}
+            for i in range(count)
+        ]
+
+    def test_creates_and_updates_in_one_request(self):
+        rows = self.new_rows(2) + [{'id': self.menuitems[0].id, 'price': '7.00'}]
+        response, _, _ = self.post_bulk(rows)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated']), (2, 1))
+        created = MenuItem.objects.get(id=response.data['ids'][0])
+        self.assertEqual((created.title, created.price, created.featured), ('Import 0', Decimal('4.25'), True))
+        self.assertEqual(response.data['ids'][2], self.menuitems[0].id)
+        updated = MenuItem.objects.get(id=self.menuitems[0].id)
+        self.assertEqual((updated.title, updated.price), ('Dish 0', Decimal('7.00')))
+
+    def test_errors_are_reported_per_row_and_nothing_is_written(self):
+        rows = [
+            {'title': 'Fine', 'price': '1.00', 'featured': False, 'category': self.category.id},
+            {'title': 'No category', 'price': '1.00', 'featured': False, 'category': 9999},
+            {'id': 9999, 'price': '1.00'},
+            {'title': 'Missing fields'},
+            {'id': self.menuitems[0].id, 'price': '-1'},
+        ]
+        before = MenuItem.objects.count()
+        response, _, callbacks = self.post_bulk(rows)
+        self.assertEqual(response.status_code, 400)
+        errors = response.data['items']
+        self.assertEqual(errors[0], {})
+        self.assertIn('category', errors[1])
+        self.assertIn('id', errors[2])
+        self.assertEqual(set(errors[3]), {'price', 'featured', 'category'})
+        self.assertIn('price', errors[4])
+        self.assertEqual(MenuItem.objects.count(), before)
+        self.assertEqual(callbacks, [])
+
+    def test_duplicate_ids_are_rejected(self):
+        response, _, _ = self.post_bulk([{'id': self.menuitems[0].id, 'price': '1.00'}] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['items'][0], {})
+        self.assertIn('id', response.data['items'][1])
+
+    @override_settings(ROLE_CACHE_TIMEOUT=0, TOKEN_CACHE_TIMEOUT=0)
+    def test_query_count_independent_of_row_count(self):
+        update = lambda items, price: [{'id': item.id, 'price': price} for item in items]
+        _, small, _ = self.post_bulk(self.new_rows(1) + update(self.menuitems[:1], '3.00'))
+        _, large, _ = self.post_bulk(self.new_rows(30) + update(self.menuitems, '3.50'))
+        self.assertEqual(small, large)
+
+    def test_catalog_is_invalidated_once_and_search_index_updated(self):
+        version = catalog_cache.get_version()
+        response, _, callbacks = self.post_bulk(self.new_rows(5) + [{'id': self.menuitems[0].id, 'title': 'Renamed'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(catalog_cache.get_version(), version)
+        response = self.client_for(self.customer).get('/api/menu-items/?search=renamed')
+        self.assertEqual([item['id'] for item in response.data['results']], [self.menuitems[0].id])
+        response = self.client_for(self.customer).get('/api/menu-items/?search=import')
+        self.assertEqual(response.data['count'], 5)
+
+    def test_only_managers_can_import(self):
+        for user in (self.crew, self.customer):
+            response, _, _ = self.post_bulk(self.new_rows(1), user)
+            self.assertEqual(response.status_code, 403)
+
+    def test_command_imports_csv_and_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'menu.csv'
+            with open(path, 'w', newline='') as file:
+                writer = csv.DictWriter(file, ['id', 'title', 'price', 'featured', 'category'])
+                writer.writeheader()
+                writer.writerow({'title': 'From CSV', 'price': '6.00', 'featured': 'true', 'category': self.category.id})
+                writer.writerow({'id': self.menuitems[1].id, 'price': '8.00'})  # Empty cells are left alone
+            call_command('import_menu', str(path), stdout=io.StringIO())
+            self.assertTrue(MenuItem.objects.filter(title='From CSV', featured=True).exists())
+            self.assertEqual(MenuItem.objects.get(id=self.menuitems[1].id).title, 'Dish 1')
+            self.assertEqual(MenuItem.objects.get(id=self.menuitems[1].id).price, Decimal('8.00'))
+
+            path = Path(directory) / 'menu.json'
+            path.write_text(json.dumps({'items': [{'id': self.menuitems[2].id, 'featured': True}, {'id': 9999}]}))
+            stderr = io.StringIO()
+            with self.assertRaises(CommandError):
+                call_command('import_menu', str(path), stdout=io.StringIO(), stderr=stderr)
+            self.assertIn('row 2: id', stderr.getvalue())
+            self.assertFalse(MenuItem.objects.get(id=self.menuitems[2].id).featured)
+
+
+@override_settings(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_DUMP_DIR=None, ROLE_CACHE_TIMEOUT=0)
+class InstrumentationTests(LittleLemonTestCase):
+    def setUp(self):
+        super().setUp()
+        instrumentation.registry.reset()
+
+    def test_records_queries_and_timings_per_view_action(self):
+        client = self.client_for(self.customer)
+        with CaptureQueriesContext(connection) as ctx:
+            client.get('/api/orders/?expand=items')
+        queries = len(ctx.captured_queries)
+        client.get('/api/orders/summary/')
+        report = instrumentation.registry.snapshot()
+        self.assertEqual(set(report), {'OrderViewSet.list', 'OrderViewSet.summary'})
+        listing = report['OrderViewSet.list']
+        self.assertEqual(listing['count'], 1)
+        self.assertEqual(listing['queries']['max'], queries)
+        self.assertGreater(listing['serializer_ms']['max'], 0)
+        self.assertGreaterEqual(listing['wall_ms']['p50'], listing['db_ms']['p50'])
+
+    def test_slow_queries_are_logged_with_the_view(self):
+        with override_settings(INSTRUMENTATION_SLOW_QUERY_MS=0):
+            with self.assertLogs('LittleLemonAPI.instrumentation', level='WARNING') as logs:
+                self.client_for(self.customer).get('/api/cart/menu-items/')
+        self.assertIn('cartView.get', logs.output[0])
+
+    def test_report_endpoint_is_admin_only(self):
+        self.assertEqual(self.client_for(self.manager).get('/api/instrumentation/').status_code, 403)
+        admin = User.objects.create_user('admin', password='pass', is_staff=True)
+        response = self.client_for(admin).get('/api/instrumentation/')
+        self.assertEqual(response.status_code, 200)
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_pragmas_and_persistent_connections(self):
+        if connection.vendor != 'sqlite' or not settings.DATABASE_TUNING:
+            self.skipTest('Tuned SQLite profile only')
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_BUSY_TIMEOUT * 1000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -settings.SQLITE_CACHE_SIZE)
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], settings.DATABASE_CONN_MAX_AGE)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+
+@local_stores
+class BenchmarkSuiteTests(TestCase):
+    def test_suite_runs_every_endpoint_and_detects_regressions(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output = Path(directory) / 'results.json'
+            call_command('run_benchmarks', '--seed', '--orders', '20', '--repeat', '1', '--output', str(output), stdout=io.StringIO())
+            results = json.loads(output.read_text())['endpoints']
+            for name in ('auth.token_login', 'orders.create', 'menu-items.bulk', 'orders.events',
+                         'groups.manager.add_many', 'groups.delivery_crew.remove_many'):
+                self.assertIn(name, results)
+
+            for result in results.values():
+                result['queries'] = 0
+            output.write_text(json.dumps({'endpoints': results}))
+            with self.assertRaises(CommandError):
+                call_command('run_benchmarks', '--seed', '--orders', '20', '--repeat', '1', '--only', 'orders.list',
+                             '--baseline', str(output), stdout=io.StringIO())
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework import throttling
+from rest_framework.settings import api_settings
+
+
+class CacheCounterStore:
+    """
+    Fixed-window counters in a Django cache (THROTTLE_CACHE_ALIAS).
+    - add() + incr() are atomic on Redis and Memcached, so a shared cache enforces limits across workers.
+    - Local memory only counts within one process; use it for development and tests.
+    """
+    def __init__(self, alias=None):
+        self.alias = alias or settings.THROTTLE_CACHE_ALIAS
+
+    def incr(self, key, timeout):
+        cache = caches[self.alias]
+        if cache.add(key, 1, timeout):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:  # Expired between add() and incr()
+            cache.add(key, 0, timeout)
+            return cache.incr(key)
+
+    def clear(self):
+        caches[self.alias].clear()
+
+
+class SQLiteCounterStore:
+    """
+    Fixed-window counters in a SQLite file (THROTTLE_SQLITE_PATH) shared by every worker on the host.
+    - Each increment is a single UPSERT ... RETURNING, serialized by SQLite's write lock.
+    - Expired windows are pruned every PRUNE_EVERY increments per process.
+    """
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.THROTTLE_SQLITE_PATH)
+        self.local = threading.local()
+        self.increments = 0
+
+    def connection(self):
+        conn = getattr(self.local, 'connection', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')  # Counters may lose the last writes on power loss, never consistency
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS throttle_counter '
+                '(key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires REAL NOT NULL)'
+            )
+            self.local.connection = conn
+        return conn
+
+    def incr(self, key, timeout):
+        now = time.time()
+        conn = self.connection()
+        (count,), = conn.execute(
+            'INSERT INTO throttle_counter (key, count, expires) VALUES (?, 1, ?) '
+            'ON CONFLICT (key) DO UPDATE SET count = count + 1 RETURNING count',
+            (key, now + timeout),
+        ).fetchall()  # Exhaust the cursor so the statement commits
+        self.increments += 1
+        if self.increments % self.PRUNE_EVERY == 0:
+            conn.execute('DELETE FROM throttle_counter WHERE expires < ?', (now,))
+        return count
+
+    def clear(self):
+        self.connection().execute('DELETE FROM throttle_counter')
+
+
+@lru_cache(maxsize=None)
+def _load_store(path):
+    return import_string(path)()
+
+def get_store():
+    """
+    The process-wide counter store named by THROTTLE_STORE.
+    """
+    return _load_store(settings.THROTTLE_STORE)
+
+
+class SharedCounterMixin:
+    """
+    Replaces SimpleRateThrottle's per-key timestamp history with one fixed-window counter:
+    - one O(1) increment per check instead of rewriting a growing list;
+    - counters live in the shared store, so a limit holds across all worker processes.
+    """
+    @property
+    def THROTTLE_RATES(self):
+        return api_settings.DEFAULT_THROTTLE_RATES  # Read per check so rate changes apply without a reload
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        self.window_end = (window + 1) * self.duration
+        count = get_store().incr(f'{self.key}:{window}', self.duration)
+        return count <= self.num_requests
+
+    def wait(self):
+        return max(0, self.window_end - self.now)
+
+
+class SharedAnonRateThrottle(SharedCounterMixin, throttling.AnonRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(SharedCounterMixin, throttling.UserRateThrottle):
+    pass
+
+
+class EndpointRateThrottle(SharedCounterMixin, throttling.ScopedRateThrottle):
+    """
+    Per-endpoint limits on top of the global anon/user rates.
+    A view with throttle_scope = 'orders' is limited by the 'orders.<action>' rate
+    (the HTTP method for plain APIViews, e.g. 'cart.post'), else by the 'orders' rate.
+    Endpoints with neither rate configured are not limited here.
+    """
+    def allow_request(self, request, view):
+        base = getattr(view, self.scope_attr, None)
+        if not base:
+            return True
+        action = getattr(view, 'action', None) or request.method.lower()
+        for scope in (f'{base}.{action}', base):
+            if scope in self.THROTTLE_RATES:
+                self.scope = scope
+                self.rate = self.THROTTLE_RATES[scope]
+                self.num_requests, self.duration = self.parse_rate(self.rate)
+                return super().allow_request(request, view)
+        return True
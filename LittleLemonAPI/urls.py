@@ -4,9 +4,13 @@ from .views import (
     MenuItemViewSet,
     CategoryViewSet,
     cartView,
+    CartBatchView,
+    CartSummaryView,
     OrderViewSet,
     ManagerGroupview,
     DeliveryCrewGroup,
+    CatalogCacheStatsView,
+    InstrumentationView,
 )
 
 # Create a router for ViewSets
@@ -24,6 +28,8 @@ urlpatterns = [
 
     # Cart endpoints
     path('cart/menu-items/', cartView.as_view(), name='cart'),
+    path('cart/menu-items/batch/', CartBatchView.as_view(), name='cart-batch'),
+    path('cart/summary/', CartSummaryView.as_view(), name='cart-summary'),
 
     # Manager group endpoints
     path('groups/manager/users/', ManagerGroupview.as_view(), name='manager-group'),
@@ -32,4 +38,10 @@ urlpatterns = [
     # Delivery Crew group endpoints
     path('groups/delivery-crew/users/', DeliveryCrewGroup.as_view(), name='delivery-crew-group'),
     path('groups/delivery-crew/users/<int:userId>/', DeliveryCrewGroup.as_view(), name='delivery-crew-group-detail'),
+
+    # Catalog cache statistics
+    path('catalog/cache-stats/', CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
+
+    # Request instrumentation
+    path('instrumentation/', InstrumentationView.as_view(), name='instrumentation'),
 ]
\ No newline at end of file
@@ -1,31 +1,64 @@
+from django.conf import settings
 from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch, Q
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, generics, status
-from rest_framework.decorators import APIView
+from rest_framework.decorators import APIView, action
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.settings import api_settings
 from .models import *
 from .serializers import *
 from .permissions import *
+from .catalog_cache import CatalogCacheMixin, aget_version, get_version, request_signature, stats as catalog_cache_stats
+from .cart import update_cart
+from .checkout import place_order
+from .counters import order_changed, order_deleted
+from .dispatch import dispatch
+from .exports import CONTENT_TYPES, stream_orders
+from .idempotency import IdempotentCreateMixin
+from .menu_import import import_menu_items
+from .order_events import ORDER_UPDATED, EventStream, EventStreamRenderer, SubscriberLimit, get_broker, publish_on_commit
+from .instrumentation import registry as instrumentation_registry
+from .conditional import CatalogConditionalMixin, QuerysetConditionalMixin
+from .async_views import AsyncReadMixin
+from .fast_lists import ValuesListMixin
+from .db_router import ReplicaRoutingMixin
+from .pagination import OrderPagination
+from .search import MenuSearchFilter
+from .summaries import ORDER_GROUPS, cart_summary, order_summary
+from .tasks import queue_status_changed
+from .roles import MANAGER, DELIVERY_CREW, get_group_id, is_manager_or_admin, is_delivery_crew, order_scope, reset_group_ids
 
 # ViewSet for Menu Items
-class MenuItemViewSet(viewsets.ModelViewSet):
+class MenuItemViewSet(CatalogConditionalMixin, CatalogCacheMixin, ReplicaRoutingMixin, ValuesListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     Handles CRUD operations for Menu Items.
     - Managers and Admins can create, update, and delete menu items.
     - All authenticated users can view menu items.
     - Supports filtering by category, price, and featured status.
     - Supports sorting by price and title.
-    - Supports searching by title.
+    - Supports full-text prefix search by title, and optionally category title, ranked by relevance.
+    - List and detail responses are served from the versioned catalog cache.
+    - Conditional GETs (If-None-Match / If-Modified-Since) return 304 without serializing.
+    - List and detail run as native async views under ASGI.
+    - List and detail read from the replica when one is configured.
+    - List pages are rendered from values_list() rows without model instances.
+    - Managers and Admins can create and update menu items in bulk (POST menu-items/bulk).
     """
     queryset = MenuItem.objects.all()
     serializer_class = MenuItemSerializer
-    filter_backends = [DjangoFilterBackend, OrderingFilter, SearchFilter] # Enable filtering, ordering, and searching
+    filter_backends = [DjangoFilterBackend, OrderingFilter, MenuSearchFilter] # Enable filtering, ordering, and searching
     filterset_fields = ['category', 'price', 'featured'] # Fields to filter by
     ordering_fields = ['price', 'title'] # Fields to sort by
-    search_fields = ['title'] # Fields to search by
+    throttle_scope = 'menu-items' # Per-endpoint rates 'menu-items.<action>'
+    replica_actions = ('list', 'retrieve') # Read from the replica when configured
 
     def get_permissions(self):
         """
@@ -33,21 +66,40 @@ class MenuItemViewSet(viewsets.ModelViewSet):
         - Only Managers and Admins can create, update, or delete menu items.
         - All authenticated users can view menu items.
         """
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk']:
             permission_classes = [IsManager | IsAdminUser] # Restrict to Managers and Admins
         else:
             permission_classes = [IsAuthenticated] # Allow all authenticated users
         return [permission() for permission in permission_classes]
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create and update many menu items at once:
+        - 'items' is a list of rows; rows with an id update that item, the others create one.
+        - All rows are validated before anything is written; errors are returned per row.
+        - The catalog cache is invalidated once for the whole import.
+        """
+        serializer = MenuImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(import_menu_items(serializer.validated_data['items']))
+
 # ViewSet for Categories
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CatalogConditionalMixin, CatalogCacheMixin, ReplicaRoutingMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     Handles CRUD operations for Categories.
     - Managers and Admins can create, update, and delete categories.
     - All authenticated users can view categories.
+    - List and detail responses are served from the versioned catalog cache.
+    - Conditional GETs (If-None-Match / If-Modified-Since) return 304 without serializing.
+    - The list runs as a native async view under ASGI.
+    - List and detail read from the replica when one is configured.
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    async_actions = ('list',)
+    replica_actions = ('list', 'retrieve') # Read from the replica when configured
+    throttle_scope = 'categories' # Per-endpoint rates 'categories.<action>'
     def get_permissions(self):
         """
         Customize permissions based on the action:
@@ -61,14 +113,18 @@ class CategoryViewSet(viewsets.ModelViewSet):
         return [permission() for permission in permission_classes]
 
 # View for Cart operations
-class cartView(generics.ListCreateAPIView, generics.DestroyAPIView):
+class cartView(IdempotentCreateMixin, ReplicaRoutingMixin, ValuesListMixin, generics.ListCreateAPIView, generics.DestroyAPIView):
     """
     Handles operations for the user's shopping cart:
     - Customers can view, add, and delete items in their cart.
     - Automatically calculates unit_price and total_price when adding items.
+    - Changes pin the customer's reads to the primary database for a moment.
+    - The list is rendered from values_list() rows without model instances.
+    - Adds sent with an Idempotency-Key header run once; retries get the first response back.
     """
     serializer_class = CartSerializer
     permission_classes = [IsCustomer] # Only customers can access the cart
+    throttle_scope = 'cart' # Per-endpoint rates 'cart.<method>'
 
     def get_queryset(self):
         """
@@ -81,12 +137,17 @@ class cartView(generics.ListCreateAPIView, generics.DestroyAPIView):
         Custom logic for adding items to the cart:
         - Calculate unit_price and total_price based on the menu item's price and quantity.
         - Automatically set the user to the current user.
+        - Adding an item that is already in the cart is a 400, not a database error.
         """
         menuitem = serializer.validated_data['menuitem']
         quantity = serializer.validated_data['quantity']
         unit_price = menuitem.price
         total_price = quantity * unit_price
-        serializer.save(user=self.request.user, unit_price=unit_price, total_price=total_price)
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user, unit_price=unit_price, total_price=total_price)
+        except IntegrityError: # unique_together: the item is already in the cart
+            raise ValidationError({'menuitem': ['This item is already in the cart; use the batch endpoint to change its quantity.']})
     
     def delete(self, request, *args, **kwargs):
         """
@@ -95,21 +156,66 @@ class cartView(generics.ListCreateAPIView, generics.DestroyAPIView):
         self.get_queryset().delete()
         return Response({'message': 'Cart cleared successfully'}, status=status.HTTP_200_OK)
 
+# View for the Cart summary
+class CartSummaryView(APIView):
+    """
+    Line count, total quantity and subtotal of the customer's cart, computed in one query.
+    """
+    permission_classes = [IsCustomer] # Only customers can access the cart
+
+    def get(self, request):
+        return Response(CartSummarySerializer(cart_summary(request.user)).data)
+
+# View for batch Cart operations
+class CartBatchView(ReplicaRoutingMixin, APIView):
+    """
+    Adds, updates and removes many cart lines in one request:
+    - Each line sets the quantity of a menu item; quantity 0 removes it.
+    - Prices are resolved and lines written in a fixed number of queries.
+    - Returns the updated cart.
+    - Pins the customer's reads to the primary database for a moment.
+    """
+    permission_classes = [IsCustomer] # Only customers can access the cart
+    throttle_scope = 'cart' # Shares the 'cart.post' limit with single-line adds
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        cart = update_cart(request.user, serializer.validated_data['lines'])
+        return Response(CartSerializer(cart, many=True).data, status=status.HTTP_200_OK)
+
 # ViewSet of Orders
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(IdempotentCreateMixin, QuerysetConditionalMixin, ReplicaRoutingMixin, ValuesListMixin, AsyncReadMixin, viewsets.ModelViewSet):
     """
     Handles CRUD operations for Orders.
     - Managers and Admins can view all orders.
     - Delivery Crew can view orders assigned to them.
     - Customers can view and create their own orders.
+    - Each order carries its item count; writes keep the per-user order counters in step.
     - Supports filtering by status and date.
     - Supports sorting by date and total.
+    - Conditional GETs return 304 based on one aggregate over the caller's orders.
+    - Supports keyset pagination (?pagination=keyset, then ?cursor=) for deep history.
+    - Line items are nested on detail views and on lists with ?expand=items; ?fields= trims the payload.
+    - /orders/summary/ returns counts and revenue computed in SQL.
+    - /orders/export/ streams all matching orders as NDJSON or CSV for Managers and Admins.
+    - /orders/dispatch/ assigns queued orders to the least-loaded Delivery Crew members.
+    - The list runs as a native async view under ASGI.
+    - The list and summary read from the replica when one is configured, except right after the caller writes.
+    - List pages without expanded items are rendered from values_list() rows without model instances.
+    - Placing an order and changing its status queue background jobs (order.placed, order.status_changed).
+    - /orders/events/ pushes order changes as Server-Sent Events under ASGI, instead of polling the list.
+    - Checkouts sent with an Idempotency-Key header run once; retries get the first response back.
     """
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated] # Only authenticated users can access orders
+    pagination_class = OrderPagination # Page numbers by default, keyset on request
+    throttle_scope = 'orders' # Per-endpoint rates 'orders.<action>'
     filter_backends = [DjangoFilterBackend, OrderingFilter]  # Enable filtering and sorting
     filterset_fields = ['status', 'date']  # Fields to filter by
     ordering_fields = ['date', 'total']  # Fields to sort by
+    async_actions = ('list', 'events')
+    replica_actions = ('list', 'summary') # Order history and reporting read from the replica when configured
 
     def get_queryset(self):
         """
@@ -117,134 +223,348 @@ class OrderViewSet(viewsets.ModelViewSet):
         - Managers and Admins can view all orders.
         - Delivery Crew can view orders assigned to them.
         - Customers can view their own orders.
+        - Line items and their menu items are loaded in one extra query per page when expanded.
         """
-        user = self.request.user
-        if IsManager().has_permission(self.request, self) or IsAdminUser().has_permission(self.request, self):
-            return Order.objects.all()  # Managers and Admins see all orders
-        elif IsDeliveryCrew().has_permission(self.request, self):
-            return Order.objects.filter(delivery_crew=user)  # Delivery Crew see orders assigned to them
-        else:
-            return Order.objects.filter(user=user)  # Customers see their own orders
+        _, scope = order_scope(self.request.user)
+        queryset = Order.objects.filter(**scope)
+        if self.action in ('update', 'partial_update'):
+            queryset = queryset.select_for_update()  # Read under update()'s transaction
+        if 'items' in self.get_expand():
+            queryset = queryset.prefetch_related(
+                Prefetch('orderitem_set', queryset=OrderItem.objects.select_related('menuitem'))
+            )
+        return queryset
+
+    def get_requested_fields(self):
+        """
+        Fields listed in ?fields=a,b, or None to render every field.
+        """
+        fields = self.request.query_params.get('fields')
+        return {name for name in fields.split(',') if name} if fields else None
+
+    def get_expand(self):
+        """
+        Nested payloads to render:
+        - Line items are included on detail views or with ?expand=items.
+        - ?fields= wins: listing 'items' expands them, leaving it out drops them.
+        """
+        expand = {name for value in self.request.query_params.getlist('expand') for name in value.split(',') if name}
+        if self.action == 'retrieve':
+            expand.add('items')
+        fields = self.get_requested_fields()
+        if fields is not None:
+            expand = (expand | {'items'}) if 'items' in fields else (expand - {'items'})
+        return expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.get_requested_fields()
+        context['expand'] = self.get_expand()
+        return context
+
+    def get_validators(self, action):
+        """
+        Expanded line items show menu item titles, so the catalog version is part of the ETag.
+        """
+        parts, last_modified = super().get_validators(action)
+        if 'items' in self.get_expand():
+            parts += (get_version(),)
+        return parts, last_modified
+
+    async def aget_validators(self, action):
+        parts, last_modified = await super().aget_validators(action)
+        if 'items' in self.get_expand():
+            parts += (await aget_version(),)
+        return parts, last_modified
 
     def perform_create(self, serializer):
         """
         Custom logic for creating an order:
-        - Create an order from the items in the cart.
-        - Calculate the total price and create OrderItem records.
+        - Create an order from the items in the cart in a single transaction.
+        - Total and OrderItem records are written in a fixed number of queries.
         - Delete the cart items after the order is created.
         """
-        cart_items = Cart.objects.filter(user=self.request.user)  # Get cart items for the current user
-        if not cart_items.exists():
-            return Response({'error': 'Cart is empty'}, status=status.HTTP_400_BAD_REQUEST)
-        total = sum(item.total_price for item in cart_items)
-        order = serializer.save(user=self.request.user, total=total)
-        for item in cart_items:
-            OrderItem.objects.create(
-                order=order,
-                menuitem=item.menuitem,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                total_price=item.total_price,
+        serializer.instance = place_order(self.request.user, **serializer.validated_data)
+
+    def perform_update(self, serializer):
+        """
+        Save the change and move the crew members' open-delivery counters in update()'s transaction.
+        A status change queues the order.status_changed job in the same transaction.
+        """
+        before = (serializer.instance.delivery_crew_id, serializer.instance.status)
+        order = serializer.save()
+        order_changed(before, (order.delivery_crew_id, order.status))
+        if order.status != before[1]:
+            queue_status_changed(order)
+        if (order.delivery_crew_id, order.status) != before:
+            previous_crew = before[0] if before[0] != order.delivery_crew_id else None
+            publish_on_commit(ORDER_UPDATED, order, previous_crew)
+
+    def perform_destroy(self, instance):
+        """
+        Delete the order and take it off the customer's and crew member's counters in one transaction.
+        """
+        with transaction.atomic():
+            order = Order.objects.select_for_update().get(pk=instance.pk)
+            order_deleted(order)
+            order.delete()
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Order count and revenue over the caller's orders, with the same role scoping and filters as the list:
+        - ?group_by=status,day,delivery_crew adds breakdowns computed with GROUP BY.
+        - Only Managers and Admins can group by delivery crew.
+        - Results are cached for ORDER_SUMMARY_CACHE_TIMEOUT seconds per scope and query string.
+        """
+        group_by = [name for value in request.query_params.getlist('group_by') for name in value.split(',') if name]
+        unknown = set(group_by) - set(ORDER_GROUPS)
+        if unknown:
+            raise ValidationError({'group_by': f'Unknown grouping: {", ".join(sorted(unknown))}'})
+        if 'delivery_crew' in group_by and not is_manager_or_admin(request.user):
+            raise PermissionDenied('Only managers can group by delivery crew.')
+
+        scope_key, _ = order_scope(request.user)
+        key = f'littlelemon:order-summary:{scope_key}:{request_signature(request)}'
+        data = cache.get(key)
+        if data is None:
+            summary = order_summary(self.filter_queryset(self.get_queryset()), dict.fromkeys(group_by))
+            data = dict(OrderSummarySerializer(summary).data)
+            cache.set(key, data, settings.ORDER_SUMMARY_CACHE_TIMEOUT)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsManager | IsAdminUser])
+    def export(self, request):
+        """
+        Stream every matching order for accounting:
+        - Only Managers and Admins can export.
+        - ?output=ndjson (default) or csv; ?expand=items adds the line items.
+        - Respects the status/date filters and ordering; ordered by id otherwise.
+        """
+        output = request.query_params.get('output', 'ndjson')
+        if output not in CONTENT_TYPES:
+            raise ValidationError({'output': f'Choose one of: {", ".join(CONTENT_TYPES)}'})
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            queryset = queryset.order_by('id')
+        include_items = 'items' in self.get_expand()
+        return stream_orders(queryset, self.get_serializer(), output, include_items)
+
+    @action(detail=False, methods=['get'], renderer_classes=[*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer])
+    def events(self, request):
+        """
+        Stream changes to the caller's orders as Server-Sent Events, with the same role scoping as the list.
+        Streams need the ASGI server (LittleLemon.asgi); the sync view only explains that.
+        """
+        return Response(
+            {'error': 'Order events are only streamed by the ASGI server.'}, status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+
+    async def aevents(self, request):
+        """
+        - Events: order.created, order.updated (status or delivery crew), resync (events were dropped; refetch).
+        - One process serves up to ORDER_EVENTS_MAX_SUBSCRIBERS streams, each holding at most
+          ORDER_EVENTS_QUEUE_SIZE undelivered events.
+        """
+        scope_key, _ = order_scope(request.user) # Roles were resolved by ainitial(), no query
+        try:
+            subscription = get_broker().subscribe(scope_key)
+        except SubscriberLimit:
+            return Response(
+                {'error': 'Too many open event streams; try again later.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': str(settings.ORDER_EVENTS_RETRY_MS // 1000)},
             )
-        cart_items.delete() # Delete all cart items for the user
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        response = StreamingHttpResponse(EventStream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no' # Proxies must not buffer the stream
+        return response
+
+    @action(detail=False, methods=['post'], url_path='dispatch', permission_classes=[IsManager | IsAdminUser])
+    def dispatch_orders(self, request):
+        """
+        Bulk-assign queued orders to the least-loaded Delivery Crew members:
+        - Only Managers and Admins can dispatch.
+        - 'limit' caps the number of orders; 'orders' and 'delivery_crew' restrict either side.
+        """
+        serializer = DispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        assigned = dispatch(data['limit'], order_ids=data.get('orders'), crew_ids=data.get('delivery_crew'))
+        return Response({
+            'assigned': sum(len(orders) for orders in assigned.values()),
+            'assignments': [{'delivery_crew': crew_id, 'orders': orders} for crew_id, orders in assigned.items()],
+        })
 
     def update(self, request, *args, **kwargs):
         """
         Custom logic for updating an order:
         - Only managers can update the delivery_crew field.
         - Customers and delivery crew can only update the status field.
+        - The whole update runs in one transaction, with the order locked from the moment it is read,
+          so the serializer starts from the current row and never writes back stale values over a
+          concurrent update or dispatch.
         """
-        instance = self.get_object()
-        user = request.user
+        with transaction.atomic():
+            instance = self.get_object()
+            user = request.user
 
-        # Check if the user is trying to update the delivery_crew field
-        if 'delivery_crew' in request.data and not (IsManager().has_permission(request, self) or IsAdminUser().has_permission(request, self)):
-            return Response(
-                {'error': 'Only managers can update the delivery crew.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+            # Check if the user is trying to update the delivery_crew field
+            if 'delivery_crew' in request.data and not is_manager_or_admin(user):
+                return Response(
+                    {'error': 'Only managers can update the delivery crew.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
 
-        # Check if the user is trying to update the status field
-        if 'status' in request.data and not (IsManager().has_permission(request, self) or IsAdminUser().has_permission(request, self) or IsDeliveryCrew().has_permission(request, self)):
-            return Response(
-                {'error': 'Only managers, admins, or delivery crew can update the status.'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        serializer = self.get_serializer(instance, data=request.data, partial=True)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data)
+            # Check if the user is trying to update the status field
+            if 'status' in request.data and not (is_manager_or_admin(user) or is_delivery_crew(user)):
+                return Response(
+                    {'error': 'Only managers, admins, or delivery crew can update the status.'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            serializer = self.get_serializer(instance, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+            return Response(serializer.data)
     
-# View for Manager Group operations
-class ManagerGroupview(APIView):
+# Shared implementation of the group membership endpoints
+class GroupMembershipView(generics.GenericAPIView):
     """
-    Handles operations for the Manager group.
-    - Admins and Managers can list, add, and remove users from the Manager group.
+    Lists, adds, and removes the users of one role group (group_name):
+    - Admins and Managers can access it.
+    - GET lists the group's users, paginated.
+    - POST adds users: 'username' for one, or lists of 'usernames' and/or 'ids'.
+    - DELETE on a user's URL removes that user; DELETE on the list with the same body removes many.
+    - Users are resolved in one query and the memberships written with one INSERT or DELETE.
     """
     permission_classes = [IsManager | IsAdminUser] # Only Admins and Managers can access this view
+    serializer_class = UserSerializer
+    group_name = None
+
+    def get_group(self):
+        # Only the id is needed for the membership queries, and it is cached per process
+        return Group(pk=get_group_id(self.group_name), name=self.group_name)
+
+    def get_queryset(self):
+        return User.objects.filter(groups=get_group_id(self.group_name)).order_by('id')
+
+    def get_users(self, request):
+        """
+        The ids and usernames of the users named in the request, with every unknown one reported.
+        """
+        serializer = GroupMembershipSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        usernames = set(data.get('usernames', []))
+        if 'username' in data:
+            usernames.add(data['username'])
+        ids = set(data.get('ids', []))
+        users = dict(User.objects.filter(Q(username__in=usernames) | Q(id__in=ids)).values_list('id', 'username'))
+        if 'username' in data and not data.get('usernames') and not ids and not users:
+            raise NotFound('No User matches the given query.') # A single unknown user, as before
+        errors = {}
+        unknown = usernames - set(users.values())
+        if unknown:
+            errors['usernames'] = [f'Unknown users: {", ".join(sorted(unknown))}']
+        unknown = ids - set(users)
+        if unknown:
+            errors['ids'] = [f'Unknown users: {", ".join(str(pk) for pk in sorted(unknown))}']
+        if errors:
+            raise ValidationError(errors)
+        return users
+
+    def change_members(self, method, users):
+        """
+        Call user_set.add or user_set.remove for the users, in a transaction of its own.
+        The group id is cached per process: when the group was deleted and recreated by another
+        process, the write fails on its foreign key, so the ids are read again and it is retried once.
+        """
+        try:
+            with transaction.atomic():
+                getattr(self.get_group().user_set, method)(*users)
+        except IntegrityError:
+            reset_group_ids()
+            with transaction.atomic():
+                getattr(self.get_group().user_set, method)(*users)
+
     def get(self, request):
         """
-        List all users in the Manager group.
+        List the users in the group.
         """
-        managers = Group.objects.get(name='Manager').user_set.all()
-        serializer = UserSerializer(managers, many=True)
-        return Response(serializer.data)
-    
+        queryset = self.get_queryset()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
     def post(self, request):
         """
-        Add a user to the Manager group.
+        Add users to the group; users already in it are left alone.
         """
-        username = request.data.get('username')
-        if not username:
-            return Response({'error': 'Username is required'}, status=status.HTTP_400_BAD_REQUEST)
-        user = get_object_or_404(User, username=username)
-        manager_group = Group.objects.get(name='Manager')
-        manager_group.user_set.add(user)
-        return Response({'message': f'{username} added to Manager group'}, status=status.HTTP_201_CREATED)
-    
-    def delete(self, request, userId):
+        users = self.get_users(request)
+        self.change_members('add', users) # One query for the current members, one INSERT
+        if len(users) == 1 and 'username' in request.data:
+            message = f'{request.data["username"]} added to {self.group_name} group'
+        else:
+            message = f'{len(users)} users added to {self.group_name} group'
+        return Response({'message': message, 'users': sorted(users)}, status=status.HTTP_201_CREATED)
+
+    def delete(self, request, userId=None):
         """
-        Remove a user from the Manager group.
+        Remove a user, or the users named in the body, from the group.
         """
-        user = get_object_or_404(User, id=userId)
-        manager_group = Group.objects.get(name='Manager')
-        manager_group.user_set.remove(user)
-        return Response({'message': f'{user.username} removed from Manager group'}, status=status.HTTP_200_OK)
+        if userId is not None:
+            user = get_object_or_404(User, id=userId)
+            users = {user.pk: user.username}
+        else:
+            users = self.get_users(request)
+        self.change_members('remove', users) # One DELETE
+        if userId is not None:
+            message = f'{users[userId]} removed from {self.group_name} group'
+        else:
+            message = f'{len(users)} users removed from {self.group_name} group'
+        return Response({'message': message, 'users': sorted(users)}, status=status.HTTP_200_OK)
+
+# View for Manager Group operations
+class ManagerGroupview(GroupMembershipView):
+    """
+    Handles operations for the Manager group.
+    - Admins and Managers can list, add, and remove users from the Manager group.
+    """
+    group_name = MANAGER
 
 # View for the Delivery Crew Group operations
-class DeliveryCrewGroup(APIView):
+class DeliveryCrewGroup(GroupMembershipView):
     """
     Handles operations for the Delivery Crew group.
     - Admins and Managers can list, add, and remove users from the Delivery Crew group.
     """
-    permission_classes = [IsAdminUser | IsManager]  # Only Admins and Managers can access this view
-    
+    group_name = DELIVERY_CREW
+
+# View for catalog cache statistics
+class CatalogCacheStatsView(APIView):
+    """
+    Reports hit, miss and eviction counters of the catalog cache for this process.
+    - Only Admins can access this view.
+    """
+    permission_classes = [IsAdminUser]
+
     def get(self, request):
-        """
-        List all users in the Delivery Crew group.
-        """
-        delivery_crew = Group.objects.get(name='Delivery Crew').user_set.all()
-        serializer = UserSerializer(delivery_crew, many=True)
-        return Response(serializer.data)
+        return Response(catalog_cache_stats())
 
-    def post(self, request):
-        """
-        Add a user to the Delivery Crew group.
-        """
-        username = request.data.get('username')
-        if not username:
-            return Response({'error': 'Username is required'}, status=status.HTTP_400_BAD_REQUEST)
-        user = get_object_or_404(User, username=username)
-        delivery_crew_group = Group.objects.get(name='Delivery Crew')
-        delivery_crew_group.user_set.add(user)
-        return Response({'message': f'{username} added to Delivery Crew group'}, status=status.HTTP_201_CREATED)
 
-    def delete(self, request, userId):
-        """
-        Remove a user from the Delivery Crew group.
-        """
-        user = get_object_or_404(User, id=userId)
-        delivery_crew_group = Group.objects.get(name='Delivery Crew')
-        delivery_crew_group.user_set.remove(user)
-        return Response({'message': f'{user.username} removed from Delivery Crew group'}, status=status.HTTP_200_OK)
\ No newline at end of file
+# View for request instrumentation
+class InstrumentationView(APIView):
+    """
+    Per-view query count, DB time, serializer time and wall time percentiles for this process.
+    - Only Admins can access this view.
+    - DELETE clears the collected samples.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(instrumentation_registry.snapshot())
+
+    def delete(self, request):
+        instrumentation_registry.reset()
+        return Response({'message': 'Instrumentation samples cleared'}, status=status.HTTP_200_OK)